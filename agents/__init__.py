@@ -7,6 +7,13 @@ from .product_owner import ProductOwnerAgent
 from .developer import DeveloperAgent
 from .qa_engineer import QAAgent
 from .tech_lead import TechLeadAgent
+from .reviewers import (
+    REVIEWERS,
+    ApiContractReviewer,
+    PerformanceReviewer,
+    SecurityReviewer,
+    SpecialistReviewer,
+)
 
 __all__ = [
     "BaseAgent",
@@ -14,4 +21,9 @@ __all__ = [
     "DeveloperAgent",
     "QAAgent",
     "TechLeadAgent",
+    "SpecialistReviewer",
+    "SecurityReviewer",
+    "PerformanceReviewer",
+    "ApiContractReviewer",
+    "REVIEWERS",
 ]
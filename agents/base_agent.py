@@ -2,25 +2,172 @@
 Classe de base pour tous les agents
 """
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 from langchain_groq import ChatGroq
+from pydantic import BaseModel
+
+from .schemas import json_instructions, json_mode_kwargs, parse_output
+from utils.token_usage import estimate_tokens, max_tokens_kwargs, response_tokens
+
+
+# Suffixes ajoutés au prompt système selon la variante choisie par le routage
+PROMPT_VARIANTS = {
+    "standard": "",
+    "concise": (
+        "\n\nIMPORTANT : Sois CONCIS. Va droit au but, limite les explications "
+        "au strict nécessaire mais respecte le format de sortie."
+    ),
+}
 
 
 class BaseAgent(ABC):
     
+    # Attributs sauvegardés dans les points de reprise (voir export_state)
+    STATE_ATTRIBUTES = ("thoughts", "actions", "llm_calls")
+    
+    # Schéma pydantic de la sortie en mode JSON (voir agents/schemas.py)
+    OUTPUT_SCHEMA: Optional[Type[BaseModel]] = None
+    
+    # Streaming avec arrêt anticipé (utils/streaming.py) : motif markdown de chaque
+    # champ de OUTPUT_SCHEMA dont l'agent peut avoir besoin
+    STREAM_FIELDS: Dict[str, str] = {}
+    # Un appel en streaming sur N va jusqu'au bout pour mesurer l'économie réelle
+    STREAM_CALIBRATION_EVERY = 10
     
     def __init__(self, name: str, role: str, llm: ChatGroq):
         self.name = name
         self.role = role
         self.llm = llm
+        self.prompt_variant = "standard"
+        # "markdown" (format historique) ou "json" (sortie structurée validée)
+        self.output_format = "markdown"
+        # Verbosité du mode JSON : "standard" ou "compact"
+        self.verbosity = "standard"
         self.thoughts: List[str] = []  
         self.actions: List[Dict[str, Any]] = []  
+        self.llm_calls: List[Dict[str, Any]] = []
+        # Budget du run (utils.budget.RunBudget), partagé par tous les agents
+        self.budget = None
+        # Arrêt de la génération dès que les champs requis sont complets
+        self.early_stop = False
+        # Dernière réponse complète par jeu de champs requis : référence des tokens économisés
+        self._stream_references: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        # Abonné des tokens consommés (bus d'événements de l'orchestrateur) : appelé avec
+        # {"kind": "chunk", "tokens"} pendant un streaming puis {"kind": "call", ...} par appel
+        self.on_tokens: Optional[Callable[[Dict[str, Any]], None]] = None
     
     @abstractmethod
     def _get_system_prompt(self) -> str:
         pass
     
+    def _get_json_prompt(self) -> str:
+        """Mission de l'agent en mode JSON (sans les consignes de format markdown)"""
+        raise NotImplementedError
+    
+    def _uses_json(self) -> bool:
+        return self.output_format == "json" and self.OUTPUT_SCHEMA is not None
+    
+    def _build_system_prompt(self, prompt_variant: Optional[str] = None) -> str:
+        """Prompt système selon le format de sortie, complété par la variante de prompt"""
+        variant = PROMPT_VARIANTS.get(prompt_variant or self.prompt_variant, "")
+        if self._uses_json():
+            return (
+                f"{self._get_json_prompt()}\n\n"
+                f"{json_instructions(self.OUTPUT_SCHEMA, self.verbosity)}{variant}"
+            )
+        return self._get_system_prompt() + variant
+    
+    def _parse_structured(self, response: str) -> Optional[BaseModel]:
+        """Sortie JSON validée, ou None (mode markdown ou JSON invalide)"""
+        if not self._uses_json():
+            return None
+        parsed = parse_output(self.OUTPUT_SCHEMA, response)
+        if parsed is None:
+            self.add_thought("⚠️ Réponse JSON non conforme au schéma : repli sur l'analyse du markdown")
+        return parsed
+    
+    def _invoke_llm(self, messages, required_fields: Tuple[str, ...] = (), **kwargs):
+        """
+        Appel LLM commun à tous les agents (chronométré, contraint par le budget)
+        
+        Args:
+            required_fields: Champs (clés de STREAM_FIELDS) dont l'appelant a
+                besoin ; en mode early_stop, la génération s'arrête dès
+                qu'ils sont complets
+        """
+        if self._uses_json():
+            kwargs = {**json_mode_kwargs(self.llm), **kwargs}
+        llm = self._early_stop_llm(required_fields) if self.early_stop and required_fields else self.llm
+        start = time.perf_counter()
+        if self.budget:
+            response = self.budget.invoke(llm, messages, **kwargs)
+        else:
+            response = llm.invoke(messages, **kwargs)
+        call = {
+            "model": getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None),
+            "latency_s": round(time.perf_counter() - start, 3)
+        }
+        if llm is not self.llm and llm.stats:
+            call["stream"] = self._stream_savings(tuple(required_fields), llm.stats)
+        self.llm_calls.append(call)
+        if self.on_tokens:
+            self.on_tokens({
+                "kind": "call", "model": call["model"], "latency_s": call["latency_s"],
+                **response_tokens(response, messages)
+            })
+        return response
+    
+    def _early_stop_llm(self, required_fields: Tuple[str, ...]):
+        """Client en streaming qui s'arrête dès que les champs requis sont complets"""
+        from utils.streaming import EarlyStopLLM, FieldDetector
+        
+        detector = FieldDetector(
+            {name: self.STREAM_FIELDS[name] for name in required_fields},
+            self.OUTPUT_SCHEMA if self._uses_json() else None
+        )
+        reference = self._stream_references.get(tuple(required_fields))
+        calibrate = reference is None or reference["calls"] % self.STREAM_CALIBRATION_EVERY == 0
+        on_chunk = (
+            (lambda text: self.on_tokens({"kind": "chunk", "tokens": estimate_tokens(text)}))
+            if self.on_tokens else None
+        )
+        return EarlyStopLLM(self.llm, detector, calibrate=calibrate, on_chunk=on_chunk)
+    
+    def _stream_savings(self, required_fields: Tuple[str, ...], stats: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Tokens et millisecondes économisés par un appel en streaming
+        
+        Un arrêt anticipé est comparé à la dernière réponse complète pour
+        les mêmes champs ; une réponse lue jusqu'au bout devient la
+        nouvelle référence (et mesure exactement l'économie possible).
+        """
+        reference = self._stream_references.setdefault(required_fields, {"calls": 0, "tokens": None})
+        reference["calls"] += 1
+        saved_tokens = saved_ms = 0
+        avoidable_tokens = avoidable_ms = None
+        if stats["early_stop"]:
+            if reference["tokens"]:
+                saved_tokens = max(0, reference["tokens"] - stats["completion_tokens"])
+                saved_ms = round(saved_tokens * stats["ms_per_token"])
+        else:
+            reference["tokens"] = stats["completion_tokens"]
+            if stats["fields_tokens"] is not None:
+                avoidable_tokens = stats["completion_tokens"] - stats["fields_tokens"]
+                avoidable_ms = stats["elapsed_ms"] - stats["fields_ms"]
+        return {
+            **stats,
+            "saved_tokens": saved_tokens,
+            "saved_ms": saved_ms,
+            "avoidable_tokens": avoidable_tokens,
+            "avoidable_ms": avoidable_ms
+        }
+    
+    def _max_tokens_kwargs(self, max_tokens: int) -> Dict[str, Any]:
+        """Paramètre d'appel limitant la longueur de la réponse (nom propre au fournisseur)"""
+        return max_tokens_kwargs(self.llm, max_tokens)
+    
     def add_thought(self, thought: str):
         self.thoughts.append(f"[{self.name}] {thought}")
     
@@ -34,11 +181,34 @@ class BaseAgent(ABC):
     def reset(self):
         self.thoughts = []
         self.actions = []
+        self.llm_calls = []
     
     def get_trace(self) -> Dict[str, Any]:
         return {
             "agent": self.name,
             "role": self.role,
             "thoughts": self.thoughts.copy(),
-            "actions": self.actions.copy()
+            "actions": self.actions.copy(),
+            "llm_calls": self.llm_calls.copy()
         }
+    
+    def replay_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Rejoue les effets d'une étape réutilisée depuis le cache d'étapes
+        
+        Les sous-classes mettent à jour leur état interne comme si la
+        méthode avait été exécutée ; le résultat est renvoyé avec les
+        pensées courantes de l'agent.
+        """
+        self.add_thought("♻️ Entrées inchangées : résultat précédent réutilisé")
+        return {**result, "thoughts": self.thoughts.copy()}
+    
+    def export_state(self) -> Dict[str, Any]:
+        """État interne sérialisable de l'agent (pour reprendre un run)"""
+        return {attribute: getattr(self, attribute) for attribute in self.STATE_ATTRIBUTES}
+    
+    def load_state(self, state: Dict[str, Any]):
+        """Restaure un état produit par export_state"""
+        for attribute in self.STATE_ATTRIBUTES:
+            if attribute in state:
+                setattr(self, attribute, state[attribute])
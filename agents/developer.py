@@ -3,22 +3,48 @@ Agent Lead Developer
 Responsable de l'écriture du code avec raisonnement ReAct (Reason + Act)
 """
 
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_groq import ChatGroq
 from .base_agent import BaseAgent
+from .schemas import DeveloperOutput
+from utils.code_checks import compare_split_execution, score_candidate
+from utils.convergence import bug_fingerprint
+from utils.project import merge_story_modules, split_project, story_file
+from utils.streaming import python_block
+from utils.token_usage import response_tokens
 
 #Lead Developer Agent  Code with ReAct reasoning
 class DeveloperAgent(BaseAgent):
     
     
-    def __init__(self, llm: ChatGroq):
+    STATE_ATTRIBUTES = BaseAgent.STATE_ATTRIBUTES + ("code_iterations", "user_stories")
+    OUTPUT_SCHEMA = DeveloperOutput
+    
+    # Itérations anciennes résumées individuellement dans le prompt de correction
+    MEMORY_SUMMARIES = 3
+    
+    # Arrêt anticipé du streaming : le bloc de code fermé suffit
+    STREAM_FIELDS = {"code": python_block()}
+    
+    # Développement par User Story : stories implémentées simultanément au plus
+    STORY_WORKERS = 4
+    
+    def __init__(self, llm: ChatGroq, n_candidates: int = 1):
         super().__init__(
             name="Lead Developer",
             role="Développeur senior Python",
             llm=llm
         )
         self.code_iterations = []
+        # Spécifications d'origine, toujours rappelées dans les corrections
+        self.user_stories: Optional[str] = None
+        # Best-of-N : nombre de candidats générés en parallèle par appel
+        self.n_candidates = max(1, n_candidates)
+        # Exécution des tests de référence pour classer les candidats (code LLM lancé en local)
+        self.execute_tests = False
     
     def _get_system_prompt(self) -> str:
         """Retourne le prompt système pour le Developer"""
@@ -74,35 +100,204 @@ if __name__ == "__main__":
 
 Sois PROFESSIONNEL et RIGOUREUX."""
     
-    def generate_code(self, user_stories: str, iteration: int = 1) -> Dict[str, any]:
+    def _get_json_prompt(self) -> str:
+        """Mission du Developer en mode JSON"""
+        return """Tu es un Lead Developer Python expérimenté.
+
+Ta mission : ÉCRIRE DU CODE de haute qualité. Raisonne en ReAct (pensée, action,
+observation) avant d'écrire le code, et résume ce raisonnement dans le champ dédié.
+
+## Règles de qualité :
+- Code complet, PEP 8, docstrings, type hints, gestion d'erreurs
+- PAS de TODO, PAS d'imports inutiles, PAS de valeurs sensibles en dur
+- Point d'entrée main() protégé par if __name__ == "__main__" """
+    
+    def generate_code(
+        self,
+        user_stories: str,
+        iteration: int = 1,
+        reference_tests: Optional[str] = None
+    ) -> Dict[str, any]:
        
         self.add_thought(f" Début de la génération de code (itération {iteration})")
+        if not self.code_iterations:
+            self.user_stories = user_stories
         
         # Construire le contexte
         context = f"""User Stories à implémenter :
 {user_stories}
 
 Génère le code Python complet en suivant la méthodologie ReAct."""
+        
+        return self._generate(context, iteration, reference_tests)
+    
+    def generate_code_by_story(
+        self,
+        user_stories: str,
+        stories: List[Dict[str, str]],
+        iteration: int = 1
+    ) -> Dict[str, any]:
+        """
+        Développement parallèle par User Story
+        
+        Une interface commune (types partagés, signatures) est d'abord fixée,
+        puis chaque story est implémentée par un appel concurrent dans son
+        propre fichier ; les fichiers sont fusionnés en un projet vérifié
+        comme un tout (module aplati avec marqueurs de fichiers).
+        
+        Args:
+            user_stories: User Stories complètes (contexte commun)
+            stories: Stories découpées (ProductOwnerAgent.split_user_stories)
+            
+        Returns:
+            Même structure que generate_code, plus files, stories et merge
+        """
+        self.add_thought(f" Développement par User Story : {len(stories)} stories en parallèle")
+        if not self.code_iterations:
+            self.user_stories = user_stories
+        
+        interface = self._design_interface(user_stories, stories)
+        self.add_thought(f"📐 Interface commune fixée ({len(interface['code'].splitlines())} lignes)")
+        
+        with ThreadPoolExecutor(max_workers=min(self.STORY_WORKERS, len(stories))) as pool:
+            modules = list(pool.map(
+                lambda story: self._implement_story(story, interface["code"], user_stories),
+                stories
+            ))
+        
+        merged = merge_story_modules(
+            interface["code"],
+            {story_file(story["id"]): module["code"] for story, module in zip(stories, modules)}
+        )
+        checks = score_candidate(merged["code"])
+        if merged["conflicts"]:
+            self.add_thought(f"⚠️ Définitions en double entre stories : {', '.join(merged['conflicts'])}")
+        if merged["unimplemented"]:
+            self.add_thought(f"⚠️ Interface non implémentée : {', '.join(merged['unimplemented'])}")
+        if not checks["compiles"]:
+            self.add_thought(f"⚠️ Le projet fusionné ne compile pas : {checks['compile_error']}")
+        if merged["split_mismatches"]:
+            self.add_thought(f"⚠️ Fichiers non équivalents au module fusionné : {'; '.join(merged['split_mismatches'])}")
+        # Comportement comparé en exécutant les deux formes : seulement si l'exécution est autorisée
+        execution = compare_split_execution(merged["code"], split_project(merged["code"])) \
+            if checks["compiles"] and self.execute_tests else None
+        if execution and not execution["same"]:
+            self.add_thought("⚠️ main.py du projet multi-fichiers ne se comporte pas comme le module fusionné")
+        
+        reasoning = "\n\n".join(
+            [f"[Interface] {interface['reasoning']}"]
+            + [f"[{story['id']}] {module['reasoning']}" for story, module in zip(stories, modules)]
+        )
+        raw_response = "\n\n".join(
+            [f"=== Interface ===\n{interface['raw_response']}"]
+            + [f"=== {story['id']} ===\n{module['raw_response']}" for story, module in zip(stories, modules)]
+        )
+        result = self._record({
+            "response": AIMessage(content=raw_response),
+            "parsed": {"reasoning": reasoning, "code": merged["code"]},
+            "candidates": []
+        }, iteration)
+        result["files"] = merged["files"]
+        result["stories"] = [
+            {"id": story["id"], "title": story["title"], "file": story_file(story["id"]), "lines": len(module["code"].splitlines())}
+            for story, module in zip(stories, modules)
+        ]
+        result["merge"] = {
+            "conflicts": merged["conflicts"],
+            "unimplemented": merged["unimplemented"],
+            "compiles": checks["compiles"],
+            "issues": checks["issues"],
+            "split_mismatches": merged["split_mismatches"],
+            "split_execution": execution
+        }
+        return result
+    
+    def _design_interface(self, user_stories: str, stories: List[Dict[str, str]]) -> Dict[str, str]:
+        """Interface commune du projet, convenue avant le développement parallèle"""
+        ids = ", ".join(story["id"] for story in stories)
+        context = f"""User Stories du projet :
+{user_stories}
 
-        if iteration > 1:
-            # Ajouter l'historique des corrections
-            context += f"\n\nCeci est l'itération {iteration}. Voici l'historique :\n"
-            for i, prev in enumerate(self.code_iterations, 1):
-                context += f"\n--- Itération {i} ---\n"
-                if "feedback" in prev:
-                    context += f"Feedback QA : {prev['feedback']}\n"
+Le projet va être développé en parallèle, un développeur par User Story ({ids}).
+Écris d'abord l'INTERFACE COMMUNE (fichier interface.py) que tous respecteront :
+- types partagés (exceptions, dataclasses, constantes) complètement implémentés ;
+- signature complète, type hints et docstring de chaque fonction ou classe publique, corps réduit à `...` ;
+- au-dessus de chaque signature, un commentaire `# USn` désignant la User Story qui l'implémente ;
+- une fonction main() (point d'entrée), attribuée à l'une des User Stories.
+N'implémente aucune logique métier."""
+        return self._generate_module(context)
+    
+    def _implement_story(self, story: Dict[str, str], interface: str, user_stories: str) -> Dict[str, str]:
+        """Fichier d'une User Story, écrit contre l'interface commune (sans effet sur l'état de l'agent)"""
+        context = f"""User Stories du projet (contexte) :
+{user_stories}
+
+Interface commune (fichier interface.py, déjà écrit) :
+```python
+{interface}
+```
+
+Implémente UNIQUEMENT la User Story {story['id']} dans le fichier {story_file(story['id'])} :
+{story['text']}
+
+Règles :
+- implémente les fonctions et classes de l'interface marquées `# {story['id']}`, avec exactement leurs signatures ;
+- importe l'interface avec `from interface import *` ; n'importe aucun autre fichier du projet ;
+- ne redéfinis ni les types partagés ni ce qui est attribué aux autres User Stories ;
+- pas de bloc `if __name__ == "__main__"`."""
+        return self._generate_module(context)
+    
+    def _generate_module(self, context: str) -> Dict[str, str]:
+        """Un appel LLM produisant un fichier : raisonnement, code et réponse brute"""
+        messages = [
+            SystemMessage(content=self._build_system_prompt()),
+            HumanMessage(content=context)
+        ]
+        response = self._invoke_llm(messages, ("code",))
+        parsed = self._parse_response(response.content)
+        return {**parsed, "raw_response": response.content}
+    
+    def _generate(self, context: str, iteration: int, reference_tests: Optional[str] = None) -> Dict[str, any]:
+        """Appel LLM (ou best-of-N) pour un contexte donné, puis enregistrement de l'itération"""
+        return self._record(self._propose(context, reference_tests), iteration)
+    
+    def _propose(self, context: str, reference_tests: Optional[str] = None) -> Dict[str, any]:
+        """
+        Génère le code d'un contexte sans modifier l'état de l'agent
+        (seul le journal des appels LLM est alimenté)
         
+        Returns:
+            Proposition : réponse retenue, réponse parsée, candidats et tokens consommés
+        """
         messages = [
-            SystemMessage(content=self._get_system_prompt()),
+            SystemMessage(content=self._build_system_prompt()),
             HumanMessage(content=context)
         ]
         
-        # Appel au LLM
-        self.add_thought("💭 Raisonnement ReAct en cours...")
-        response = self.llm.invoke(messages)
+        candidates = []
+        if self.n_candidates > 1:
+            response, parsed, candidates = self._best_of_n(messages, reference_tests)
+            tokens = sum(candidate["tokens"] for candidate in candidates)
+        else:
+            response = self._invoke_llm(messages, ("code",))
+            
+            # Parser la réponse
+            parsed = self._parse_response(response.content)
+            tokens = response_tokens(response, messages)["total"]
         
-        # Parser la réponse
-        parsed = self._parse_response(response.content)
+        return {"response": response, "parsed": parsed, "candidates": candidates, "tokens": tokens}
+    
+    def _record(self, proposal: Dict[str, any], iteration: int) -> Dict[str, any]:
+        """Enregistre une proposition comme nouvelle itération du code"""
+        response, parsed, candidates = proposal["response"], proposal["parsed"], proposal["candidates"]
+        
+        self.add_thought("💭 Raisonnement ReAct en cours...")
+        if candidates:
+            best = max(candidates, key=lambda candidate: candidate["score"])
+            self.add_thought(f"🎲 {len(candidates)} candidats générés en parallèle")
+            self.add_thought(
+                f"🏆 Candidat retenu (température {best['temperature']}, score {best['score']:.0f})"
+            )
         
         # Sauvegarder cette itération
         self.code_iterations.append({
@@ -120,12 +315,64 @@ Génère le code Python complet en suivant la méthodologie ReAct."""
             "reasoning": parsed["reasoning"],
             "iteration": iteration,
             "thoughts": self.thoughts.copy(),
-            "raw_response": response.content
+            "raw_response": response.content,
+            "candidates": candidates
         }
     
+    def _candidate_temperatures(self) -> List[float]:
+        """Températures réparties entre 0.2 et 1.0 pour diversifier les candidats"""
+        if self.n_candidates == 1:
+            return [0.3]
+        step = 0.8 / (self.n_candidates - 1)
+        return [round(0.2 + i * step, 2) for i in range(self.n_candidates)]
+    
+    def _best_of_n(self, messages, reference_tests: Optional[str] = None):
+        """
+        Génère N candidats en parallèle et garde le meilleur
+        
+        Le classement est local (sans LLM) : compilation, contrôles
+        statiques, puis taux de réussite des tests de référence s'ils existent.
+        
+        Returns:
+            (réponse retenue, réponse parsée, résumé des candidats)
+        """
+        temperatures = self._candidate_temperatures()
+        
+        with ThreadPoolExecutor(max_workers=len(temperatures)) as pool:
+            responses = list(pool.map(
+                lambda temperature: self._invoke_llm(messages, ("code",), temperature=temperature),
+                temperatures
+            ))
+        
+        ranked = []
+        for index, (temperature, response) in enumerate(zip(temperatures, responses)):
+            parsed = self._parse_response(response.content)
+            checks = score_candidate(parsed["code"], reference_tests, execute=self.execute_tests)
+            ranked.append((checks["score"], -index, response, parsed, {
+                "temperature": temperature,
+                "score": checks["score"],
+                "compiles": checks["compiles"],
+                "issues": len(checks["issues"]),
+                "pass_rate": checks["tests"]["pass_rate"] if checks["tests"] else None,
+                "tokens": response_tokens(response, messages)["total"]
+            }))
+        
+        ranked.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        _, _, response, parsed, _ = ranked[0]
+        
+        summary = [item[4] for item in sorted(ranked, key=lambda item: -item[1])]
+        return response, parsed, summary
+    
     def _parse_response(self, response: str) -> Dict[str, str]:
         """Parse la réponse pour extraire le raisonnement et le code"""
         
+        structured = self._parse_structured(response)
+        if structured:
+            return {
+                "reasoning": structured.reasoning or "Pas de raisonnement structuré détecté",
+                "code": structured.code or "# Erreur : Code non généré correctement"
+            }
+        
         reasoning = ""
         code = ""
         
@@ -154,17 +401,132 @@ Génère le code Python complet en suivant la méthodologie ReAct."""
             "code": code or "# Erreur : Code non généré correctement"
         }
     
-    def fix_code(self, feedback: str) -> Dict[str, any]:
+    def fix_code(
+        self,
+        feedback: str,
+        reference_tests: Optional[str] = None,
+        bugs: Optional[List[str]] = None
+    ) -> Dict[str, any]:
+        """
+        Corrige le dernier code à partir du feedback QA
+        
+        Args:
+            feedback: Feedback complet du QA sur le dernier code
+            reference_tests: Tests du QA pour classer les candidats (best-of-N)
+            bugs: Bugs critiques signalés sur le dernier code (pour résumer l'historique)
+        """
+        return self.commit_fix(self.prepare_fix(feedback, reference_tests, bugs))
+    
+    def prepare_fix(
+        self,
+        feedback: str,
+        reference_tests: Optional[str] = None,
+        bugs: Optional[List[str]] = None
+    ) -> Dict[str, any]:
+        """
+        Première moitié de fix_code, sans effet sur l'état de l'agent :
+        génère la correction du dernier code (peut être lancée par anticipation)
+        
+        Returns:
+            Proposition à passer à commit_fix
+        """
+        proposal = self._propose(self.build_fix_context(feedback, bugs), reference_tests)
+        return {**proposal, "feedback": feedback, "bugs": bugs, "base_iteration": len(self.code_iterations)}
+    
+    def commit_fix(self, proposal: Dict[str, any]) -> Dict[str, any]:
+        """Seconde moitié de fix_code : enregistre la correction préparée"""
+        if proposal["base_iteration"] != len(self.code_iterations):
+            raise ValueError("Correction préparée sur une version du code qui n'est plus la dernière")
+        
         self.add_thought(f" Correction du code basée sur le feedback QA")
         
         # Récupérer la dernière itération
         last_iteration = self.code_iterations[-1]
-        last_iteration["feedback"] = feedback
+        last_iteration["feedback"] = proposal["feedback"]
+        last_iteration["bugs"] = proposal["bugs"]
         
-        # Générer la correction (nouvelle itération)
-        return self.generate_code(
-            user_stories=f"Code précédent à corriger :\n{last_iteration['code']}\n\nFeedback QA :\n{feedback}",
-            iteration=len(self.code_iterations) + 1
-        )
+        # Enregistrer la correction (nouvelle itération)
+        result = self._record(proposal, len(self.code_iterations) + 1)
+        result["feedback"] = proposal["feedback"]
+        result["bugs"] = proposal["bugs"]
+        return result
+    
+    def build_fix_context(self, feedback: str, bugs: Optional[List[str]] = None) -> str:
+        """
+        Prompt de correction à mémoire bornée
+        
+        Les User Stories d'origine restent épinglées, le dernier code et son
+        feedback sont donnés en entier, et les itérations plus anciennes sont
+        réduites à leurs problèmes corrigés / encore ouverts : la taille du
+        prompt reste à peu près constante d'une itération à l'autre.
+        """
+        last_iteration = self.code_iterations[-1]
+        context = ""
+        if self.user_stories:
+            context += f"User Stories à implémenter (spécifications d'origine) :\n{self.user_stories}\n\n"
+        
+        history = self._summarize_history(bugs)
+        if history:
+            context += "Historique résumé des itérations précédentes :\n" + "\n".join(history) + "\n\n"
+        
+        context += f"""Code actuel (itération {len(self.code_iterations)}) à corriger :
+```python
+{last_iteration['code']}
+```
+
+Feedback QA sur ce code :
+{feedback}
+
+Corrige le code en suivant la méthodologie ReAct, sans perdre aucune fonctionnalité des User Stories."""
+        if split_project(last_iteration['code']):
+            context += "\nLe code est un projet multi-fichiers : conserve chaque marqueur « # ==== FICHIER : ... ==== » et le découpage en fichiers."
+        return context
+    
+    def _summarize_history(self, latest_bugs: Optional[List[str]]) -> List[str]:
+        """Une ligne par itération antérieure : problèmes corrigés et encore ouverts"""
+        older = self.code_iterations[:-1]
+        if not older:
+            return []
+        
+        # Bugs signalés sur chaque itération, puis sur le code actuel
+        reported = [previous.get("bugs") for previous in older] + [latest_bugs]
+        lines = []
+        for index, previous in enumerate(older):
+            bugs, next_bugs = reported[index], reported[index + 1]
+            if bugs is None or next_bugs is None:
+                first_line = next((line for line in (previous.get("feedback") or "").splitlines() if line.strip()), "")
+                lines.append(f"- Itération {previous['iteration']} : {self._shorten(first_line) or 'pas de feedback'}")
+                continue
+            
+            remaining = {bug_fingerprint(bug) for bug in next_bugs}
+            fixed = [bug for bug in bugs if bug_fingerprint(bug) not in remaining]
+            still_open = [bug for bug in bugs if bug_fingerprint(bug) in remaining]
+            summary = f"- Itération {previous['iteration']} : "
+            summary += f"corrigé(s) : {'; '.join(self._shorten(bug) for bug in fixed[:5]) or 'aucun'}"
+            if still_open:
+                summary += f" | encore ouvert(s) : {'; '.join(self._shorten(bug) for bug in still_open[:5])}"
+            lines.append(summary)
+        
+        if len(lines) > self.MEMORY_SUMMARIES:
+            omitted = len(lines) - self.MEMORY_SUMMARIES
+            lines = [f"- {omitted} itération(s) plus ancienne(s) omise(s)"] + lines[-self.MEMORY_SUMMARIES:]
+        return lines
+    
+    @staticmethod
+    def _shorten(text: str, width: int = 100) -> str:
+        return textwrap.shorten(text, width=width, placeholder="…")
+    
+    def replay_result(self, result: Dict[str, any]) -> Dict[str, any]:
+        """Réenregistre l'itération réutilisée (et le feedback qui l'a produite)"""
+        if result.get("feedback") and self.code_iterations:
+            self.code_iterations[-1]["feedback"] = result["feedback"]
+            self.code_iterations[-1]["bugs"] = result.get("bugs")
+        self.code_iterations.append({
+            "iteration": result["iteration"],
+            "reasoning": result["reasoning"],
+            "code": result["code"],
+            "raw_response": result["raw_response"]
+        })
+        return super().replay_result(result)
 
 
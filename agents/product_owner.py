@@ -4,9 +4,13 @@ from typing import List, Dict, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_groq import ChatGroq
 from .base_agent import BaseAgent
+from .schemas import ProductOwnerOutput, render_user_stories
 
 #Product Owner Agent - Analyzes and specifies requirements
 class ProductOwnerAgent(BaseAgent):
+    
+    OUTPUT_SCHEMA = ProductOwnerOutput
+    
     def __init__(self, llm: ChatGroq, pdf_context: Optional[str] = None):
         super().__init__(
             name="Product Owner",
@@ -56,24 +60,56 @@ Sois PRÉCIS et STRUCTURÉ."""
         
         return base_prompt
     
-    def analyze_request(self, user_request: str) -> Dict[str, any]:
+    def _get_json_prompt(self) -> str:
+        """Mission du PO en mode JSON"""
+        prompt = """Tu es un Product Owner expérimenté dans une équipe de développement.
+
+Ta mission : analyser la demande utilisateur, la décomposer en User Stories
+claires avec leurs critères d'acceptation, et lister les contraintes techniques."""
+        
+        if self.pdf_context:
+            prompt += f"\n\n## Documentation technique disponible :\n{self.pdf_context}"
+        
+        return prompt
+    
+    def analyze_request(self, user_request: str, similar_run: Optional[Dict] = None) -> Dict[str, any]:
+        """
+        Args:
+            user_request: Demande utilisateur
+            similar_run: Run passé proche ({"request", "user_stories"}), fourni
+                comme exemple seulement : la demande peut en différer
+        """
         self.thoughts.append(" Début de l'analyse de la demande utilisateur...")
         
+        content = f"Demande utilisateur : {user_request}"
+        if similar_run:
+            self.thoughts.append(f" Run passé proche fourni comme exemple : « {similar_run['request'][:80]} »")
+            content += (
+                "\n\n## Exemple : User Stories d'une demande passée proche\n"
+                f"Demande passée : {similar_run['request']}\n\n{similar_run['user_stories']}\n\n"
+                "Attention : la demande actuelle peut différer (sens, formats, technologies, options). "
+                "Ne reprends de cet exemple que ce qui s'applique réellement à la demande actuelle."
+            )
+        
         # Construire le prompt
         messages = [
-            SystemMessage(content=self._get_system_prompt()),
-            HumanMessage(content=f"Demande utilisateur : {user_request}")
+            SystemMessage(content=self._build_system_prompt()),
+            HumanMessage(content=content)
         ]
         
         # Appel au LLM
         self.thoughts.append(" Raisonnement en cours (CoT)...")
-        response = self.llm.invoke(messages)
-        analysis = self._parse_analysis(response.content)
+        response = self._invoke_llm(messages)
+        
+        # En mode JSON, les User Stories sont rendues dans le format markdown habituel
+        structured = self._parse_structured(response.content)
+        user_stories = render_user_stories(structured) if structured else response.content
+        analysis = self._parse_analysis(user_stories)
         
         self.thoughts.append(" Analyse termine et User Stories crees")
         
         return {
-            "raw_response": response.content,
+            "raw_response": user_stories,
             "analysis": analysis,
             "thoughts": self.thoughts.copy()
         }
@@ -86,10 +122,30 @@ Sois PRÉCIS et STRUCTURÉ."""
         return {
             "full_text": response,
             "user_stories_count": len(us_matches),
+            "user_stories": [story["id"] for story in self.split_user_stories(response)],
             "has_acceptance_criteria": "Critères d'acceptation" in response,
             "has_constraints": "Contraintes techniques" in response
         }
     
+    @staticmethod
+    def split_user_stories(user_stories: str) -> List[Dict[str, str]]:
+        """
+        Découpe les User Stories (format markdown du PO) une par une
+        
+        Returns:
+            Liste de dicts avec id (« US1 »), title et text (bloc complet de la story)
+        """
+        import re
+        
+        matches = list(re.finditer(r'^\s*\*\*(US\d+)\*\*\s*:\s*(.*)$', user_stories, re.MULTILINE))
+        stories = []
+        for index, match in enumerate(matches):
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(user_stories)
+            # La section suivante (« ## Contraintes techniques ») ne fait pas partie de la story
+            text = re.split(r'^\s*##\s', user_stories[match.start():end], maxsplit=1, flags=re.MULTILINE)[0]
+            stories.append({"id": match.group(1), "title": match.group(2).strip(), "text": text.strip()})
+        return stories
+    
     def ask_clarification(self, question: str) -> str:
         """Pose une question de clarification à l'utilisateur"""
         self.thoughts.append(f"❓ Question de clarification : {question}")
@@ -1,12 +1,41 @@
 
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_groq import ChatGroq
 from .base_agent import BaseAgent
+from .schemas import QAOutput
+from utils.streaming import numbered_section, python_block
+from utils.code_units import (
+    MODULE_UNIT, batch_units, callers_of, combine_tests, diff_units, extract_units,
+    interface_summary, merge_tests, split_tests, unit_at_line
+)
 
 #QA Engineer - Test and critique with Self-Correction
 class QAAgent(BaseAgent):
+    STATE_ATTRIBUTES = BaseAgent.STATE_ATTRIBUTES + ("bugs_found", "tests_generated")
+    OUTPUT_SCHEMA = QAOutput
+    
+    # Au-delà de cette part du code modifiée, la revue incrémentale n'apporte rien
+    MAX_CHANGED_RATIO = 0.7
+    
+    # Revue map-reduce : taille minimale du code et taille des lots revus en parallèle
+    MAP_REDUCE_MIN_LINES = 300
+    MAP_REDUCE_CHUNK_CHARS = 6000
+    MAP_REDUCE_WORKERS = 4
+    
+    # Arrêt anticipé du streaming : fin de chaque champ en markdown, et champs attendus par appel
+    STREAM_FIELDS = {
+        "critical_bugs": numbered_section("Bugs critiques"),
+        "minor_bugs": numbered_section("Bugs mineurs"),
+        "quality_score": r"Score[^\n]*?\d+/10",
+        "tests": python_block(after="TESTS UNITAIRES")
+    }
+    REVIEW_FIELDS = ("critical_bugs", "minor_bugs", "quality_score", "tests")
+    CRITIQUE_FIELDS = ("critical_bugs", "minor_bugs", "quality_score")
+    TESTS_FIELDS = ("tests",)
+    
     def __init__(self, llm: ChatGroq):
         super().__init__(
             name="QA Engineer",
@@ -14,6 +43,8 @@ class QAAgent(BaseAgent):
             llm=llm
         )
         self.bugs_found = []
+        # Revue map-reduce des gros fichiers (activée par l'orchestrateur)
+        self.map_reduce = False
         self.tests_generated = []
     
     def _get_system_prompt(self) -> str:
@@ -88,8 +119,30 @@ def test_fonction_1_error_handling():
 
 Sois RIGOUREUX et CONSTRUCTIF."""
     
+    def _get_json_prompt(self) -> str:
+        """Mission du QA en mode JSON"""
+        return """Tu es un QA Engineer senior expert en Python.
+
+Ta mission : CRITIQUER le code et GÉNÉRER des tests pytest. Analyse le code, remets
+en question ta première analyse (Self-Correction), puis donne ton jugement final.
+
+Critères : gestion d'erreurs, edge cases, sécurité, performance, maintenabilité, PEP 8.
+Un bug critique est bloquant ; cite la ligne concernée et l'impact."""
+    
+    def map_reduce_units(self, code: str) -> Optional[Dict[str, Dict]]:
+        """Unités à revoir en map-reduce, None si le code se revoit d'un bloc"""
+        if self.map_reduce and len(code.splitlines()) >= self.MAP_REDUCE_MIN_LINES:
+            units = extract_units(code)
+            if units and len(units) > 1:
+                return units
+        return None
+    
     def review_code(self, code: str, user_stories: str) -> Dict[str, any]:
        
+        units = self.map_reduce_units(code)
+        if units:
+            return self._review_map_reduce(code, units, user_stories)
+        
         self.add_thought("🔍 Début de la revue de code...")
         
         context = f"""User Stories de référence :
@@ -103,13 +156,13 @@ Code à reviewer :
 Effectue une revue complète en utilisant la méthodologie Self-Correction."""
 
         messages = [
-            SystemMessage(content=self._get_system_prompt()),
+            SystemMessage(content=self._build_system_prompt()),
             HumanMessage(content=context)
         ]
         
         # Appel au LLM
         self.add_thought(" Analyse avec Self-Correction en cours...")
-        response = self.llm.invoke(messages)
+        response = self._invoke_llm(messages, self.REVIEW_FIELDS)
         
         # Parser la réponse
         parsed = self._parse_review(response.content)
@@ -133,29 +186,383 @@ Effectue une revue complète en utilisant la méthodologie Self-Correction."""
             "raw_response": response.content
         }
     
-    def _parse_review(self, response: str) -> Dict[str, any]:
-        import re
+    def critique_code(self, code: str, user_stories: str) -> Dict[str, any]:
+        """
+        Revue seule, sans génération de tests (revue scindée : les tests
+        sont écrits en parallèle par write_tests)
+        """
+        self.add_thought("🔍 Revue du code (tests écrits en parallèle)...")
+        
+        context = f"""User Stories de référence :
+{user_stories}
+
+Code à reviewer :
+```python
+{code}
+```
+
+Effectue une revue complète en utilisant la méthodologie Self-Correction.
+Les tests sont écrits séparément : n'écris PAS la section TESTS UNITAIRES (ni de champ tests dans le JSON, laisse-le vide)."""
+        
+        messages = [
+            SystemMessage(content=self._build_system_prompt()),
+            HumanMessage(content=context)
+        ]
+        response = self._invoke_llm(messages, self.CRITIQUE_FIELDS)
+        parsed = self._parse_review(response.content)
+        
+        self.add_action("critique_code", f"Bugs: {len(parsed['critical_bugs'])}")
+        return {
+            **parsed,
+            "tests": "",
+            "part": "critique",
+            "thoughts": self.thoughts.copy(),
+            "raw_response": response.content
+        }
+    
+    def write_tests(self, code: str, user_stories: str) -> Dict[str, any]:
+        """Tests pytest seuls, écrits à partir des User Stories et du code (revue scindée)"""
+        self.add_thought("🧪 Écriture des tests (revue menée en parallèle)...")
+        
+        context = f"""User Stories de référence :
+{user_stories}
+
+Code à tester :
+```python
+{code}
+```
+
+La revue est menée séparément : écris UNIQUEMENT la section TESTS UNITAIRES
+(cas nominaux, cas limites et gestion d'erreurs de chaque critère d'acceptation).
+En JSON, laisse les listes de bugs vides et mets quality_score à 0."""
+        
+        messages = [
+            SystemMessage(content=self._build_system_prompt()),
+            HumanMessage(content=context)
+        ]
+        response = self._invoke_llm(messages, self.TESTS_FIELDS)
+        tests = self._parse_review(response.content)["tests"]
+        
+        self.add_action("write_tests", f"Tests générés: {bool(tests)}")
+        return {"tests": tests, "part": "tests", "thoughts": self.thoughts.copy(), "raw_response": response.content}
+    
+    def write_acceptance_tests(self, user_stories: str) -> Dict[str, any]:
+        """
+        Tests d'acceptation écrits à partir des seules User Stories (mode TDD),
+        en parallèle de la génération du code, puis réutilisés à chaque itération
+        """
+        self.add_thought("🧪 Écriture des tests d'acceptation depuis les User Stories (TDD)...")
+        
+        context = f"""User Stories de référence :
+{user_stories}
+
+Mode TDD : le code n'est pas encore écrit. Écris UNIQUEMENT la section TESTS UNITAIRES :
+des tests pytest d'acceptation couvrant chaque critère d'acceptation (cas nominaux,
+cas limites, gestion d'erreurs). Le code sera livré dans `main.py` : importe depuis
+`main` les fonctions et classes aux noms les plus évidents d'après les User Stories,
+et n'utilise que leur interface publique.
+En JSON, laisse les listes de bugs vides et mets quality_score à 0."""
+        
+        messages = [
+            SystemMessage(content=self._build_system_prompt()),
+            HumanMessage(content=context)
+        ]
+        response = self._invoke_llm(messages, self.TESTS_FIELDS)
+        tests = self._parse_review(response.content)["tests"]
+        
+        self.add_action("write_acceptance_tests", f"Tests générés: {bool(tests)}")
+        return {"tests": tests, "part": "acceptance", "thoughts": self.thoughts.copy(), "raw_response": response.content}
+    
+    def merge_split_review(self, critique: Dict, tests: Dict) -> Dict[str, any]:
+        """Assemble revue et tests d'une revue scindée (même structure que review_code)"""
+        self.bugs_found.extend(critique["critical_bugs"])
+        self.tests_generated.append(tests["tests"])
+        
+        self.add_thought(f" Revue terminee : {len(critique['critical_bugs'])} bugs critiques détectés")
+        
+        return {
+            "analysis": critique["analysis"],
+            "critical_bugs": critique["critical_bugs"],
+            "minor_bugs": critique["minor_bugs"],
+            "suggestions": critique["suggestions"],
+            "quality_score": critique["quality_score"],
+            "tests": tests["tests"],
+            "should_fix": len(critique["critical_bugs"]) > 0,
+            "thoughts": self.thoughts.copy(),
+            "raw_response": f"{critique['raw_response']}\n\n---\n\n{tests['raw_response']}"
+        }
+    
+    def _review_map_reduce(self, code: str, units: Dict[str, Dict], user_stories: str) -> Dict[str, any]:
+        """
+        Revue d'un gros fichier en map-reduce
+        
+        Map : chaque lot d'unités (fonctions/classes) est revu en parallèle avec
+        l'interface du reste du module. Reduce : bugs dédupliqués, score moyen
+        pondéré par la taille des lots, tests concaténés.
+        """
+        batches = batch_units(units, self.MAP_REDUCE_CHUNK_CHARS)
+        self.add_thought(
+            f"🔍 Revue map-reduce : {len(units)} unités en {len(batches)} lot(s) revus en parallèle"
+        )
+        
+        def review_batch(names: List[str]):
+            others = [name for name in units if name not in names]
+            context = f"""User Stories de référence :
+{user_stories}
+
+Ce module est trop long pour être revu d'un bloc : tu revois UNE PARTIE ({", ".join(names)}).
+
+Interface du reste du module :
+```python
+{interface_summary(units, others)}
+```
+
+Code à reviewer :
+```python
+{chr(10).join(units[name]["source"] for name in names)}
+```
+
+Effectue une revue complète de cette partie en utilisant la méthodologie Self-Correction.
+N'écris des tests que pour les unités ci-dessus."""
+            messages = [
+                SystemMessage(content=self._build_system_prompt()),
+                HumanMessage(content=context)
+            ]
+            response = self._invoke_llm(messages, self.REVIEW_FIELDS)
+            return names, response.content, self._parse_review(response.content)
+        
+        with ThreadPoolExecutor(max_workers=min(self.MAP_REDUCE_WORKERS, len(batches))) as pool:
+            reviews = list(pool.map(review_batch, batches))
+        
+        # Reduce
+        weights = [sum(len(units[name]["source"]) for name in names) for names, _, _ in reviews]
+        scored = [(parsed["quality_score"], weight) for (_, _, parsed), weight in zip(reviews, weights)
+                  if parsed["quality_score"] is not None]
+        quality_score = round(sum(score * weight for score, weight in scored) / sum(w for _, w in scored)) \
+            if scored else None
+        parsed = {
+            "analysis": "\n\n".join(
+                f"### Unités : {', '.join(names)}\n{review['analysis']}" for names, _, review in reviews
+            ),
+            "critical_bugs": self._dedupe([bug for _, _, review in reviews for bug in review["critical_bugs"]]),
+            "minor_bugs": self._dedupe([bug for _, _, review in reviews for bug in review["minor_bugs"]]),
+            "suggestions": self._dedupe([sugg for _, _, review in reviews for sugg in review["suggestions"]]),
+            "quality_score": quality_score,
+            "tests": combine_tests(review["tests"] for _, _, review in reviews)
+        }
+        
+        self.bugs_found.extend(parsed["critical_bugs"])
+        self.tests_generated.append(parsed["tests"])
+        
+        self.add_thought(f" Revue terminee : {len(parsed['critical_bugs'])} bugs critiques détectés")
+        self.add_action("review_code", f"Bugs: {len(parsed['critical_bugs'])}, Lots revus: {len(batches)}")
         
-        critical_bugs = []
-        if "Bugs critiques" in response:
-            # Pattern basique : lignes commençant par 1. 2. etc.
-            bugs_section = response.split("Bugs critiques")[1].split("**")[0]
-            critical_bugs = re.findall(r'\d+\.\s*(.+?)(?=\d+\.|$)', bugs_section, re.DOTALL)
-            critical_bugs = [bug.strip() for bug in critical_bugs if bug.strip()]
+        return {
+            **parsed,
+            "should_fix": len(parsed["critical_bugs"]) > 0,
+            "thoughts": self.thoughts.copy(),
+            "raw_response": "\n\n---\n\n".join(raw for _, raw, _ in reviews),
+            "map_reduce": {"units": len(units), "batches": len(batches)}
+        }
+    
+    def review_changes(
+        self,
+        code: str,
+        user_stories: str,
+        previous_code: str,
+        previous_review: Dict
+    ) -> Dict[str, any]:
+        """
+        Revue incrémentale : seules les fonctions/classes modifiées ou ajoutées
+        depuis la revue précédente sont envoyées au LLM, avec leur contexte d'appel
         
+        Les bugs et tests des unités intactes sont reportés puis fusionnés avec
+        la nouvelle revue pour produire un rapport complet. Repli sur une revue
+        complète si le code ne compile pas ou si la modification est trop large.
         
-        minor_bugs = []
-        if "Bugs mineurs" in response:
-            bugs_section = response.split("Bugs mineurs")[1].split("**")[0]
-            minor_bugs = re.findall(r'\d+\.\s*(.+?)(?=\d+\.|$)', bugs_section, re.DOTALL)
-            minor_bugs = [bug.strip() for bug in minor_bugs if bug.strip()]
+        Returns:
+            Même structure que review_code, plus une clé "incremental"
+        """
+        previous_units = extract_units(previous_code)
+        units = extract_units(code)
+        if previous_units is None or units is None or not previous_review.get("tests"):
+            self.add_thought(" Revue incrémentale impossible (code non analysable) : revue complète")
+            return self.review_code(code, user_stories)
         
+        diff = diff_units(previous_units, units)
+        changed = diff["added"] + diff["modified"]
+        stale = set(changed + diff["removed"])
+        changed_size = sum(len(units[name]["source"]) for name in changed)
+        if changed_size > self.MAX_CHANGED_RATIO * len(code):
+            self.add_thought(f" {len(changed)} unité(s) modifiée(s), la majeure partie du code : revue complète")
+            return self.review_code(code, user_stories)
         
-        suggestions = []
-        if "Améliorations suggérées" in response:
-            sugg_section = response.split("Améliorations suggérées")[1].split("**")[0]
-            suggestions = re.findall(r'\d+\.\s*(.+?)(?=\d+\.|$)', sugg_section, re.DOTALL)
-            suggestions = [sugg.strip() for sugg in suggestions if sugg.strip()]
+        carried, recheck = self._carry_over_bugs(previous_review, previous_units, stale)
+        
+        if not stale:
+            # Code identique à l'AST près : la revue précédente reste valable
+            self.add_thought("♻️ Aucune unité modifiée : revue précédente reportée")
+            parsed = {
+                "analysis": previous_review.get("analysis", ""),
+                "critical_bugs": list(previous_review.get("critical_bugs", [])),
+                "minor_bugs": list(previous_review.get("minor_bugs", [])),
+                "suggestions": list(previous_review.get("suggestions", [])),
+                "quality_score": previous_review.get("quality_score"),
+                "tests": previous_review["tests"]
+            }
+            raw_response = ""
+            carried_tests = len((split_tests(previous_review["tests"]) or {"tests": {}})["tests"])
+        else:
+            self.add_thought(
+                f"🔍 Revue incrémentale : {len(changed)} unité(s) modifiée(s)/ajoutée(s), "
+                f"{len(diff['unchanged'])} inchangée(s)"
+            )
+            callers = [name for name in callers_of(units, stale) if name not in changed]
+            context = self._incremental_context(user_stories, units, diff, changed, callers, recheck)
+            messages = [
+                SystemMessage(content=self._build_system_prompt()),
+                HumanMessage(content=context)
+            ]
+            response = self._invoke_llm(messages, self.REVIEW_FIELDS)
+            raw_response = response.content
+            parsed = self._parse_review(raw_response)
+            
+            merged = merge_tests(previous_review["tests"], parsed["tests"], stale)
+            carried_tests = merged["carried"]
+            parsed["critical_bugs"] = self._dedupe(carried["critical_bugs"] + parsed["critical_bugs"])
+            parsed["minor_bugs"] = self._dedupe(carried["minor_bugs"] + parsed["minor_bugs"])
+            parsed["tests"] = merged["tests"]
+        
+        self.bugs_found.extend(parsed["critical_bugs"])
+        self.tests_generated.append(parsed["tests"])
+        
+        self.add_thought(f" Revue terminee : {len(parsed['critical_bugs'])} bugs critiques détectés")
+        self.add_action("review_changes", f"Unités revues: {len(changed)}, Bugs: {len(parsed['critical_bugs'])}")
+        
+        return {
+            "analysis": parsed["analysis"],
+            "critical_bugs": parsed["critical_bugs"],
+            "minor_bugs": parsed["minor_bugs"],
+            "suggestions": parsed["suggestions"],
+            "quality_score": parsed["quality_score"],
+            "tests": parsed["tests"],
+            "should_fix": len(parsed["critical_bugs"]) > 0,
+            "thoughts": self.thoughts.copy(),
+            "raw_response": raw_response,
+            "incremental": {
+                "added": diff["added"],
+                "modified": diff["modified"],
+                "removed": diff["removed"],
+                "unchanged": diff["unchanged"],
+                "carried_bugs": len(carried["critical_bugs"]) + len(carried["minor_bugs"]),
+                "carried_tests": carried_tests
+            }
+        }
+    
+    def _incremental_context(
+        self,
+        user_stories: str,
+        units: Dict[str, Dict],
+        diff: Dict[str, List[str]],
+        changed: List[str],
+        callers: List[str],
+        recheck: List[str]
+    ) -> str:
+        """Prompt de revue limité aux unités modifiées et à leur contexte"""
+        unchanged = [name for name in diff["unchanged"] if name not in callers and name != MODULE_UNIT]
+        changed_source = "\n\n".join(units[name]["source"] for name in changed)
+        
+        context = f"""User Stories de référence :
+{user_stories}
+
+REVUE INCRÉMENTALE : seules les unités suivantes ont changé depuis la dernière revue : {", ".join(changed) or "aucune"}."""
+        if diff["removed"]:
+            context += f"\nUnités supprimées : {', '.join(diff['removed'])}."
+        if unchanged:
+            context += f"""
+
+Interface du reste du module (inchangé, déjà revu) :
+```python
+{interface_summary(units, unchanged)}
+```"""
+        context += f"""
+
+Code modifié ou ajouté à reviewer :
+```python
+{changed_source}
+```"""
+        if callers:
+            context += f"""
+
+Contexte d'appel (code inchangé qui utilise les unités modifiées) :
+```python
+{chr(10).join(units[name]["source"] for name in callers)}
+```"""
+        if recheck:
+            context += "\n\nBugs signalés à la revue précédente, à re-vérifier :\n"
+            context += "\n".join(f"- {bug}" for bug in recheck)
+        context += f"""
+
+Effectue la revue avec la méthodologie Self-Correction. Ne liste que les bugs du code
+ci-dessus et n'écris des tests QUE pour : {", ".join(name for name in changed if name != MODULE_UNIT) or "le module"}.
+Le score de qualité porte sur le module entier."""
+        return context
+    
+    def _carry_over_bugs(self, previous_review: Dict, previous_units: Dict[str, Dict], stale: set):
+        """
+        Répartit les bugs de la revue précédente
+        
+        Returns:
+            (bugs reportés tels quels car ils visent des unités intactes,
+             bugs non attribuables à une unité, à re-vérifier par le LLM)
+        """
+        import re
+        
+        carried = {"critical_bugs": [], "minor_bugs": []}
+        recheck = []
+        for key in carried:
+            for bug in previous_review.get(key, []):
+                targets = {
+                    name for name in previous_units
+                    if name != MODULE_UNIT and re.search(rf"\b{re.escape(name)}\b", bug)
+                }
+                for line in re.findall(r"lignes?\s*(\d+)", bug, re.IGNORECASE):
+                    unit = unit_at_line(previous_units, int(line))
+                    if unit:
+                        targets.add(unit)
+                if not targets:
+                    recheck.append(bug)
+                elif not targets & stale:
+                    carried[key].append(bug)
+        return carried, recheck
+    
+    @staticmethod
+    def _dedupe(bugs: List[str]) -> List[str]:
+        seen, unique = set(), []
+        for bug in bugs:
+            key = " ".join(bug.lower().split())
+            if key not in seen:
+                seen.add(key)
+                unique.append(bug)
+        return unique
+    
+    def _parse_review(self, response: str) -> Dict[str, any]:
+        import re
+        
+        structured = self._parse_structured(response)
+        if structured:
+            return {
+                "analysis": structured.analysis or response,
+                "critical_bugs": structured.critical_bugs,
+                "minor_bugs": structured.minor_bugs,
+                "suggestions": structured.suggestions,
+                "quality_score": structured.quality_score,
+                "tests": structured.tests
+            }
+        
+        critical_bugs = self._extract_items(response, "Bugs critiques")
+        minor_bugs = self._extract_items(response, "Bugs mineurs")
+        suggestions = self._extract_items(response, "Améliorations suggérées")
         
         
         quality_score = None
@@ -180,6 +587,35 @@ Effectue une revue complète en utilisant la méthodologie Self-Correction."""
             "tests": tests
         }
     
+    @staticmethod
+    def _extract_items(response: str, title: str) -> List[str]:
+        """
+        Éléments numérotés d'une section du jugement final
+        
+        La section commence après la ligne de titre (« **Bugs critiques** (blocants) : »)
+        et s'arrête au prochain titre en gras ou markdown.
+        """
+        import re
+        
+        match = re.search(
+            rf'{re.escape(title)}[^\n]*\n(.*?)(?=^\s*\*\*|^\s*#|\Z)',
+            response,
+            re.DOTALL | re.MULTILINE
+        )
+        if not match:
+            return []
+        items = re.findall(r'^\s*\d+\.\s*(.+?)\s*$', match.group(1), re.MULTILINE)
+        # « 1. Aucun » signifie une section vide
+        return [item for item in items if not re.match(r'(aucun|néant|none|n/a)\b', item, re.IGNORECASE)]
+    
+    def replay_result(self, result: Dict[str, any]) -> Dict[str, any]:
+        """Réenregistre les bugs et tests d'une revue réutilisée"""
+        # Les moitiés d'une revue scindée sont enregistrées à l'assemblage
+        if not result.get("part"):
+            self.bugs_found.extend(result["critical_bugs"])
+            self.tests_generated.append(result["tests"])
+        return super().replay_result(result)
+    
     def generate_feedback(self, review_result: Dict) -> str:
         
         
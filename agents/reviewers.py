@@ -0,0 +1,213 @@
+"""
+Relecteurs spécialisés
+Chacun revoit le code sur un seul axe (sécurité, performance, contrat d'API)
+avec un prompt court, en parallèle du QA ; leurs constats sont ensuite
+fusionnés et dédupliqués dans les listes de bugs du rapport QA.
+"""
+
+import difflib
+import re
+from typing import Dict, List, Type
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_groq import ChatGroq
+from .base_agent import BaseAgent
+from .qa_engineer import QAAgent
+from .schemas import ReviewerOutput
+from utils.streaming import numbered_section
+
+
+class SpecialistReviewer(BaseAgent):
+    """
+    Relecteur spécialisé sur un axe de revue
+
+    Les sous-classes définissent FOCUS (identifiant court), LABEL et
+    CHECKLIST (points à vérifier, une ligne chacun).
+    """
+
+    STATE_ATTRIBUTES = BaseAgent.STATE_ATTRIBUTES + ("findings",)
+    OUTPUT_SCHEMA = ReviewerOutput
+    STREAM_FIELDS = {
+        "critical_bugs": numbered_section("Bugs critiques"),
+        "minor_bugs": numbered_section("Bugs mineurs")
+    }
+
+    FOCUS = ""
+    LABEL = ""
+    CHECKLIST = ""
+
+    def __init__(self, llm: ChatGroq):
+        super().__init__(
+            name=f"Relecteur {self.LABEL}",
+            role=f"Revue ciblée : {self.LABEL.lower()}",
+            llm=llm
+        )
+        self.findings = []
+
+    def _get_json_prompt(self) -> str:
+        """Mission du relecteur en mode JSON"""
+        return f"""Tu es un relecteur de code Python spécialisé : {self.LABEL}.
+
+Vérifie UNIQUEMENT ces points, ignore tout le reste (le QA couvre la revue générale) :
+{self.CHECKLIST}
+
+Un bug critique est bloquant ; cite la ligne concernée et l'impact. Pas de faux positifs."""
+
+    def _get_system_prompt(self) -> str:
+        """Retourne le prompt système du relecteur"""
+        return self._get_json_prompt() + """
+
+## Format de sortie OBLIGATOIRE (rien d'autre) :
+
+**Bugs critiques** :
+1. [Description + ligne concernée + impact] (ou « Aucun »)
+
+**Bugs mineurs** :
+1. [Description] (ou « Aucun »)"""
+
+    def review(self, code: str, user_stories: str) -> Dict[str, any]:
+        """
+        Revue ciblée du code
+
+        Returns:
+            Dict avec focus, label, critical_bugs, minor_bugs, thoughts, raw_response
+        """
+        self.add_thought(f"🔎 Revue {self.LABEL.lower()} en cours...")
+
+        context = f"""User Stories de référence :
+{user_stories}
+
+Code à relire :
+```python
+{code}
+```"""
+        messages = [
+            SystemMessage(content=self._build_system_prompt()),
+            HumanMessage(content=context)
+        ]
+        response = self._invoke_llm(messages, ("critical_bugs", "minor_bugs"))
+
+        structured = self._parse_structured(response.content)
+        if structured:
+            critical, minor = structured.critical_bugs, structured.minor_bugs
+        else:
+            critical = QAAgent._extract_items(response.content, "Bugs critiques")
+            minor = QAAgent._extract_items(response.content, "Bugs mineurs")
+        self.findings.extend(critical + minor)
+
+        self.add_thought(f" {len(critical)} problème(s) critique(s), {len(minor)} mineur(s)")
+        self.add_action("review", f"{self.FOCUS}: {len(critical)} critique(s)")
+
+        return {
+            "focus": self.FOCUS,
+            "label": self.LABEL,
+            "critical_bugs": critical,
+            "minor_bugs": minor,
+            "thoughts": self.thoughts.copy(),
+            "raw_response": response.content
+        }
+
+    def replay_result(self, result: Dict[str, any]) -> Dict[str, any]:
+        """Réenregistre les constats d'une revue réutilisée"""
+        self.findings.extend(result["critical_bugs"] + result["minor_bugs"])
+        return super().replay_result(result)
+
+
+class SecurityReviewer(SpecialistReviewer):
+    FOCUS = "security"
+    LABEL = "Sécurité"
+    CHECKLIST = """- Injections (SQL, commandes shell, eval/exec, pickle, chemins de fichiers)
+- Validation des entrées externes et des types
+- Secrets en dur, journalisation de données sensibles
+- Aléatoire non cryptographique pour des jetons, comparaisons non constantes"""
+
+
+class PerformanceReviewer(SpecialistReviewer):
+    FOCUS = "performance"
+    LABEL = "Performance"
+    CHECKLIST = """- Complexité algorithmique évitable (boucles imbriquées, recherches linéaires répétées)
+- Boucles potentiellement infinies ou récursion non bornée
+- Chargements complets en mémoire, copies inutiles de grosses structures
+- Ressources non libérées (fichiers, connexions)"""
+
+
+class ApiContractReviewer(SpecialistReviewer):
+    FOCUS = "api_contract"
+    LABEL = "Contrat d'API"
+    CHECKLIST = """- Chaque critère d'acceptation des User Stories est implémenté
+- Signatures, types de retour et exceptions cohérents avec les User Stories et les docstrings
+- Cas limites promis (valeurs vides, bornes, erreurs) réellement traités
+- Interface publique stable et nommée clairement"""
+
+
+# Relecteurs disponibles (clé : FOCUS) ; une sous-classe enregistrée ici devient utilisable
+REVIEWERS: Dict[str, Type[SpecialistReviewer]] = {
+    reviewer.FOCUS: reviewer
+    for reviewer in (SecurityReviewer, PerformanceReviewer, ApiContractReviewer)
+}
+
+# Au-delà de ce ratio de mots communs, deux constats décrivent le même problème
+DUPLICATE_RATIO = 0.6
+
+# Mots ignorés pour comparer deux constats
+STOPWORDS = {"les", "des", "est", "pas", "non", "une", "dans", "pour", "avec", "sur", "par", "the", "not"}
+
+
+def _normalize(finding: str) -> List[str]:
+    """Mots significatifs d'un constat, sans préfixe [axe], numéros de ligne ni ponctuation"""
+    text = re.sub(r"^\[[^\]]*\]\s*", "", finding.lower())
+    text = re.sub(r"\blignes?\s*\d+(\s*[-à]\s*\d+)?", " ", text)
+    words = re.sub(r"[^\w\s]", " ", text).split()
+    return [word for word in words if (len(word) > 2 or word.isdigit()) and word not in STOPWORDS]
+
+
+def _is_duplicate(finding: str, existing: List[str]) -> bool:
+    """Même problème qu'un constat existant (mots proches, mêmes numéros cités)"""
+    words = _normalize(finding)
+    numbers = {word for word in words if word.isdigit()}
+    for other in existing:
+        other_words = _normalize(other)
+        if numbers != {word for word in other_words if word.isdigit()}:
+            continue
+        if difflib.SequenceMatcher(None, words, other_words).ratio() >= DUPLICATE_RATIO:
+            return True
+    return False
+
+
+def merge_reviews(qa_result: Dict, reviews: List[Dict]) -> Dict:
+    """
+    Ajoute au rapport QA les constats des relecteurs spécialisés
+
+    Un constat déjà présent (même formulé autrement) est ignoré ; un bug
+    mineur signalé comme critique ailleurs ne reste que dans les critiques.
+
+    Returns:
+        Rapport QA fusionné, avec une clé "reviewers" (constats retenus par axe)
+    """
+    critical = list(qa_result["critical_bugs"])
+    minor = list(qa_result["minor_bugs"])
+    stats = {}
+    for review in reviews:
+        label = review.get("label", review["focus"])
+        kept = 0
+        for bug in review["critical_bugs"]:
+            if not _is_duplicate(bug, critical):
+                critical.append(f"[{label}] {bug}")
+                kept += 1
+        for bug in review["minor_bugs"]:
+            if not _is_duplicate(bug, critical + minor):
+                minor.append(f"[{label}] {bug}")
+                kept += 1
+        stats[review["focus"]] = {
+            "critical": len(review["critical_bugs"]),
+            "minor": len(review["minor_bugs"]),
+            "kept": kept
+        }
+    minor = [bug for bug in minor if not _is_duplicate(bug, critical)]
+
+    return {
+        **qa_result,
+        "critical_bugs": critical,
+        "minor_bugs": minor,
+        "should_fix": len(critical) > 0,
+        "reviewers": stats
+    }
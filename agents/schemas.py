@@ -0,0 +1,147 @@
+"""
+Schémas de sortie structurée des agents (mode JSON)
+Le modèle répond par un objet JSON validé avec pydantic ; si la réponse
+est invalide, l'agent se replie sur l'analyse de son format markdown.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Literal, Optional, Type
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+OUTPUT_FORMATS = ("markdown", "json")
+
+# Consignes ajoutées au prompt JSON selon la verbosité
+VERBOSITY_INSTRUCTIONS = {
+    "standard": "Les champs texte (analyse, raisonnement, justification) restent brefs : quelques phrases.",
+    "compact": (
+        "Verbosité COMPACTE : laisse vides les champs facultatifs d'analyse et de raisonnement, "
+        "une phrase au plus pour les justifications, aucun emoji, aucune section décorative."
+    ),
+}
+
+
+class UserStory(BaseModel):
+    id: str = Field(description="Identifiant, ex. US1")
+    title: str
+    as_a: str = Field(description="En tant que ...")
+    i_want: str = Field(description="Je veux ...")
+    so_that: str = Field(description="Afin de ...")
+    acceptance_criteria: List[str] = Field(min_length=1)
+
+
+class ProductOwnerOutput(BaseModel):
+    analysis: str = Field("", description="Analyse du besoin (facultative)")
+    user_stories: List[UserStory] = Field(min_length=1)
+    constraints: List[str] = Field(default_factory=list, description="Contraintes techniques")
+
+
+class DeveloperOutput(BaseModel):
+    reasoning: str = Field("", description="Raisonnement ReAct résumé (facultatif)")
+    code: str = Field(description="Code Python complet")
+
+
+class QAOutput(BaseModel):
+    analysis: str = Field("", description="Synthèse de la revue (facultative)")
+    critical_bugs: List[str] = Field(default_factory=list, description="Bugs bloquants, avec la ligne concernée")
+    minor_bugs: List[str] = Field(default_factory=list)
+    suggestions: List[str] = Field(default_factory=list)
+    quality_score: int = Field(ge=0, le=10)
+    tests: str = Field(description="Tests pytest complets")
+
+
+class ReviewerOutput(BaseModel):
+    critical_bugs: List[str] = Field(default_factory=list, description="Problèmes bloquants, avec la ligne concernée")
+    minor_bugs: List[str] = Field(default_factory=list)
+
+
+class OptionEvaluation(BaseModel):
+    option: Literal["A", "B", "C"]
+    summary: str
+    score: int = Field(ge=0, le=10)
+
+
+class TechLeadOutput(BaseModel):
+    options: List[OptionEvaluation] = Field(default_factory=list, description="Évaluation des options (facultative)")
+    chosen_option: Literal["A", "B", "C"]
+    status: Literal["VALIDATED", "NEEDS_CORRECTION", "REJECTED"]
+    justification: str
+    actions: List[str] = Field(default_factory=list)
+
+
+class TechLeadBranch(BaseModel):
+    score: int = Field(ge=0, le=10, description="Pertinence de l'option évaluée")
+    pros: str = Field("", description="Principal argument pour (une phrase)")
+    cons: str = Field("", description="Principal argument contre (une phrase)")
+    actions: List[str] = Field(default_factory=list, description="Actions requises si l'option est retenue")
+
+
+def json_instructions(schema: Type[BaseModel], verbosity: str = "standard") -> str:
+    """Consignes de format JSON à ajouter au prompt système"""
+    return (
+        "## Format de sortie OBLIGATOIRE\n"
+        "Réponds UNIQUEMENT par un objet JSON valide (pas de markdown, pas de texte autour) "
+        "conforme à ce JSON Schema :\n"
+        f"{json.dumps(schema.model_json_schema(), ensure_ascii=False, separators=(',', ':'))}\n\n"
+        f"{VERBOSITY_INSTRUCTIONS.get(verbosity, VERBOSITY_INSTRUCTIONS['standard'])}"
+    )
+
+
+def extract_json(text: str) -> str:
+    """Objet JSON d'une réponse (retire un éventuel bloc ```json autour)"""
+    fenced = re.search(r"```(?:json)?\s*(\{.*\})\s*```", text, re.DOTALL)
+    if fenced:
+        return fenced.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    return text[start:end + 1] if start != -1 and end > start else text
+
+
+def parse_output(schema: Type[BaseModel], text: str) -> Optional[BaseModel]:
+    """Valide la réponse contre le schéma, None si elle n'est pas conforme"""
+    try:
+        return schema.model_validate_json(extract_json(text))
+    except (ValidationError, ValueError):
+        return None
+
+
+def json_mode_kwargs(llm) -> Dict[str, Any]:
+    """
+    Paramètres d'appel activant le mode JSON natif du fournisseur
+
+    Vide pour les clients inconnus ou un hedging entre fournisseurs
+    différents : le prompt suffit alors à demander du JSON.
+    """
+    clients = [getattr(llm, "primary", llm), getattr(llm, "secondary", llm)]
+    names = {type(client).__name__ for client in clients}
+    if len(names) != 1:
+        return {}
+    name = names.pop()
+    if name in ("ChatGroq", "ChatOpenAI"):
+        return {"response_format": {"type": "json_object"}}
+    if name == "ChatOllama":
+        return {"format": "json"}
+    return {}
+
+
+def render_user_stories(output: ProductOwnerOutput) -> str:
+    """User Stories structurées rendues au format markdown attendu par l'équipe"""
+    lines = []
+    if output.analysis:
+        lines += ["## Analyse du besoin", output.analysis, ""]
+    lines.append("## User Stories")
+    for story in output.user_stories:
+        lines += [
+            f"**{story.id}**: {story.title}",
+            f"- En tant que {story.as_a}",
+            f"- Je veux {story.i_want}",
+            f"- Afin de {story.so_that}",
+            "- Critères d'acceptation :"
+        ]
+        lines += [f"  - [ ] {criterion}" for criterion in story.acceptance_criteria]
+        lines.append("")
+    if output.constraints:
+        lines.append("## Contraintes techniques identifiées")
+        lines += [f"- {constraint}" for constraint in output.constraints]
+    return "\n".join(lines).strip()
@@ -3,15 +3,69 @@ Agent Tech Lead
 Responsable de la validation finale avec Tree of Thoughts (ToT)
 """
 
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_groq import ChatGroq
 from .base_agent import BaseAgent
+from .schemas import TechLeadBranch, TechLeadOutput, json_instructions, parse_output
+from utils.code_units import condense_code, extract_units, split_tests
+from utils.streaming import bold_section
+
+# Libellés de la décision, quelle que soit la mise en forme du modèle :
+# « **Statut** : », « **Statut :** », « Statut : » ou titre « ### Statut » suivi de la valeur.
+# Le libellé commence par le mot lui-même (recherche littérale rapide) ; seuls
+# des espaces, « # » ou « * » peuvent le précéder sur sa ligne
+STATUS_LABEL = r"Statut[ \t]*\**[ \t]*:?[ \t]*\**[ \t]*\n?[ \t]*"
+LINE_PREFIX = r"^[ \t#*]*"
+OPTION_LABEL = r"Option retenue[ \t]*\**[ \t]*:?[ \t]*\**\s*(?:Option[ \t]+)?"
+
+_STATUS_RE = re.compile(STATUS_LABEL + r"([^\n]+)")
+_OPTION_RE = re.compile(OPTION_LABEL + r"([ABC])\b")
+
+
+def _status_line(response: str) -> Optional[str]:
+    """Valeur de la première ligne Statut (en début de ligne, mise en forme comprise)"""
+    for match in _STATUS_RE.finditer(response):
+        line_start = response.rfind("\n", 0, match.start()) + 1
+        if not response[line_start:match.start()].strip(" \t#*"):
+            return match.group(1)
+    return None
 
 
 class TechLeadAgent(BaseAgent):
     """Agent Tech Lead - Valide avec Tree of Thoughts"""
     
+    STATE_ATTRIBUTES = BaseAgent.STATE_ATTRIBUTES + ("decisions",)
+    OUTPUT_SCHEMA = TechLeadOutput
+    
+    # Statut implicite de chaque option proposée dans la revue finale
+    OPTION_STATUS = {"A": "VALIDATED", "B": "NEEDS_CORRECTION", "C": "REJECTED"}
+    
+    # Au-delà, le code et les tests sont condensés dans le prompt (mode map-reduce)
+    MAX_REVIEW_LINES = 300
+    
+    # Tree of Thoughts parallèle : une évaluation courte et concurrente par option
+    OPTIONS = {
+        "A": "VALIDER le code en l'état",
+        "B": "DEMANDER des corrections mineures",
+        "C": "REJETER et demander une refonte complète"
+    }
+    BRANCH_MAX_TOKENS = 300
+    # Une branche à ce score l'emporte sans attendre les autres
+    DOMINANT_SCORE = 9
+    # À score égal, l'option la plus prudente l'emporte
+    TIE_BREAK = ("B", "C", "A")
+    
+    # Arrêt anticipé du streaming : la décision suffit, la prose qui suit le statut est coupée
+    STREAM_FIELDS = {
+        "chosen_option": OPTION_LABEL + r"[ABC]\b",
+        "justification": bold_section("Justification"),
+        "status": LINE_PREFIX + STATUS_LABEL + r"[^|\n]*(VALID|CORRIG|REJET)[^|\n]*\n"
+    }
+    DECISION_FIELDS = ("chosen_option", "status", "justification")
+    
     def __init__(self, llm: ChatGroq):
         super().__init__(
             name="Tech Lead",
@@ -19,6 +73,10 @@ class TechLeadAgent(BaseAgent):
             llm=llm
         )
         self.decisions = []
+        # Condenser les gros fichiers (activé par l'orchestrateur avec la revue map-reduce)
+        self.condense_large_code = False
+        # Évaluer les options en branches parallèles plutôt qu'en une seule génération
+        self.parallel_tot = False
     
     def _get_system_prompt(self) -> str:
         """Retourne le prompt système pour le Tech Lead"""
@@ -90,13 +148,25 @@ Tu dois explorer PLUSIEURS options avant de décider :
 
 Sois STRATÉGIQUE et DÉCISIF."""
     
+    def _get_json_prompt(self) -> str:
+        """Mission du Tech Lead en mode JSON"""
+        return """Tu es un Tech Lead senior avec 15 ans d'expérience.
+
+Ta mission : VALIDER le code et DÉCIDER avec Tree of Thoughts : évalue les options
+A (valider), B (corrections) et C (refonte), puis choisis-en une et justifie.
+Le statut doit correspondre à l'option retenue : A → VALIDATED,
+B → NEEDS_CORRECTION, C → REJECTED.
+
+Critères : qualité, sécurité, performance, conformité aux spécifications, tests."""
+    
     def final_review(
         self,
         code: str,
         tests: str,
         user_stories: str,
         qa_report: Dict,
-        iteration: int = 1
+        iteration: int = 1,
+        static_report: Optional[Dict] = None
     ) -> Dict[str, any]:
         """
         Revue finale et décision avec Tree of Thoughts
@@ -107,14 +177,19 @@ Sois STRATÉGIQUE et DÉCISIF."""
             user_stories: Les spécifications
             qa_report: Le rapport du QA
             iteration: Numéro de l'itération
+            static_report: Vérifications locales (compilation, contrôles AST) menées à côté du QA
             
         Returns:
             Dict avec la décision et les actions
         """
         self.add_thought(f"🌳 Début de la revue finale (itération {iteration})")
         
+        details = qa_report.get('analysis', 'Pas de rapport détaillé')
+        if self.condense_large_code:
+            code, tests, details = self._condense(code, tests, qa_report)
+        
         # Construire le contexte complet
-        context = f"""REVUE FINALE - Itération {iteration}
+        review = f"""REVUE FINALE - Itération {iteration}
 
 === USER STORIES ===
 {user_stories}
@@ -135,8 +210,14 @@ Bugs mineurs : {len(qa_report.get('minor_bugs', []))}
 Score qualité : {qa_report.get('quality_score', 'N/A')}/10
 
 Détails :
-{qa_report.get('analysis', 'Pas de rapport détaillé')}
-
+{details}
+{self._static_section(static_report)}"""
+        
+        if self.parallel_tot:
+            decision = self._parallel_tree_of_thoughts(review, qa_report)
+            raw_response = decision["full_analysis"]
+        else:
+            context = f"""{review}
 ---
 
 En tant que Tech Lead, utilise Tree of Thoughts pour décider :
@@ -146,17 +227,18 @@ En tant que Tech Lead, utilise Tree of Thoughts pour décider :
 
 Évalue chaque option et décide."""
 
-        messages = [
-            SystemMessage(content=self._get_system_prompt()),
-            HumanMessage(content=context)
-        ]
-        
-        # Appel au LLM
-        self.add_thought("💭 Évaluation avec Tree of Thoughts en cours...")
-        response = self.llm.invoke(messages)
-        
-        # Parser la décision
-        decision = self._parse_decision(response.content)
+            messages = [
+                SystemMessage(content=self._build_system_prompt()),
+                HumanMessage(content=context)
+            ]
+            
+            # Appel au LLM
+            self.add_thought("💭 Évaluation avec Tree of Thoughts en cours...")
+            response = self._invoke_llm(messages, self.DECISION_FIELDS)
+            raw_response = response.content
+            
+            # Parser la décision
+            decision = self._parse_decision(response.content)
         
         # Sauvegarder la décision
         self.decisions.append({
@@ -171,30 +253,229 @@ En tant que Tech Lead, utilise Tree of Thoughts pour décider :
         return {
             "decision": decision,
             "thoughts": self.thoughts.copy(),
-            "raw_response": response.content,
+            "raw_response": raw_response,
             "iteration": iteration
         }
     
-    def _parse_decision(self, response: str) -> Dict[str, any]:
-        """Parse la réponse pour extraire la décision"""
+    def _parallel_tree_of_thoughts(self, review: str, qa_report: Dict) -> Dict[str, any]:
+        """
+        Tree of Thoughts en branches parallèles
+        
+        Les options non viables d'après le rapport QA sont élaguées sans appel,
+        les autres sont évaluées chacune par un appel court et concurrent. Dès
+        qu'une branche atteint DOMINANT_SCORE, les branches restantes sont
+        abandonnées ; la meilleure branche terminée donne la décision.
+        """
+        candidates, pruned = self._prune_options(qa_report)
+        self.add_thought(
+            f"💭 Tree of Thoughts parallèle : {len(candidates)} branche(s) évaluée(s)"
+            + (f", {len(pruned)} élaguée(s) ({', '.join(pruned)})" if pruned else "")
+        )
+        
+        branches: Dict[str, Dict] = {}
+        pool = ThreadPoolExecutor(max_workers=len(candidates))
+        try:
+            futures = [pool.submit(self._evaluate_branch, option, review) for option in candidates]
+            for future in as_completed(futures):
+                branch = future.result()
+                branches[branch["option"]] = branch
+                if (branch["score"] or 0) >= self.DOMINANT_SCORE and len(branches) < len(candidates):
+                    self.add_thought(
+                        f"✂️ Option {branch['option']} dominante ({branch['score']}/10) : branches restantes abandonnées"
+                    )
+                    break
+        finally:
+            # Les branches encore en cours ne sont pas attendues
+            pool.shutdown(wait=False, cancel_futures=True)
         
+        winner = max(
+            branches.values(),
+            key=lambda branch: (branch["score"] or 0, -self.TIE_BREAK.index(branch["option"]))
+        )
+        justification = f"Option {winner['option']} ({winner['score']}/10) : {winner['pros']}".strip()
+        if winner["cons"]:
+            justification += f" Limite : {winner['cons']}"
+        
+        return {
+            "status": self.OPTION_STATUS[winner["option"]],
+            "chosen_option": winner["option"],
+            "justification": justification,
+            "actions": winner["actions"] if winner["option"] != "A" else [],
+            "full_analysis": self._render_tree(branches, pruned, winner["option"]),
+            "branches": [
+                {key: branch[key] for key in ("option", "score", "pros", "cons")}
+                for branch in branches.values()
+            ],
+            "pruned": pruned
+        }
+    
+    def _prune_options(self, qa_report: Dict) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Élagage a priori : on ne valide pas un code avec des bugs bloquants,
+        on ne le refond pas quand le QA le juge bon
+        
+        Returns:
+            (options à évaluer, {option élaguée: raison})
+        """
+        critical = len(qa_report.get("critical_bugs", []))
+        score = qa_report.get("quality_score")
+        pruned = {}
+        if critical:
+            pruned["A"] = f"{critical} bug(s) critique(s) signalé(s) par le QA"
+        elif score is not None and score >= 8:
+            pruned["C"] = f"aucun bug critique et score QA de {score}/10"
+        return [option for option in self.OPTIONS if option not in pruned], pruned
+    
+    def _branch_system_prompt(self) -> str:
+        """Prompt système d'une branche : évaluer une seule option, brièvement"""
+        prompt = """Tu es un Tech Lead senior avec 15 ans d'expérience.
+
+Tree of Thoughts parallèle : tu évalues UNE SEULE option de décision, les autres
+sont évaluées en parallèle. Note sa pertinence de 0 à 10 au vu du code, des tests
+et du rapport QA, en une phrase pour et une phrase contre.
+
+Critères : qualité, sécurité, performance, conformité aux spécifications, tests."""
+        if self._uses_json():
+            return f"{prompt}\n\n{json_instructions(TechLeadBranch, 'compact')}"
+        return prompt + """
+
+## Format de sortie OBLIGATOIRE (5 lignes au plus) :
+
+📊 Évaluation : X/10
+**Pour** : [une phrase]
+**Contre** : [une phrase]
+**Actions requises** :
+1. [Action si l'option est retenue]"""
+    
+    def _evaluate_branch(self, option: str, review: str) -> Dict[str, any]:
+        """Évalue une option en un appel court (max_tokens réduit)"""
+        messages = [
+            SystemMessage(content=self._branch_system_prompt()),
+            HumanMessage(content=f"{review}\n---\n\nÉvalue UNIQUEMENT l'option {option} : {self.OPTIONS[option]}.")
+        ]
+        response = self._invoke_llm(messages, **self._max_tokens_kwargs(self.BRANCH_MAX_TOKENS))
+        branch = self._parse_branch(response.content)
+        self.add_thought(f"🌿 Option {option} : {branch['score'] if branch['score'] is not None else '?'}/10")
+        return {"option": option, **branch}
+    
+    def _parse_branch(self, response: str) -> Dict[str, any]:
+        """Score, arguments et actions d'une branche (JSON ou markdown)"""
         import re
         
-        # Détecter le statut
-        status = "UNKNOWN"
-        if "✅ VALIDÉ" in response or "VALIDER" in response:
-            status = "VALIDATED"
-        elif "🔄 À CORRIGER" in response or "CORRIGER" in response:
-            status = "NEEDS_CORRECTION"
-        elif "❌ REJETÉ" in response or "REJETER" in response:
-            status = "REJECTED"
+        structured = parse_output(TechLeadBranch, response) if self._uses_json() else None
+        if structured:
+            return structured.model_dump()
+        
+        score_match = re.search(r'(\d+)\s*/\s*10', response)
+        pros = re.search(r'\*\*Pour\*\*\s*:\s*(.+)', response)
+        cons = re.search(r'\*\*Contre\*\*\s*:\s*(.+)', response)
+        actions = []
+        if "Actions requises" in response:
+            actions = re.findall(r'^\s*\d+\.\s*(.+?)\s*$', response.split("Actions requises")[1], re.MULTILINE)
+        return {
+            "score": min(int(score_match.group(1)), 10) if score_match else None,
+            "pros": pros.group(1).strip() if pros else "",
+            "cons": cons.group(1).strip() if cons else "",
+            "actions": actions
+        }
+    
+    def _render_tree(self, branches: Dict[str, Dict], pruned: Dict[str, str], chosen: str) -> str:
+        """Arbre de décision au format markdown habituel, reconstitué depuis les branches"""
+        lines = ["### 🌳 ARBRE DE DÉCISION (branches parallèles)", ""]
+        for option, label in self.OPTIONS.items():
+            lines.append(f"#### Option {option} : {label}")
+            if option in pruned:
+                lines.append(f"✂️ Élaguée : {pruned[option]}")
+            elif option in branches:
+                branch = branches[option]
+                lines += [f"✅ {branch['pros']}"] if branch["pros"] else []
+                lines += [f"❌ {branch['cons']}"] if branch["cons"] else []
+                lines.append(f"📊 Évaluation : {branch['score']}/10")
+            else:
+                lines.append("✂️ Abandonnée : une autre option était déjà dominante")
+            lines.append("")
+        lines += ["### 🎯 DÉCISION FINALE", "", f"**Option retenue** : {chosen}"]
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _static_section(static_report: Optional[Dict]) -> str:
+        """Section du contexte rapportant les vérifications statiques (vide sans rapport)"""
+        if not static_report:
+            return ""
+        lines = ["", "=== VÉRIFICATIONS STATIQUES ==="]
+        lines.append("Compilation : OK" if static_report["compiles"] else f"Compilation : ÉCHEC ({static_report['compile_error']})")
+        lines += [f"- {issue}" for issue in static_report["issues"]] or ["Aucun problème statique détecté"]
+        if static_report.get("tests"):
+            tests = static_report["tests"]
+            lines.append(f"Tests d'acceptation exécutés : {tests['passed']} réussi(s), {tests['failed']} en échec")
+        return "\n".join(lines) + "\n"
+    
+    def _condense(self, code: str, tests: str, qa_report: Dict) -> Tuple[str, str, str]:
+        """
+        Vue condensée d'un gros fichier : source complète des unités visées
+        par un bug critique, signatures pour les autres, noms des tests, et
+        liste des bugs à la place des analyses concaténées d'une revue map-reduce
+        """
+        import re
+        
+        if len(code.splitlines()) > self.MAX_REVIEW_LINES:
+            bugs = " ".join(qa_report.get("critical_bugs", []))
+            focus = [name for name in (extract_units(code) or {}) if re.search(rf"\b{re.escape(name)}\b", bugs)]
+            code = condense_code(code, focus)
+            self.add_thought(f"📐 Code condensé pour la revue ({len(focus)} unité(s) détaillée(s))")
+        
+        parsed_tests = split_tests(tests or "")
+        if len((tests or "").splitlines()) > self.MAX_REVIEW_LINES and parsed_tests:
+            tests = f"# {len(parsed_tests['tests'])} tests (noms uniquement)\n" + "\n".join(
+                f"def {name}(): ..." for name in parsed_tests["tests"]
+            )
+        
+        details = qa_report.get('analysis', 'Pas de rapport détaillé')
+        if qa_report.get("map_reduce"):
+            details = "\n".join(
+                [f"- [CRITIQUE] {bug}" for bug in qa_report.get("critical_bugs", [])] +
+                [f"- [MINEUR] {bug}" for bug in qa_report.get("minor_bugs", [])] +
+                [f"- [SUGGESTION] {sugg}" for sugg in qa_report.get("suggestions", [])]
+            ) or "Aucun problème signalé"
+        return code, tests, details
+    
+    def _parse_decision(self, response: str) -> Dict[str, any]:
+        """Parse la réponse pour extraire la décision"""
+        
+        structured = self._parse_structured(response)
+        if structured:
+            return {
+                "status": structured.status,
+                "chosen_option": structured.chosen_option,
+                "justification": structured.justification,
+                "actions": structured.actions,
+                "full_analysis": response
+            }
         
         # Extraire l'option retenue
         chosen_option = None
-        option_match = re.search(r'Option retenue.*?:\s*([ABC])', response)
+        option_match = _OPTION_RE.search(response)
         if option_match:
             chosen_option = option_match.group(1)
         
+        # Détecter le statut sur la ligne Statut uniquement : les options
+        # listées dans l'arbre de décision mentionnent aussi « VALIDER »
+        status = "UNKNOWN"
+        status_value = _status_line(response)
+        if status_value and "|" not in status_value:
+            line = status_value.upper()
+            if "VALID" in line:
+                status = "VALIDATED"
+            elif "CORRIG" in line:
+                status = "NEEDS_CORRECTION"
+            elif "REJET" in line:
+                status = "REJECTED"
+        if status == "UNKNOWN" and chosen_option:
+            # Statut absent ou recopié du modèle (« VALIDÉ | À CORRIGER | REJETÉ ») :
+            # les options du format libre ne suivent pas forcément A/B/C = valider/corriger/rejeter
+            # (OPTION_STATUS ne vaut que pour les branches ToT), on demande donc des corrections
+            status = "NEEDS_CORRECTION"
+        
         # Extraire la justification
         justification = ""
         if "Justification" in response:
@@ -216,6 +497,15 @@ En tant que Tech Lead, utilise Tree of Thoughts pour décider :
             "full_analysis": response
         }
     
+    def replay_result(self, result: Dict[str, any]) -> Dict[str, any]:
+        """Réenregistre une décision réutilisée"""
+        self.decisions.append({
+            "iteration": result["iteration"],
+            "decision": result["decision"],
+            "timestamp": self._get_timestamp()
+        })
+        return super().replay_result(result)
+    
     def should_iterate(self, decision: Dict) -> Tuple[bool, str]:
         """
         Détermine si une nouvelle itération est nécessaire
@@ -1,6 +1,15 @@
 import streamlit as st
 import os
+import queue
+import threading
+import zipfile
 from datetime import datetime
+from typing import Dict
+
+from utils.model_router import PROVIDERS, ModelRouter
+from utils.checkpoint import CheckpointStore
+from utils.rendering import render_bugs, render_list, section_selector
+from agents.reviewers import REVIEWERS
 
 # Configuration de la page
 st.set_page_config(
@@ -64,15 +73,41 @@ with st.sidebar:
         ["Groq (Gratuit)", "Ollama (Local)", "OpenAI (Payant)"]
     )
     
+    api_key = None
     if api_choice == "Groq (Gratuit)":
-        groq_api_key = st.text_input(
+        api_key = st.text_input(
             "Groq API Key",
             type="password",
             help="Obtenez votre clé gratuite sur https://console.groq.com"
         )
-        if groq_api_key:
-            os.environ["GROQ_API_KEY"] = groq_api_key
+        if api_key:
+            os.environ["GROQ_API_KEY"] = api_key
+            st.success("✅ API Key configurée")
+    elif api_choice == "OpenAI (Payant)":
+        api_key = st.text_input(
+            "OpenAI API Key",
+            type="password",
+            help="Clé disponible sur https://platform.openai.com"
+        )
+        if api_key:
+            os.environ["OPENAI_API_KEY"] = api_key
             st.success("✅ API Key configurée")
+    else:
+        st.info("🖥️ Ollama doit tourner localement (http://localhost:11434)")
+    
+    latency_profile = st.selectbox(
+        "Profil de latence",
+        ["fast", "balanced", "thorough"],
+        index=1,
+        help="Choisit le modèle, max_tokens et la variante de prompt de chaque agent"
+    )
+    
+    hedge_backend = st.selectbox(
+        "Hedging des requêtes lentes",
+        ["Désactivé", "Second modèle", "Ollama (Local)"],
+        help="Si un appel dépasse le p90 des latences observées, un doublon est envoyé "
+             "au backend secondaire ; la première réponse gagne (en streaming : le premier fragment)"
+    )
     
     st.divider()
     
@@ -102,6 +137,23 @@ with st.sidebar:
             help="Combien de fois le code peut être revu/corrigé"
         )
         
+        deadline_min = st.number_input(
+            "Durée maximale du run (minutes, 0 = illimitée)",
+            min_value=0.0,
+            value=0.0,
+            step=1.0,
+            help="À l'échéance, l'appel en cours est annulé et la meilleure itération est livrée"
+        )
+        
+        token_budget = st.number_input(
+            "Budget de tokens (0 = illimité)",
+            min_value=0,
+            value=0,
+            step=10000,
+            help="Les réponses sont raccourcies quand le budget s'amenuise ; "
+                 "une fois épuisé, la meilleure itération (score QA) est livrée"
+        )
+        
         show_reasoning = st.checkbox(
             "Afficher le raisonnement détaillé",
             value=True,
@@ -113,6 +165,149 @@ with st.sidebar:
             value=True,
             help="Le Dev corrige automatiquement les bugs détectés par QA"
         )
+        
+        output_format = st.radio(
+            "Format de sortie des agents",
+            ["markdown", "json"],
+            horizontal=True,
+            help="JSON : réponses structurées validées par schéma (décision, bugs, score, tests, code) "
+                 "au lieu du markdown analysé par heuristiques"
+        )
+        
+        compact = st.checkbox(
+            "Verbosité compacte",
+            value=False,
+            disabled=output_format != "json",
+            help="Supprime les sections d'analyse et de raisonnement : beaucoup moins de tokens générés"
+        )
+        
+        incremental_review = st.checkbox(
+            "Revue QA incrémentale",
+            value=True,
+            help="À partir de l'itération 2, le QA ne revoit que les fonctions modifiées "
+                 "et reporte les verdicts et tests des fonctions inchangées"
+        )
+        
+        map_reduce_review = st.checkbox(
+            "Revue parallèle des gros fichiers",
+            value=True,
+            help="Au-delà de 300 lignes, le QA revoit les fonctions/classes par lots en parallèle "
+                 "et le Tech Lead travaille sur une vue condensée du code"
+        )
+        
+        split_qa = st.checkbox(
+            "Revue QA scindée (critique ∥ tests)",
+            value=False,
+            help="La critique du code et l'écriture des tests sont deux appels menés en parallèle"
+        )
+        
+        parallel_tot = st.checkbox(
+            "Tree of Thoughts parallèle (Tech Lead)",
+            value=False,
+            help="Chaque option (valider, corriger, refondre) est évaluée par un appel court et concurrent ; "
+                 "une option dominante arrête l'évaluation des autres"
+        )
+        
+        speculative_fix = st.checkbox(
+            "Correction anticipée (pendant le Tech Lead)",
+            value=False,
+            help="Si le QA signale des bugs critiques, le Dev prépare la correction pendant la revue "
+                 "du Tech Lead ; elle est abandonnée si le code est validé"
+        )
+        
+        story_parallel = st.checkbox(
+            "Développement par User Story",
+            value=False,
+            help="Interface commune puis une implémentation par User Story en parallèle, "
+                 "fusionnées en projet multi-fichiers"
+        )
+        
+        early_stop = st.checkbox(
+            "Streaming avec arrêt anticipé",
+            value=False,
+            help="La génération est coupée dès que les champs utiles (statut, bugs, tests, code) "
+                 "sont complets : la prose finale n'est ni attendue ni payée"
+        )
+        
+        reviewers = st.multiselect(
+            "Relecteurs spécialisés",
+            list(REVIEWERS),
+            default=[],
+            format_func=lambda focus: REVIEWERS[focus].LABEL,
+            help="Revues courtes et ciblées menées en parallèle du QA ; "
+                 "leurs constats sont dédupliqués puis ajoutés au rapport QA"
+        )
+        
+        tdd = st.checkbox(
+            "Mode TDD (tests d'acceptation d'abord)",
+            value=False,
+            help="Le QA écrit les tests depuis les User Stories pendant que le Dev code ; "
+                 "ces tests servent de cible stable à toutes les itérations"
+        )
+        
+        execute_tests = st.checkbox(
+            "Exécuter les tests générés en local",
+            value=False,
+            help="Lance pytest sur le code et les tests écrits par les agents (classement best-of-N, "
+                 "tests d'acceptation TDD) dans un sous-processus limité (CPU, mémoire, sans réseau "
+                 "si possible) mais avec vos droits et votre système de fichiers : à n'activer "
+                 "qu'en connaissance de cause"
+        )
+        
+        static_checks = st.checkbox(
+            "Vérifications statiques en parallèle du QA",
+            value=True,
+            help="Compilation et contrôles AST (sans LLM) transmis au Tech Lead avec le rapport QA"
+        )
+        
+        stop_on_stall = st.checkbox(
+            "Détecter les itérations sans progrès",
+            value=True,
+            help="Si le nouveau code est quasi identique ou si les mêmes bugs critiques reviennent, "
+                 "l'équipe change de stratégie puis s'arrête au lieu de boucler"
+        )
+        
+        best_of_n = st.slider(
+            "Candidats parallèles (best-of-N)",
+            min_value=1,
+            max_value=5,
+            value=1,
+            help="Le Dev génère N versions en parallèle (températures variées) ; "
+                 "la meilleure (compilation, contrôles statiques, tests) part en QA"
+        )
+        
+        semantic_reuse = st.checkbox(
+            "Réutiliser les runs similaires",
+            value=False,
+            help="Même demande qu'un run passé (casse, accents et ponctuation ignorés) : ses User Stories "
+                 "sont réutilisées (PO sauté). Demande seulement proche : elles sont données au PO comme exemple"
+        )
+        
+        reuse_code = st.checkbox(
+            "Réutiliser aussi le code VALIDÉ",
+            value=False,
+            disabled=not semantic_reuse,
+            help="Pour une demande identique, le Dev part du code validé du run passé (génération initiale sautée)"
+        )
+        
+        incremental = st.checkbox(
+            "Réutiliser les étapes inchangées",
+            value=False,
+            help="Comme un build incrémental : une étape (PO, Dev, QA, Tech Lead) dont les entrées "
+                 "sont identiques à un run récent (moins de 7 jours) n'est pas recalculée. "
+                 "Décochez pour forcer une nouvelle génération"
+        )
+        
+        interrupted_runs = {c["run_id"]: c for c in CheckpointStore().list_checkpoints(status="running")}
+        resume_run_id = st.selectbox(
+            "Reprendre un run interrompu",
+            [None] + list(interrupted_runs),
+            format_func=lambda rid: "—" if rid is None else (
+                f"{interrupted_runs[rid]['updated_at']} · {interrupted_runs[rid]['request'][:40]} "
+                f"(après {interrupted_runs[rid]['last_stage']})"
+            ),
+            help="Repart de la dernière étape terminée (PO, Dev, QA, Tech Lead) sans la recalculer"
+        )
 
 # Main content
 col1, col2 = st.columns([2, 1])
@@ -155,18 +350,46 @@ with col2:
 st.divider()
 
 if st.button("🚀 Lancer l'équipe", type="primary", use_container_width=True):
+    if resume_run_id:
+        user_request = interrupted_runs[resume_run_id]["request"]
+    
     if not user_request:
         st.error("⚠️ Veuillez décrire votre besoin avant de lancer l'équipe")
-    elif api_choice == "Groq (Gratuit)" and not groq_api_key:
-        st.error("⚠️ Veuillez configurer votre API Key Groq dans la barre latérale")
+    elif api_choice != "Ollama (Local)" and not api_key:
+        st.error(f"⚠️ Veuillez configurer votre API Key {api_choice.split()[0]} dans la barre latérale")
     else:
         # Sauvegarder la configuration dans session_state
         st.session_state.user_request = user_request
         st.session_state.uploaded_files = uploaded_files
         st.session_state.max_iterations = max_iterations
+        st.session_state.deadline_s = deadline_min * 60 or None
+        st.session_state.token_budget = token_budget or None
         st.session_state.show_reasoning = show_reasoning
         st.session_state.auto_fix = auto_fix
-        st.session_state.api_key = groq_api_key
+        st.session_state.stop_on_stall = stop_on_stall
+        st.session_state.incremental_review = incremental_review
+        st.session_state.map_reduce_review = map_reduce_review
+        st.session_state.split_qa = split_qa
+        st.session_state.static_checks = static_checks
+        st.session_state.tdd = tdd
+        st.session_state.execute_tests = execute_tests
+        st.session_state.reviewers = reviewers
+        st.session_state.parallel_tot = parallel_tot
+        st.session_state.speculative_fix = speculative_fix
+        st.session_state.early_stop = early_stop
+        st.session_state.story_parallel = story_parallel
+        st.session_state.output_format = output_format
+        st.session_state.verbosity = "compact" if compact else "standard"
+        st.session_state.best_of_n = best_of_n
+        st.session_state.semantic_reuse = semantic_reuse
+        st.session_state.reuse_code = reuse_code
+        st.session_state.incremental = incremental
+        st.session_state.api_key = api_key
+        st.session_state.provider = PROVIDERS[api_choice]
+        st.session_state.latency_profile = latency_profile
+        st.session_state.hedge_backend = hedge_backend
+        st.session_state.resume_run_id = resume_run_id
+        st.session_state.pop("last_run", None)
         st.session_state.running = True
         st.rerun()
 
@@ -176,18 +399,28 @@ if st.session_state.get("running", False):
     st.header("🔄 Exécution en cours...")
     
     # Importer les modules nécessaires
-    from langchain_groq import ChatGroq
     from orchestrator import TeamOrchestrator
     from utils.pdf_processor import PDFProcessor
-    import zipfile
-    import io
-    
-    # Initialiser le LLM
-    llm = ChatGroq(
-        model="moonshotai/kimi-k2-instruct-0905",
-        temperature=0.3,
-        api_key=st.session_state.api_key
+    from utils.semantic_cache import SemanticRunCache
+    from utils.run_store import RunStore
+    from utils.stage_cache import StageCache
+    from utils.convergence import ConvergenceMonitor
+    from utils.event_bus import EventBus, BUG_FOUND, DECISION, STAGE_START, TOKEN_DELTA, TRACE
+    
+    # Initialiser le routage des modèles (profil + fournisseur + hedging)
+    hedge = None
+    if st.session_state.hedge_backend == "Second modèle":
+        hedge = {"provider": st.session_state.provider}
+    elif st.session_state.hedge_backend == "Ollama (Local)":
+        hedge = {"provider": "ollama"}
+    
+    router = ModelRouter(
+        profile=st.session_state.latency_profile,
+        provider=st.session_state.provider,
+        api_key=st.session_state.api_key,
+        hedge=hedge
     )
+    llm = router.llm_for("dev")
     
     # Traiter les PDFs si présents
     pdf_context = None
@@ -198,84 +431,193 @@ if st.session_state.get("running", False):
             pdf_context = processor.get_context_for_agent()
             pdf_status.update(label=f"✅ {num_docs} pages chargées", state="complete")
     
+    # Bus d'événements du run : l'interface s'y abonne via une file lue par le thread Streamlit
+    event_bus = EventBus()
+    ui_events = queue.Queue()
+    event_bus.subscribe(ui_events.put, name="interface")
+    
     # Créer l'orchestrateur
-    orchestrator = TeamOrchestrator(llm=llm, pdf_context=pdf_context)
+    orchestrator = TeamOrchestrator(
+        llm=llm,
+        pdf_context=pdf_context,
+        router=router,
+        best_of_n=st.session_state.best_of_n,
+        semantic_cache=SemanticRunCache() if st.session_state.semantic_reuse else None,
+        reuse_code=st.session_state.reuse_code,
+        checkpoint_store=CheckpointStore(),
+        stage_cache=StageCache() if st.session_state.incremental else None,
+        convergence_monitor=ConvergenceMonitor() if st.session_state.stop_on_stall else None,
+        output_format=st.session_state.output_format,
+        verbosity=st.session_state.verbosity,
+        incremental_review=st.session_state.incremental_review,
+        map_reduce_review=st.session_state.map_reduce_review,
+        split_qa=st.session_state.split_qa,
+        static_checks=st.session_state.static_checks,
+        tdd=st.session_state.tdd,
+        reviewers=st.session_state.reviewers,
+        parallel_tot=st.session_state.parallel_tot,
+        speculative_fix=st.session_state.speculative_fix,
+        early_stop=st.session_state.early_stop,
+        story_parallel=st.session_state.story_parallel,
+        event_bus=event_bus,
+        execute_tests=st.session_state.execute_tests
+    )
     
     # Exécuter le workflow
     with st.status("L'équipe travaille...", expanded=True) as status:
         # Placeholder pour l'exécution en temps réel
         progress_placeholder = st.empty()
         
-        result = orchestrator.run(
-            user_request=st.session_state.user_request,
-            max_iterations=st.session_state.max_iterations,
-            auto_fix=st.session_state.auto_fix
-        )
+        # Le run s'exécute dans un thread ; seul le thread Streamlit met à jour l'affichage
+        outcome = {}
+        resume_run_id = st.session_state.resume_run_id
+        run_kwargs = {
+            "user_request": st.session_state.user_request,
+            "max_iterations": st.session_state.max_iterations,
+            "auto_fix": st.session_state.auto_fix,
+            "deadline_s": st.session_state.deadline_s,
+            "token_budget": st.session_state.token_budget
+        }
+        
+        def execute():
+            try:
+                if resume_run_id:
+                    outcome["result"] = orchestrator.resume(resume_run_id)
+                else:
+                    outcome["result"] = orchestrator.run(**run_kwargs)
+            except Exception as exc:
+                outcome["error"] = exc
+        
+        worker = threading.Thread(target=execute, name="orchestrator", daemon=True)
+        worker.start()
+        
+        live = {"stage": "L'équipe travaille...", "tokens": 0, "bugs": 0, "lines": []}
+        while True:
+            try:
+                event = ui_events.get(timeout=0.2)
+            except queue.Empty:
+                if worker.is_alive():
+                    continue
+                # Run terminé : livrer les derniers événements encore en file chez l'abonné
+                event_bus.close()
+                if ui_events.empty():
+                    break
+                continue
+            
+            if event["type"] == STAGE_START:
+                live["stage"] = f"⏳ {event['stage']} en cours..."
+            elif event["type"] == TOKEN_DELTA and event["kind"] == "call":
+                live["tokens"] += event["total"]
+            elif event["type"] == BUG_FOUND:
+                live["bugs"] += 1
+            elif event["type"] == DECISION:
+                live["stage"] = f"⚖️ Itération {event['iteration']} : {event['status']}"
+            elif event["type"] == TRACE:
+                live["lines"].append(f"- {event.get('message', '').strip()}")
+                progress_placeholder.markdown("\n".join(live["lines"][-12:]))
+            status.update(label=f"{live['stage']} · {live['tokens']} tokens · {live['bugs']} bug(s) signalé(s)")
+        
+        try:
+            if "error" in outcome:
+                raise outcome["error"]
+            result = outcome["result"]
+        except Exception as exc:
+            status.update(label="❌ Exécution interrompue", state="error")
+            st.session_state.running = False
+            st.error(
+                f"⚠️ {type(exc).__name__} : {exc}\n\n"
+                f"Les étapes terminées sont sauvegardées : reprenez le run `{orchestrator.run_id}` "
+                "depuis « Options Avancées » dans la barre latérale."
+            )
+            st.stop()
         
         status.update(label="✅ Travail terminé !", state="complete")
     
-    # Afficher le résultat
-    if result["success"]:
-        st.success(f"🎉 Projet validé avec succès en {result['iterations']} itération(s) !")
-    else:
-        st.warning(f"⚠️ Projet terminé après {result['iterations']} itération(s) - Validation partielle")
+    # Historiser le run (consultable depuis la page Historique)
+    run_id = RunStore().save_run(st.session_state.user_request, result, run_id=orchestrator.run_id)
+    
+    # Résultat conservé pour les reruns suivants : modifier un widget ne relance plus l'équipe
+    st.session_state.running = False
+    st.session_state.last_run = {
+        "run_id": run_id,
+        "result": result,
+        "user_request": st.session_state.user_request
+    }
+
+
+@st.fragment
+def show_results(last_run: Dict):
+    """
+    Sections du résultat : seule la section choisie est rendue, et ses
+    widgets (section, pages) ne relancent que ce fragment
+    """
+    from orchestrator import TeamOrchestrator
+    from utils.bundler import bundle_project
+    
+    result = last_run["result"]
+    run_id = last_run["run_id"]
+    show_reasoning = st.session_state.get("show_reasoning", True)
     
-    # Tabs pour organiser les résultats
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+    section = section_selector([
         "📝 Spécifications",
         "💻 Code",
         "🧪 Tests",
         "✅ Validation",
-        "📦 Livraison"
-    ])
+        "📦 Livraison",
+        "📊 Trace"
+    ], key=f"section_{run_id}")
     
-    with tab1:
+    if section == "📝 Spécifications":
         st.markdown('<div class="agent-box">', unsafe_allow_html=True)
         st.subheader("🎯 Product Owner - Analyse")
         
-        if st.session_state.show_reasoning:
+        if show_reasoning:
             with st.expander("🧠 Raisonnement (Chain of Thought)"):
-                for thought in result["specifications"]["thoughts"]:
-                    st.markdown(f"- {thought}")
+                render_list(result["specifications"]["thoughts"], key=f"po_thoughts_{run_id}")
         
         st.markdown("### User Stories")
         st.markdown(result["specifications"]["user_stories"])
         st.markdown('</div>', unsafe_allow_html=True)
     
-    with tab2:
+    elif section == "💻 Code":
         st.markdown('<div class="agent-box">', unsafe_allow_html=True)
         st.subheader("💻 Lead Developer - Code")
         
-        if st.session_state.show_reasoning:
+        if show_reasoning:
             with st.expander("🧠 Raisonnement (ReAct)"):
-                for thought in result["code"]["thoughts"]:
-                    st.markdown(f"- {thought}")
+                render_list(result["code"]["thoughts"], key=f"dev_thoughts_{run_id}")
             
             with st.expander("📊 Historique des itérations"):
                 st.info(f"Total d'itérations : {result['code']['iterations']}")
+            
+            if result["code"]["candidates"]:
+                with st.expander("🎲 Candidats best-of-N (dernière génération)"):
+                    st.dataframe(result["code"]["candidates"], use_container_width=True)
         
-        st.code(result["code"]["final_code"], language="python")
+        if result["code"]["files"]:
+            # Projet multi-fichiers (développement par User Story) : un fichier affiché à la fois
+            filename = st.selectbox("Fichier", list(result["code"]["files"]), key=f"file_{run_id}")
+            st.code(result["code"]["files"][filename], language="python")
+        else:
+            st.code(result["code"]["final_code"], language="python")
         st.markdown('</div>', unsafe_allow_html=True)
     
-    with tab3:
+    elif section == "🧪 Tests":
         st.markdown('<div class="agent-box">', unsafe_allow_html=True)
         st.subheader("🐛 QA Engineer - Tests & Critique")
         
-        if st.session_state.show_reasoning:
+        if show_reasoning:
             with st.expander("🧠 Raisonnement (Self-Correction)"):
-                for thought in result["tests"]["thoughts"]:
-                    st.markdown(f"- {thought}")
+                render_list(result["tests"]["thoughts"], key=f"qa_thoughts_{run_id}")
         
         # Afficher les bugs
         if result["tests"]["bugs_found"]["critical"]:
             st.markdown("### 🚨 Bugs Critiques")
-            for i, bug in enumerate(result["tests"]["bugs_found"]["critical"], 1):
-                st.error(f"{i}. {bug}")
+            render_bugs(result["tests"]["bugs_found"]["critical"], key=f"critical_{run_id}", critical=True)
         
         if result["tests"]["bugs_found"]["minor"]:
             st.markdown("### ⚠️ Bugs Mineurs")
-            for i, bug in enumerate(result["tests"]["bugs_found"]["minor"], 1):
-                st.warning(f"{i}. {bug}")
+            render_bugs(result["tests"]["bugs_found"]["minor"], key=f"minor_{run_id}", critical=False)
         
         if not result["tests"]["bugs_found"]["critical"] and not result["tests"]["bugs_found"]["minor"]:
             st.success("✅ Aucun bug détecté")
@@ -289,14 +631,13 @@ if st.session_state.get("running", False):
         st.code(result["tests"]["test_code"], language="python")
         st.markdown('</div>', unsafe_allow_html=True)
     
-    with tab4:
+    elif section == "✅ Validation":
         st.markdown('<div class="agent-box success-box">' if result["success"] else '<div class="agent-box warning-box">', unsafe_allow_html=True)
         st.subheader("✅ Tech Lead - Validation")
         
-        if st.session_state.show_reasoning:
+        if show_reasoning:
             with st.expander("🧠 Raisonnement (Tree of Thoughts)"):
-                for thought in result["validation"]["thoughts"]:
-                    st.markdown(f"- {thought}")
+                render_list(result["validation"]["thoughts"], key=f"tl_thoughts_{run_id}")
         
         # Statut
         status_icon = "✅" if result["success"] else "⚠️"
@@ -310,77 +651,111 @@ if st.session_state.get("running", False):
         # Actions recommandées
         if result["validation"]["actions"]:
             st.markdown("### Actions Recommandées")
-            for i, action in enumerate(result["validation"]["actions"], 1):
-                st.markdown(f"{i}. {action}")
+            render_list(result["validation"]["actions"], key=f"actions_{run_id}", numbered=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
-    with tab5:
+    elif section == "📦 Livraison":
         st.subheader("📦 Téléchargement du Projet")
         
-        # Créer un ZIP avec tous les fichiers
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            # Ajouter le code principal
-            zip_file.writestr("main.py", result["code"]["final_code"])
-            
-            # Ajouter les tests
-            zip_file.writestr("test_main.py", result["tests"]["test_code"])
-            
-            # Ajouter le README
-            readme_content = f"""# Projet AI Dev Team
+        # Archive écrite sur disque et réutilisée tant que le résultat ne change pas
+        bundle_path = bundle_project(result, last_run["user_request"])
+        
+        with open(bundle_path, "rb") as bundle:
+            st.download_button(
+                label="⬇️ Télécharger le projet complet (.zip)",
+                data=bundle,
+                file_name=f"ai_dev_team_project_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                mime="application/zip",
+                type="primary"
+            )
+        
+        with zipfile.ZipFile(bundle_path) as bundle:
+            files = bundle.namelist()
+        history = [name for name in files if name.startswith("history/")]
+        st.info(
+            "**Contenu du package :**\n"
+            + "\n".join(f"- `{name}`" for name in files if not name.startswith("history/"))
+            + f"\n- 🕘 `history/` - {len(history)} fichier(s) : code, tests et revue de chaque itération"
+        )
+    
+    else:
+        st.subheader("📊 Trace d'exécution")
+        render_list(
+            [TeamOrchestrator.summary_line(entry) for entry in result["execution_trace"]],
+            key=f"trace_{run_id}",
+            page_size=50
+        )
+        
+        # Graphe d'étapes de chaque itération (Mermaid)
+        graphs = [entry for entry in result["execution_trace"] if entry.get("step") == "STAGE_GRAPH"]
+        if graphs:
+            index = st.selectbox(
+                "Graphe d'étapes",
+                range(len(graphs)),
+                format_func=lambda i: f"Itération {graphs[i]['iteration']} — {graphs[i]['message'].strip()}",
+                key=f"graph_{run_id}"
+            )
+            st.code(graphs[index]["mermaid"], language="mermaid")
 
-## Description
-{st.session_state.user_request}
 
-## User Stories
-{result["specifications"]["user_stories"]}
+# Affichage du dernier run (depuis session_state : les reruns ne relancent pas l'équipe)
+if st.session_state.get("last_run"):
+    last_run = st.session_state.last_run
+    result = last_run["result"]
+    
+    if result["success"]:
+        st.success(f"🎉 Projet validé avec succès en {result['iterations']} itération(s) !")
+    else:
+        st.warning(f"⚠️ Projet terminé après {result['iterations']} itération(s) - Validation partielle")
+    if result["metrics"]["budget"] and result["metrics"]["budget"]["exceeded"]:
+        budget = result["metrics"]["budget"]
+        st.info(
+            f"⏳ Budget épuisé ({budget['exceeded']}) après {budget['elapsed_s']} s et "
+            f"{budget['tokens_used']} tokens : la meilleure itération a été livrée"
+        )
+    st.caption(f"📚 Run enregistré dans l'historique (id `{last_run['run_id']}`)")
+    
+    # Latence par agent pour le profil choisi
+    metrics = result["metrics"]
+    st.markdown(f"**⏱️ Latence par agent** — profil `{metrics['profile']}` ({metrics['total_s']} s au total)")
+    agent_labels = {"po": "🎯 PO", "dev": "💻 Dev", "qa": "🐛 QA", "tech_lead": "✅ Tech Lead"}
+    metric_cols = st.columns(len(agent_labels))
+    for col, (agent_key, label) in zip(metric_cols, agent_labels.items()):
+        stats = metrics["per_agent"].get(agent_key)
+        if stats:
+            col.metric(label, f"{stats['total_s']} s", f"{stats['calls']} appel(s)", delta_color="off")
+            col.caption(", ".join(stats["models"]))
+    
+    if metrics["hedging"]:
+        hedging = metrics["hedging"]
+        st.caption(
+            f"🪁 Hedging : {hedging['hedges']} doublon(s) sur {hedging['calls']} appel(s), "
+            f"{hedging['secondary_wins']} gagné(s) par le secondaire, "
+            f"{hedging['wasted_tokens']} tokens gaspillés"
+        )
 
-## Utilisation
-```bash
-python main.py
-```
+    if metrics["speculation"] and metrics["speculation"]["launched"]:
+        speculation = metrics["speculation"]
+        st.caption(
+            f"🔮 Correction anticipée : {speculation['hits']}/{speculation['launched']} retenue(s), "
+            f"~{speculation['saved_s']} s gagnées, {speculation['wasted_tokens']} tokens gaspillés"
+        )
 
-## Tests
-```bash
-pytest test_main.py
-```
+    if metrics["early_stop"] and metrics["early_stop"]["calls"]:
+        early_stop = metrics["early_stop"]
+        st.caption(
+            f"✂️ Arrêt anticipé : {early_stop['early_stopped']}/{early_stop['calls']} appel(s) coupé(s), "
+            f"~{early_stop['tokens_saved']} tokens et {early_stop['ms_saved']} ms économisés"
+        )
 
-## Qualité
-- Score QA : {result["tests"]["quality_score"]}/10
-- Itérations : {result["iterations"]}
-- Statut : {result["validation"]["status"]}
+    if metrics["cached_stages"]:
+        st.caption(
+            f"♻️ {metrics['cached_stages']} étape(s) inchangée(s) réutilisée(s), "
+            f"~{metrics['cached_saved_s']} s économisées"
+        )
 
----
-Généré par AI Dev Team
-"""
-            zip_file.writestr("README.md", readme_content)
-            
-            # Ajouter requirements.txt basique
-            requirements = "# Dépendances du projet\n# À adapter selon votre code\n"
-            zip_file.writestr("requirements.txt", requirements)
-        
-        zip_buffer.seek(0)
-        
-        st.download_button(
-            label="⬇️ Télécharger le projet complet (.zip)",
-            data=zip_buffer,
-            file_name=f"ai_dev_team_project_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-            mime="application/zip",
-            type="primary"
-        )
-        
-        st.info("""
-        **Contenu du package :**
-        - 📄 `main.py` - Code principal généré
-        - 🧪 `test_main.py` - Tests unitaires
-        - 📖 `README.md` - Documentation complète
-        - 📋 `requirements.txt` - Dépendances
-        """)
-        
-        # Afficher le résumé d'exécution
-        with st.expander("📊 Trace d'exécution complète"):
-            st.markdown(orchestrator.get_execution_summary())
+    show_results(last_run)
     
     # Bouton reset
     st.divider()
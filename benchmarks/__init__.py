@@ -0,0 +1,3 @@
+"""
+Benchmarks et tests de charge pour AI Dev Team
+"""
@@ -0,0 +1,281 @@
+"""
+Générateur de charge et test d'endurance (soak) de TeamOrchestrator
+
+Simule N utilisateurs simultanés lançant chacun un run complet contre
+un LLM factice (latence log-normale + 429). Deux modes :
+- sync  : pool de threads, comme plusieurs sessions Streamlit
+- async : boucle asyncio qui délègue chaque run via asyncio.to_thread,
+          comme un serveur web asynchrone hébergeant l'orchestrateur
+
+Usage :
+    python -m benchmarks.load_test --concurrency 16 --runs 64 --time-scale 0.05
+    python -m benchmarks.load_test --mode async --concurrency 32 --duration 600 --capacity 20
+
+Rapport : débit, latence de bout en bout p50/p95/p99, délai de mise
+en file, croissance du RSS, nombre de threads et de descripteurs.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from orchestrator import TeamOrchestrator
+from benchmarks.replay_llm import SimulatedLLM
+
+
+REQUEST = "Créer un client pour l'API GitHub avec pagination"
+
+
+def rss_kb() -> float:
+    """RSS courant du processus (Ko)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError):
+        # Hors Linux : pic de RSS seulement
+        return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def fd_count() -> Optional[int]:
+    """Nombre de descripteurs de fichiers ouverts (None si indisponible)"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile par rang le plus proche"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class ResourceSampler(threading.Thread):
+    """Échantillonne RSS, threads et descripteurs à intervalle régulier"""
+
+    def __init__(self, interval: float = 1.0):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def sample(self):
+        self.samples.append({
+            "t": time.perf_counter(),
+            "rss_kb": rss_kb(),
+            "threads": threading.active_count(),
+            "fds": fd_count(),
+        })
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+class LoadTest:
+    """Pilote les runs et collecte les mesures par run"""
+
+    def __init__(
+        self,
+        concurrency: int,
+        runs: Optional[int],
+        duration: Optional[float],
+        max_iterations: int,
+        llm_factory: Callable[[], SimulatedLLM],
+    ):
+        self.concurrency = concurrency
+        self.runs = runs
+        self.duration = duration
+        self.max_iterations = max_iterations
+        self.llm_factory = llm_factory
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _execute(self, submitted_at: float) -> Dict:
+        """Un run complet ; enregistre file d'attente et latence"""
+        started_at = time.perf_counter()
+        llm = self.llm_factory()
+        error = None
+        try:
+            TeamOrchestrator(llm=llm).run(REQUEST, max_iterations=self.max_iterations)
+        except Exception as exc:
+            error = type(exc).__name__
+        finished_at = time.perf_counter()
+        record = {
+            "queue_s": started_at - submitted_at,
+            "service_s": finished_at - started_at,
+            "latency_s": finished_at - submitted_at,
+            "llm_calls": len(llm.calls),
+            "rate_limited": llm.rate_limited,
+            "error": error,
+        }
+        with self._lock:
+            self.records.append(record)
+        return record
+
+    def _should_submit(self, submitted: int, start: float) -> bool:
+        if self.runs is not None and submitted >= self.runs:
+            return False
+        if self.duration is not None and time.perf_counter() - start >= self.duration:
+            return False
+        return True
+
+    def run_sync(self):
+        """N threads ; les runs en attente restent dans la file du pool"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            if self.duration is None:
+                futures = [pool.submit(self._execute, time.perf_counter()) for _ in range(self.runs)]
+                for future in futures:
+                    future.result()
+                return
+            # Soak : maintenir exactement `concurrency` runs en cours
+            submitted = 0
+            slots = threading.Semaphore(self.concurrency)
+            while self._should_submit(submitted, start):
+                slots.acquire()
+                future = pool.submit(self._execute, time.perf_counter())
+                future.add_done_callback(lambda _: slots.release())
+                submitted += 1
+
+    async def _run_async(self):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+
+        async def one(submitted_at: float):
+            async with semaphore:
+                await asyncio.to_thread(self._execute, submitted_at)
+
+        if self.duration is None:
+            await asyncio.gather(*(one(time.perf_counter()) for _ in range(self.runs)))
+            return
+        tasks = set()
+        submitted = 0
+        while self._should_submit(submitted, start):
+            if len(tasks) >= self.concurrency:
+                _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            tasks.add(asyncio.create_task(one(time.perf_counter())))
+            submitted += 1
+        await asyncio.gather(*tasks)
+
+    def run_async(self):
+        asyncio.run(self._run_async())
+
+
+def summarize(records: List[Dict], samples: List[Dict], elapsed: float, concurrency: int, mode: str) -> Dict:
+    """Agrège les mesures en rapport de capacité"""
+    ok = [r for r in records if r["error"] is None]
+    latencies = [r["latency_s"] for r in ok]
+    queues = [r["queue_s"] for r in records]
+    errors: Dict[str, int] = {}
+    for r in records:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+
+    rss = [s["rss_kb"] for s in samples]
+    fds = [s["fds"] for s in samples if s["fds"] is not None]
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "runs": len(records),
+        "succeeded": len(ok),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_runs_per_s": round(len(ok) / elapsed, 4) if elapsed else 0.0,
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": statistics.mean(latencies) if latencies else 0.0,
+        },
+        "queue_delay_s": {
+            "p50": percentile(queues, 50),
+            "p95": percentile(queues, 95),
+            "max": max(queues) if queues else 0.0,
+        },
+        "rate_limited_calls": sum(r["rate_limited"] for r in records),
+        "llm_calls": sum(r["llm_calls"] for r in records),
+        "rss_kb": {
+            "start": rss[0] if rss else 0.0,
+            "end": rss[-1] if rss else 0.0,
+            "max": max(rss) if rss else 0.0,
+            "growth": (rss[-1] - rss[0]) if rss else 0.0,
+        },
+        "threads_max": max((s["threads"] for s in samples), default=0),
+        "fds": {"start": fds[0], "end": fds[-1], "max": max(fds)} if fds else None,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Test de charge AI Dev Team")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--concurrency", type=int, default=8, help="Utilisateurs simultanés")
+    parser.add_argument("--runs", type=int, default=32, help="Nombre total de runs (ignoré avec --duration)")
+    parser.add_argument("--duration", type=float, help="Soak : durée en secondes pendant laquelle relancer des runs")
+    parser.add_argument("--max-iterations", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=1.5, help="Latence médiane d'un appel LLM (s)")
+    parser.add_argument("--sigma", type=float, default=0.6, help="Dispersion log-normale de la latence")
+    parser.add_argument("--rate-limit", type=float, default=0.02, help="Probabilité d'un 429 par appel")
+    parser.add_argument("--capacity", type=int, help="Appels simultanés acceptés par le fournisseur avant 429")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Facteur appliqué aux latences simulées")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--output", help="Écrit le rapport JSON dans ce fichier")
+    args = parser.parse_args(argv)
+
+    def llm_factory() -> SimulatedLLM:
+        return SimulatedLLM(
+            latency_median=args.latency,
+            latency_sigma=args.sigma,
+            rate_limit_rate=args.rate_limit,
+            capacity=args.capacity,
+            time_scale=args.time_scale,
+        )
+
+    test = LoadTest(
+        concurrency=args.concurrency,
+        runs=None if args.duration else args.runs,
+        duration=args.duration,
+        max_iterations=args.max_iterations,
+        llm_factory=llm_factory,
+    )
+
+    sampler = ResourceSampler(interval=args.sample_interval)
+    sampler.start()
+    start = time.perf_counter()
+    if args.mode == "sync":
+        test.run_sync()
+    else:
+        test.run_async()
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    report = summarize(test.records, sampler.samples, elapsed, args.concurrency, args.mode)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
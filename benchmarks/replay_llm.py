@@ -0,0 +1,436 @@
+"""
+LLM de rejeu pour les benchmarks
+Renvoie des réponses enregistrées au format attendu par chaque agent,
+sans aucun appel réseau.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+def po_response(stories: int = 3) -> str:
+    """Réponse type du Product Owner avec `stories` User Stories"""
+    parts = ["## Analyse du besoin", "Le client veut un outil robuste et testé.", "", "## User Stories"]
+    for i in range(1, stories + 1):
+        parts.append(f"""**US{i}**: Fonctionnalité {i}
+- En tant que utilisateur
+- Je veux exécuter l'action {i}
+- Afin de gagner du temps
+- Critères d'acceptation :
+  - [ ] La fonction {i} retourne un résultat valide
+  - [ ] Les erreurs sont gérées proprement
+""")
+    parts.append("## Contraintes techniques identifiées\n- Python 3.10+\n- Pas de dépendance lourde")
+    return "\n".join(parts)
+
+
+def dev_response(functions: int = 3) -> str:
+    """Réponse type du Developer avec `functions` fonctions"""
+    reasoning = "\n".join(
+        f"PENSÉE {i}: Implémenter la fonction {i}\nACTION {i}: Écrire step_{i}()\nOBSERVATION {i}: OK"
+        for i in range(1, functions + 1)
+    )
+    body = "\n\n".join(
+        f'''def step_{i}(value: int) -> int:
+    """Étape {i} du traitement"""
+    try:
+        return value + {i}
+    except TypeError as exc:
+        raise ValueError("valeur invalide") from exc'''
+        for i in range(1, functions + 1)
+    )
+    return f"""```reasoning
+{reasoning}
+```
+
+```python
+{body}
+
+
+def main():
+    \"\"\"Point d'entrée principal\"\"\"
+    print(step_1(0))
+
+
+if __name__ == "__main__":
+    main()
+```"""
+
+
+def qa_response(bugs: int = 2, tests: int = 3, score: int = 6) -> str:
+    """Réponse type du QA avec `bugs` bugs critiques et `tests` tests"""
+    critical = "\n".join(f"{i}. Le cas limite {i} n'est pas géré (ligne {i * 3})" for i in range(1, bugs + 1))
+    minor = "\n".join(f"{i}. Nom de variable peu explicite {i}" for i in range(1, bugs + 1))
+    test_code = "\n\n".join(
+        f'''def test_step_{i}():
+    """Test du cas nominal {i}"""
+    assert step_{i}(1) == {i + 1}'''
+        for i in range(1, tests + 1)
+    )
+    return f"""### 🔍 ANALYSE INITIALE
+Le code est lisible.
+
+###  AUTO-CRITIQUE
+"Attendez... est-ce que j'ai bien regardé les erreurs ?"
+
+###  JUGEMENT FINAL
+
+**Bugs critiques** (blocants) :
+{critical}
+
+**Bugs mineurs** (non-blocants) :
+{minor}
+
+**Améliorations suggérées** :
+1. Ajouter du logging
+
+**Score de qualité** : {score}/10
+
+### TESTS UNITAIRES
+
+```python
+import pytest
+from main import *
+
+
+{test_code}
+```"""
+
+
+def tl_branch_response(score: int) -> str:
+    """Réponse type d'une branche du Tree of Thoughts parallèle"""
+    return f"""📊 Évaluation : {score}/10
+**Pour** : Option cohérente avec le rapport QA.
+**Contre** : Les cas limites restent à couvrir.
+**Actions requises** :
+1. Gérer les cas limites"""
+
+
+# Scores des branches A, B et C du Tree of Thoughts parallèle
+BRANCH_SCORES = {"A": 6, "B": 8, "C": 3}
+
+
+def reviewer_response() -> str:
+    """Réponse type d'un relecteur spécialisé : un doublon du QA reformulé et un constat nouveau"""
+    return """**Bugs critiques** :
+1. Cas limite 1 non géré à la ligne 3
+2. Entrée utilisateur non validée avant usage (ligne 2)
+
+**Bugs mineurs** :
+1. Aucun"""
+
+
+def tl_response(validated: bool, options_padding: int = 1) -> str:
+    """Réponse type du Tech Lead (validée ou à corriger)"""
+    padding = "\n".join(f"- Argument complémentaire {i}" for i in range(options_padding))
+    status = "✅ VALIDÉ" if validated else "🔄 À CORRIGER"
+    option = "A" if validated else "B"
+    return f"""### 🌳 ARBRE DE DÉCISION
+
+**Contexte** : Revue de l'itération courante
+
+#### Option A : Accepter
+✅ Avantages :
+- Livraison rapide
+{padding}
+
+📊 Évaluation : 6/10
+
+#### Option B : Corrections mineures
+✅ Avantages :
+- Qualité accrue
+{padding}
+
+📊 Évaluation : 8/10
+
+### 🎯 DÉCISION FINALE
+
+**Option retenue** : {option}
+
+**Justification** :
+Le code est proche du besoin.
+
+**Actions requises** :
+1. Gérer les cas limites
+2. Compléter les tests
+
+**Statut** : {status}
+"""
+
+
+def build_responses(size: str = "small") -> Dict[str, str]:
+    """Jeu de réponses enregistrées, `small` ou `large`"""
+    scale = 1 if size == "small" else 40
+    return {
+        "po": po_response(stories=3 * scale),
+        "dev": dev_response(functions=3 * scale),
+        "qa": qa_response(bugs=2 * scale, tests=3 * scale),
+        "reviewer": reviewer_response(),
+        **{f"tl_branch_{option}": tl_branch_response(score) for option, score in BRANCH_SCORES.items()},
+        "tl_continue": tl_response(validated=False, options_padding=scale),
+        "tl_validated": tl_response(validated=True, options_padding=scale),
+    }
+
+
+def build_json_responses(size: str = "small", compact: bool = False) -> Dict[str, str]:
+    """Mêmes réponses en mode JSON (agents/schemas.py), `compact` vide les champs facultatifs"""
+    scale = 1 if size == "small" else 40
+    markdown = build_responses(size)
+    code = markdown["dev"].split("```python\n")[1].split("```")[0].strip()
+    reasoning = markdown["dev"].split("```reasoning\n")[1].split("```")[0].strip()
+    tests = markdown["qa"].split("```python\n")[1].split("```")[0].strip()
+    bugs = 2 * scale
+
+    def tl(validated: bool) -> str:
+        options = [] if compact else [
+            {"option": option, "summary": f"{label}. " + " ".join(f"Argument complémentaire {i}." for i in range(scale)),
+             "score": score}
+            for option, label, score in (("A", "Accepter", 6), ("B", "Corrections mineures", 8))
+        ]
+        return json.dumps({
+            "options": options,
+            "chosen_option": "A" if validated else "B",
+            "status": "VALIDATED" if validated else "NEEDS_CORRECTION",
+            "justification": "Le code est proche du besoin.",
+            "actions": [] if validated else ["Gérer les cas limites", "Compléter les tests"]
+        }, ensure_ascii=False)
+
+    return {
+        "po": json.dumps({
+            "analysis": "" if compact else "Le client veut un outil robuste et testé.",
+            "user_stories": [
+                {
+                    "id": f"US{i}",
+                    "title": f"Fonctionnalité {i}",
+                    "as_a": "utilisateur",
+                    "i_want": f"exécuter l'action {i}",
+                    "so_that": "gagner du temps",
+                    "acceptance_criteria": [
+                        f"La fonction {i} retourne un résultat valide",
+                        "Les erreurs sont gérées proprement"
+                    ]
+                }
+                for i in range(1, 3 * scale + 1)
+            ],
+            "constraints": ["Python 3.10+", "Pas de dépendance lourde"]
+        }, ensure_ascii=False),
+        "dev": json.dumps({"reasoning": "" if compact else reasoning, "code": code}, ensure_ascii=False),
+        "qa": json.dumps({
+            "analysis": "" if compact else "Le code est lisible. Les erreurs sont-elles toutes gérées ?",
+            "critical_bugs": [f"Le cas limite {i} n'est pas géré (ligne {i * 3})" for i in range(1, bugs + 1)],
+            "minor_bugs": [f"Nom de variable peu explicite {i}" for i in range(1, bugs + 1)],
+            "suggestions": ["Ajouter du logging"],
+            "quality_score": 6,
+            "tests": tests
+        }, ensure_ascii=False),
+        "reviewer": json.dumps({
+            "critical_bugs": ["Cas limite 1 non géré à la ligne 3", "Entrée utilisateur non validée avant usage (ligne 2)"],
+            "minor_bugs": []
+        }, ensure_ascii=False),
+        **{
+            f"tl_branch_{option}": json.dumps({
+                "score": score,
+                "pros": "Option cohérente avec le rapport QA.",
+                "cons": "" if compact else "Les cas limites restent à couvrir.",
+                "actions": ["Gérer les cas limites"]
+            }, ensure_ascii=False)
+            for option, score in BRANCH_SCORES.items()
+        },
+        "tl_continue": tl(validated=False),
+        "tl_validated": tl(validated=True),
+    }
+
+
+class ReplayLLM:
+    """
+    Remplace ChatGroq : choisit la réponse enregistrée selon l'agent
+    appelant (détecté via le prompt système).
+    """
+
+    # Ordre significatif : le prompt d'une branche ToT mentionne aussi « Tech Lead »
+    AGENT_MARKERS = {
+        "Tree of Thoughts parallèle": "tl_branch",
+        "Product Owner": "po",
+        "Lead Developer": "dev",
+        "QA Engineer": "qa",
+        "Tech Lead": "tl",
+        "relecteur de code": "reviewer",
+    }
+
+    # Taille des fragments renvoyés par stream (caractères)
+    STREAM_CHUNK_CHARS = 16
+
+    def __init__(self, size: str = "small", validate_at: Optional[int] = None, epilogue: int = 0):
+        """
+        Args:
+            size: Taille des réponses (`small` ou `large`)
+            validate_at: Numéro de la décision Tech Lead qui valide
+                (None = jamais, pour forcer toutes les itérations)
+            epilogue: Lignes de prose ajoutées à la fin des réponses markdown,
+                comme le font souvent les modèles (cible de l'arrêt anticipé)
+        """
+        self.epilogue = epilogue
+        self.responses = build_responses(size)
+        # Réponses du mode JSON, choisies d'après le prompt système
+        self.json_responses = {
+            "standard": build_json_responses(size),
+            "compact": build_json_responses(size, compact=True)
+        }
+        self.validate_at = validate_at
+        self.calls: List[str] = []
+        self.tl_calls = 0
+
+    def _detect_agent(self, messages) -> str:
+        system = messages[0].content if messages else ""
+        for marker, agent in self.AGENT_MARKERS.items():
+            if marker in system:
+                return agent
+        return "dev"
+
+    def _responses_for(self, messages) -> Dict[str, str]:
+        system = messages[0].content if messages else ""
+        if "objet JSON valide" not in system:
+            return self.responses
+        return self.json_responses["compact" if "Verbosité COMPACTE" in system else "standard"]
+
+    def _reply(self, agent: str, responses: Dict[str, str]) -> str:
+        if agent != "tl":
+            return responses[agent]
+        self.tl_calls += 1
+        if self.validate_at is not None and self.tl_calls >= self.validate_at:
+            return responses["tl_validated"]
+        return responses["tl_continue"]
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        agent = self._detect_agent(messages)
+        self.calls.append(agent)
+        responses = self._responses_for(messages)
+        if agent == "tl_branch":
+            option = re.search(r"l'option ([ABC])", messages[-1].content).group(1)
+            return AIMessage(content=responses[f"tl_branch_{option}"])
+        content = self._reply(agent, responses)
+        if self.epilogue and responses is self.responses:
+            content += "\n\n---\n" + "\n".join(
+                f"Remarque complémentaire {i} : rien de bloquant à signaler." for i in range(self.epilogue)
+            )
+        return AIMessage(content=content)
+
+    def stream(self, messages, **kwargs):
+        # Réponse sans la latence simulée des sous-classes (appliquée par fragment)
+        content = ReplayLLM.invoke(self, messages, **kwargs).content
+        for start in range(0, len(content), self.STREAM_CHUNK_CHARS):
+            yield AIMessageChunk(content=content[start:start + self.STREAM_CHUNK_CHARS])
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        return self.invoke(messages, **kwargs)
+
+
+class RateLimitError(Exception):
+    """Équivalent simulé d'une réponse HTTP 429 du fournisseur"""
+
+
+class SimulatedLLM(ReplayLLM):
+    """
+    ReplayLLM avec latence réaliste et injection de 429
+
+    La latence suit une loi log-normale (médiane `latency_median` secondes),
+    multipliée par `time_scale` pour accélérer les simulations. Un 429 est
+    levé aléatoirement (`rate_limit_rate`) ou quand le nombre d'appels
+    simultanés dépasse `capacity` ; comme le client Groq, l'appel est
+    réessayé `max_retries` fois avec backoff exponentiel.
+    """
+
+    # Appels en cours, partagés par toutes les instances (un seul fournisseur)
+    _in_flight = 0
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        size: str = "small",
+        validate_at: Optional[int] = None,
+        latency_median: float = 1.5,
+        latency_sigma: float = 0.6,
+        rate_limit_rate: float = 0.02,
+        capacity: Optional[int] = None,
+        max_retries: int = 2,
+        time_scale: float = 1.0,
+        seed: Optional[int] = None,
+        epilogue: int = 0,
+    ):
+        super().__init__(size=size, validate_at=validate_at, epilogue=epilogue)
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.rate_limit_rate = rate_limit_rate
+        self.capacity = capacity
+        self.max_retries = max_retries
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+        self.rate_limited = 0
+
+    def _latency(self) -> float:
+        return self.rng.lognormvariate(math.log(self.latency_median), self.latency_sigma) * self.time_scale
+
+    def _acquire(self) -> bool:
+        """Réserve une place chez le fournisseur, False si 429"""
+        with SimulatedLLM._lock:
+            saturated = self.capacity is not None and SimulatedLLM._in_flight >= self.capacity
+            if saturated or self.rng.random() < self.rate_limit_rate:
+                self.rate_limited += 1
+                return False
+            SimulatedLLM._in_flight += 1
+            return True
+
+    def _release(self):
+        with SimulatedLLM._lock:
+            SimulatedLLM._in_flight -= 1
+
+    def _backoff(self, attempt: int) -> float:
+        return 0.5 * (2 ** attempt) * self.time_scale
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        for attempt in range(self.max_retries + 1):
+            if self._acquire():
+                try:
+                    time.sleep(self._latency())
+                    return super().invoke(messages, **kwargs)
+                finally:
+                    self._release()
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt))
+        raise RateLimitError("429 Too Many Requests")
+
+    def stream(self, messages, **kwargs):
+        """Latence répartie sur les fragments : fermer le flux libère la place aussitôt"""
+        for attempt in range(self.max_retries + 1):
+            if self._acquire():
+                try:
+                    chunks = list(super().stream(messages, **kwargs))
+                    delay = self._latency() / max(len(chunks), 1)
+                    for chunk in chunks:
+                        time.sleep(delay)
+                        yield chunk
+                    return
+                finally:
+                    self._release()
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt))
+        raise RateLimitError("429 Too Many Requests")
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        for attempt in range(self.max_retries + 1):
+            if self._acquire():
+                try:
+                    await asyncio.sleep(self._latency())
+                    return super().invoke(messages, **kwargs)
+                finally:
+                    self._release()
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt))
+        raise RateLimitError("429 Too Many Requests")
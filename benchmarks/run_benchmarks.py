@@ -0,0 +1,194 @@
+"""
+Suite de benchmarks des chemins critiques (orchestration et parsing)
+
+Usage :
+    python -m benchmarks.run_benchmarks                    # mesure + comparaison
+    python -m benchmarks.run_benchmarks --save-baseline    # enregistre la référence
+    python -m benchmarks.run_benchmarks --threshold 0.3    # tolérance de 30 %
+
+Les appels LLM sont rejoués (ReplayLLM) : seul le coût du code Python
+de l'équipe est mesuré. Le code de sortie vaut 1 si une régression
+dépasse le seuil par rapport à la référence JSON (benchmarks/baseline.json,
+versionnée ; à régénérer sur la machine de CI), ou si la référence manque
+en CI (variable d'environnement CI définie).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from agents.product_owner import ProductOwnerAgent
+from agents.developer import DeveloperAgent
+from agents.qa_engineer import QAAgent
+from agents.tech_lead import TechLeadAgent
+from orchestrator import TeamOrchestrator
+from utils.bundler import build_project_zip
+from benchmarks.replay_llm import ReplayLLM, build_responses
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+REQUEST = "Créer un client pour l'API GitHub avec pagination"
+
+
+def measure(func: Callable[[], object], repeat: int = 5, number: int = 1) -> Dict[str, float]:
+    """Chronomètre `func` et retourne médiane et minimum (secondes par appel)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+    }
+
+
+def bench_orchestrator(iterations: int, size: str) -> Dict[str, float]:
+    """Surcoût de TeamOrchestrator.run par itération, réponses rejouées"""
+    def run_once():
+        orchestrator = TeamOrchestrator(llm=ReplayLLM(size=size))
+        return orchestrator.run(REQUEST, max_iterations=iterations)
+
+    stats = measure(run_once, repeat=5)
+    return {key: value / iterations for key, value in stats.items()}
+
+
+def bench_parsers(size: str) -> Dict[str, Dict[str, float]]:
+    """Fonctions de parsing de chaque agent sur des réponses small/large"""
+    responses = build_responses(size)
+    llm = ReplayLLM(size=size)
+    po = ProductOwnerAgent(llm=llm)
+    dev = DeveloperAgent(llm=llm)
+    qa = QAAgent(llm=llm)
+    tech_lead = TechLeadAgent(llm=llm)
+    number = 50 if size == "small" else 5
+    # Mesures de quelques microsecondes : plus de répétitions pour un minimum stable
+    repeat = 20
+
+    return {
+        f"parse_po_{size}": measure(lambda: po._parse_analysis(responses["po"]), repeat, number),
+        f"parse_dev_{size}": measure(lambda: dev._parse_response(responses["dev"]), repeat, number),
+        f"parse_qa_{size}": measure(lambda: qa._parse_review(responses["qa"]), repeat, number),
+        f"parse_tl_{size}": measure(lambda: tech_lead._parse_decision(responses["tl_continue"]), repeat, number),
+    }
+
+
+def bench_execution_summary(entries: int) -> Dict[str, float]:
+    """get_execution_summary sur une trace longue"""
+    orchestrator = TeamOrchestrator(llm=ReplayLLM())
+    for i in range(entries):
+        orchestrator.execution_trace.append({
+            "step": "QA_COMPLETE",
+            "agent": "QA Engineer",
+            "iteration": i % 5 + 1,
+            "message": f" Revue terminée : {i % 7} bugs critiques",
+        })
+    return measure(orchestrator.get_execution_summary)
+
+
+def bench_zip(size: str) -> Dict[str, float]:
+    """Packaging ZIP du projet livré"""
+    result = TeamOrchestrator(llm=ReplayLLM(size=size)).run(REQUEST, max_iterations=1)
+    return measure(lambda: build_project_zip(result, REQUEST))
+
+
+def bench_peak_memory(iterations: int, size: str) -> Dict[str, float]:
+    """Pic mémoire Python (tracemalloc) d'un run complet"""
+    tracemalloc.start()
+    try:
+        TeamOrchestrator(llm=ReplayLLM(size=size)).run(REQUEST, max_iterations=iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_kb": peak / 1024}
+
+
+def run_all() -> Dict[str, Dict[str, float]]:
+    """Exécute toute la suite et retourne les mesures par benchmark"""
+    results = {
+        "orchestrator_per_iteration_small": bench_orchestrator(3, "small"),
+        "orchestrator_per_iteration_large": bench_orchestrator(3, "large"),
+        "execution_summary_10k": bench_execution_summary(10_000),
+        "zip_small": bench_zip("small"),
+        "zip_large": bench_zip("large"),
+        "peak_memory_large": bench_peak_memory(3, "large"),
+    }
+    results.update(bench_parsers("small"))
+    results.update(bench_parsers("large"))
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> Dict[str, Dict[str, float]]:
+    """
+    Compare aux mesures de référence
+
+    Returns:
+        Les métriques dont le ratio courant/référence dépasse 1 + threshold
+    """
+    regressions = {}
+    for name, metrics in results.items():
+        reference = baseline.get(name, {})
+        # Le minimum est la mesure la moins sensible à la charge de la machine
+        for metric in ("min_s", "peak_kb"):
+            if metric in metrics and reference.get(metric):
+                ratio = metrics[metric] / reference[metric]
+                if ratio > 1 + threshold:
+                    regressions[f"{name}.{metric}"] = {
+                        "baseline": reference[metric],
+                        "current": metrics[metric],
+                        "ratio": round(ratio, 3),
+                    }
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks AI Dev Team")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Fichier JSON de référence")
+    parser.add_argument("--save-baseline", action="store_true", help="Écrit les mesures comme nouvelle référence")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Régression tolérée (0.25 = +25 %%)")
+    parser.add_argument("--output", help="Écrit aussi les mesures dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    results = run_all()
+    for name, metrics in sorted(results.items()):
+        formatted = ", ".join(f"{key}={value:.6g}" for key, value in metrics.items())
+        print(f"{name:40s} {formatted}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nRéférence enregistrée : {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ Aucune référence trouvée ({args.baseline}) : utilisez --save-baseline")
+        # En CI, une référence absente ne doit pas passer pour « aucune régression »
+        return 1 if os.environ.get("CI") else 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} régression(s) au-delà de {args.threshold:.0%} :")
+        for name, info in regressions.items():
+            print(f"- {name} : {info['baseline']:.6g} → {info['current']:.6g} (x{info['ratio']})")
+        return 1
+
+    print(f"\n✅ Aucune régression au-delà de {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,144 +2,293 @@
 Orchestrateur - Coordonne tous les agents de l'équipe
 """
 
-from typing import Dict, List, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 from langchain_groq import ChatGroq
 
 from agents.product_owner import ProductOwnerAgent
 from agents.developer import DeveloperAgent
 from agents.qa_engineer import QAAgent
 from agents.tech_lead import TechLeadAgent
+from agents.reviewers import REVIEWERS, SpecialistReviewer, merge_reviews
+from utils.model_router import ModelRouter
+from utils.semantic_cache import SemanticRunCache, context_hash
+from utils.checkpoint import CheckpointStore
+from utils.stage_cache import StageCache, stage_fingerprint
+from utils.budget import BudgetExceeded, RunBudget
+from utils.convergence import ConvergenceMonitor
+from utils.code_checks import score_candidate
+from utils.stage_graph import StageGraph
+from utils.streaming import summarize as summarize_streams
+from utils.project import split_project
+from utils.event_bus import (
+    EventBus, RUN_START, RUN_END, STAGE_START, STAGE_END, TOKEN_DELTA, BUG_FOUND, DECISION, TRACE
+)
 
 
 class TeamOrchestrator:
-    def __init__(self, llm: ChatGroq, pdf_context: Optional[str] = None):
+    def __init__(
+        self,
+        llm: ChatGroq,
+        pdf_context: Optional[str] = None,
+        router: Optional[ModelRouter] = None,
+        best_of_n: int = 1,
+        semantic_cache: Optional[SemanticRunCache] = None,
+        reuse_code: bool = False,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        stage_cache: Optional[StageCache] = None,
+        convergence_monitor: Optional[ConvergenceMonitor] = None,
+        output_format: str = "markdown",
+        verbosity: str = "standard",
+        incremental_review: bool = False,
+        map_reduce_review: bool = False,
+        split_qa: bool = False,
+        static_checks: bool = False,
+        max_parallel_stages: int = 6,
+        tdd: bool = False,
+        reviewers: Optional[List] = None,
+        parallel_tot: bool = False,
+        speculative_fix: bool = False,
+        early_stop: bool = False,
+        story_parallel: bool = False,
+        event_bus: Optional[EventBus] = None,
+        execute_tests: bool = False
+    ):
 
         self.llm = llm
         self.pdf_context = pdf_context
+        self.router = router
+        self.semantic_cache = semantic_cache
+        # Run passé proche de la demande (exemple pour le PO, jamais réutilisé tel quel)
+        self.reuse_hint: Optional[Dict] = None
+        self.reuse_code = reuse_code
+        self.checkpoint_store = checkpoint_store
+        self.stage_cache = stage_cache
+        self.convergence = convergence_monitor
+        self.incremental_review = incremental_review
+        # Graphe d'étapes : revue QA scindée et vérifications statiques en parallèle du QA
+        self.split_qa = split_qa
+        self.static_checks = static_checks
+        self.max_parallel_stages = max_parallel_stages
+        # Mode TDD : tests d'acceptation écrits depuis les User Stories en parallèle du DEV_1
+        self.tdd = tdd
+        # Exécution locale des tests générés (code LLM) : classement best-of-N, TDD, étape STATIC
+        self.execute_tests = execute_tests
+        self.acceptance: Optional[Dict] = None
+        # Itération 1 : interface commune puis une implémentation par User Story, en parallèle
+        self.story_parallel = story_parallel
+        # Correction anticipée : le Developer corrige pendant que le Tech Lead délibère
+        self.speculative_fix = speculative_fix
+        self.speculation_stats: Dict = {}
+        self._speculation: Optional[Dict] = None
+        self._speculation_pool: Optional[ThreadPoolExecutor] = None
+        # Événements du run (étapes, tokens, bugs, décisions) diffusés aux abonnés
+        self.event_bus = event_bus
         
         # Initialiser tous les agents
         self.po = ProductOwnerAgent(llm=llm, pdf_context=pdf_context)
-        self.dev = DeveloperAgent(llm=llm)
+        self.dev = DeveloperAgent(llm=llm, n_candidates=best_of_n)
+        self.dev.execute_tests = execute_tests
         self.qa = QAAgent(llm=llm)
         self.tech_lead = TechLeadAgent(llm=llm)
+        self.agents = {
+            "po": self.po,
+            "dev": self.dev,
+            "qa": self.qa,
+            "tech_lead": self.tech_lead
+        }
+        # Relecteurs spécialisés (clés de REVIEWERS ou instances), en parallèle du QA
+        self.reviewers: Dict[str, SpecialistReviewer] = {}
+        for reviewer in reviewers or []:
+            if not isinstance(reviewer, SpecialistReviewer):
+                reviewer = REVIEWERS[reviewer](llm=llm)
+            self.reviewers[f"reviewer_{reviewer.FOCUS}"] = reviewer
+        self.agents.update(self.reviewers)
+        # Format de sortie des agents : markdown historique ou JSON validé (agents/schemas.py)
+        for agent in self.agents.values():
+            agent.output_format = output_format
+            agent.verbosity = verbosity
+            # Streaming : génération coupée dès que les champs requis sont complets
+            agent.early_stop = early_stop
+        self.early_stop = early_stop
+        if event_bus:
+            for agent_key, agent in self.agents.items():
+                agent.on_tokens = self._token_listener(agent_key)
+        # Gros fichiers : revue QA parallèle par unités, revue Tech Lead sur une vue condensée
+        self.qa.map_reduce = map_reduce_review
+        self.tech_lead.condense_large_code = map_reduce_review
+        # Tree of Thoughts du Tech Lead en branches courtes et parallèles
+        self.tech_lead.parallel_tot = parallel_tot
         self.execution_trace = []
+        self.stage_metrics: List[Dict] = []
         self.current_iteration = 0
+        
+        # Étapes terminées du run (clé "PO", "DEV_1", "QA_1", "TL_1"...)
+        self.run_id: Optional[str] = None
+        self.run_params: Dict = {}
+        self.completed_stages: Dict[str, Dict] = {}
+        self._restored_stages: Dict[str, Dict] = {}
+        # Protège métriques, étapes terminées et point de reprise (étapes concurrentes)
+        self._lock = threading.RLock()
+        
+        # Résultats du run en cours, pour rendre le meilleur si le budget s'épuise
+        self.budget: Optional[RunBudget] = None
+        self.po_result: Optional[Dict] = None
+        self.iteration_results: List[Dict] = []
     
     def run(
         self,
         user_request: str,
         max_iterations: int = 2,
-        auto_fix: bool = True
+        auto_fix: bool = True,
+        run_id: Optional[str] = None,
+        deadline_s: Optional[float] = None,
+        token_budget: Optional[int] = None
     ) -> Dict:
-        self.execution_trace.append({
-            "step": "START",
-            "message": " Démarrage de l'équipe AI Dev Team"
-        })
+        """
+        Exécute le workflow PO → (Dev → QA → Tech Lead) x itérations
         
+        Args:
+            user_request: Demande utilisateur
+            max_iterations: Nombre maximum d'itérations Dev/QA/Tech Lead
+            auto_fix: Enchaîner automatiquement les corrections
+            run_id: Identifiant du run (généré sinon)
+            deadline_s: Durée maximale du run en secondes
+            token_budget: Nombre maximum de tokens consommés par le run
+            
+        Returns:
+            Résultat final ; si le budget s'épuise, celui de la meilleure
+            itération terminée (score QA le plus élevé)
+        """
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.run_params = {
+            "user_request": user_request,
+            "max_iterations": max_iterations,
+            "auto_fix": auto_fix,
+            "deadline_s": deadline_s,
+            "token_budget": token_budget
+        }
+        self.budget = RunBudget(deadline_s, token_budget) if deadline_s or token_budget else None
+        for agent in self.agents.values():
+            agent.budget = self.budget
+        self.po_result = None
+        self.iteration_results = []
+        self.acceptance = None
+        self._speculation = None
+        self.speculation_stats = {
+            "launched": 0, "hits": 0, "misses": 0, "discarded": 0, "cancelled": 0,
+            "wasted_tokens": 0, "saved_s": 0.0
+        }
+        self._emit(
+            RUN_START, run_id=self.run_id, user_request=user_request,
+            max_iterations=max_iterations, resumed=bool(self._restored_stages)
+        )
         
-        self.execution_trace.append({
-            "step": "PO_START",
-            "agent": "Product Owner",
-            "message": " Analyse de la demande utilisateur..."
-        })
+        if self._restored_stages:
+            self._trace({
+                "step": "RESUME",
+                "message": f" Reprise du run {self.run_id} ({len(self._restored_stages)} étape(s) restaurée(s))"
+            })
+        else:
+            self._trace({
+                "step": "START",
+                "message": " Démarrage de l'équipe AI Dev Team"
+            })
         
-        po_result = self.po.analyze_request(user_request)
-        user_stories = po_result["raw_response"]
+        try:
+            reuse_entry = self._execute(user_request, max_iterations, auto_fix)
+        except BudgetExceeded as exc:
+            selected = self._best_iteration()
+            self._trace({
+                "step": "BUDGET_EXCEEDED",
+                "message": (
+                    f" {exc} : arrêt, meilleure itération conservée ({selected['iteration']})"
+                    if selected else f" {exc} : arrêt avant la première itération"
+                ),
+                "selected_iteration": selected.get("iteration")
+            })
+            final_result = self._build_final_result(
+                po_result=self.po_result,
+                dev_result=selected.get("dev"),
+                qa_result=selected.get("qa"),
+                tl_result=selected.get("tl")
+            )
+            status = "budget_exceeded"
+        except Exception as exc:
+            self._emit(RUN_END, run_id=self.run_id, status="error", error=str(exc))
+            raise
+        else:
+            last = self.iteration_results[-1]
+            self._remember_run(user_request, self.po_result, reuse_entry, last["dev"], last["tl"])
+            final_result = self._build_final_result(
+                po_result=self.po_result,
+                dev_result=last["dev"],
+                qa_result=last["qa"],
+                tl_result=last["tl"]
+            )
+            status = "completed"
+        finally:
+            self._discard_speculation("pas d'itération suivante")
+            if self._speculation_pool:
+                self._speculation_pool.shutdown(wait=False)
+                self._speculation_pool = None
         
-        self.execution_trace.append({
-            "step": "PO_COMPLETE",
-            "agent": "Product Owner",
-            "message": " User Stories créées",
-            "result": po_result
+        self._trace({
+            "step": "END",
+            "message": " Exécution terminée"
         })
         
-       
+        self._save_checkpoint(status=status)
+        self._emit(
+            RUN_END, run_id=self.run_id, status=status,
+            iterations=final_result["iterations"],
+            decision=final_result["validation"]["status"]
+        )
+        
+        return final_result
+    
+    def _execute(self, user_request: str, max_iterations: int, auto_fix: bool) -> Optional[Dict]:
+        """
+        Enchaîne les graphes d'étapes des itérations ; les résultats sont
+        conservés au fil de l'eau dans po_result et iteration_results
+        
+        Returns:
+            L'entrée du cache sémantique réutilisée (ou None)
+        """
+        reuse_entry = self._check_reuse(user_request)
+        # Consigne ajoutée au feedback quand la convergence impose de changer de stratégie
+        escalation_note = None
+        
         for iteration in range(1, max_iterations + 1):
             self.current_iteration = iteration
             
-            self.execution_trace.append({
-                "step": "ITERATION_START",
-                "iteration": iteration,
-                "message": f" Itération {iteration}/{max_iterations}"
-            })
-            
-            
-            self.execution_trace.append({
-                "step": "DEV_START",
-                "agent": "Developer",
-                "iteration": iteration,
-                "message": " Génération du code..."
-            })
-            
-            if iteration == 1:
-                dev_result = self.dev.generate_code(user_stories, iteration=iteration)
-            else:
-                
-                last_qa = self._get_last_qa_result()
-                feedback = self.qa.generate_feedback(last_qa)
-                dev_result = self.dev.fix_code(feedback)
-            
-            code = dev_result["code"]
-            
-            self.execution_trace.append({
-                "step": "DEV_COMPLETE",
-                "agent": "Developer",
-                "iteration": iteration,
-                "message": " Code généré",
-                "result": dev_result
-            })
-            
-            
-            self.execution_trace.append({
-                "step": "QA_START",
-                "agent": "QA Engineer",
-                "iteration": iteration,
-                "message": " Revue de code et génération de tests..."
-            })
-            
-            qa_result = self.qa.review_code(code, user_stories)
-            tests = qa_result["tests"]
-            
-            self.execution_trace.append({
-                "step": "QA_COMPLETE",
-                "agent": "QA Engineer",
-                "iteration": iteration,
-                "message": f" Revue terminée : {len(qa_result['critical_bugs'])} bugs critiques",
-                "result": qa_result
-            })
-            
-            
-            self.execution_trace.append({
-                "step": "TL_START",
-                "agent": "Tech Lead",
-                "iteration": iteration,
-                "message": " Revue finale et décision..."
-            })
-            
-            tl_result = self.tech_lead.final_review(
-                code=code,
-                tests=tests,
-                user_stories=user_stories,
-                qa_report=qa_result,
-                iteration=iteration
-            )
-            
-            decision = tl_result["decision"]
-            
-            self.execution_trace.append({
-                "step": "TL_COMPLETE",
-                "agent": "Tech Lead",
-                "iteration": iteration,
-                "message": f" Décision : {decision['status']}",
-                "result": tl_result
-            })
+            graph = self._iteration_graph(iteration, max_iterations, user_request, reuse_entry, escalation_note)
+            escalation_note = None
+            try:
+                graph.run()
+            finally:
+                self._trace({
+                    "step": "STAGE_GRAPH",
+                    "iteration": iteration,
+                    "message": f" Graphe d'étapes : {graph.describe()}",
+                    "graph": graph.summary(),
+                    "mermaid": graph.to_mermaid()
+                })
             
+            current = self.iteration_results[-1]
+            decision = current["tl"]["decision"]
+            convergence = self.convergence.observe(
+                iteration, current["dev"]["code"], current["qa"]["critical_bugs"], current["qa"].get("quality_score")
+            ) if self.convergence else None
             
             should_continue, reason = self.tech_lead.should_iterate(decision)
             
             if decision["status"] == "VALIDATED":
                 # Code validé, on arrête
-                self.execution_trace.append({
+                self._trace({
                     "step": "SUCCESS",
                     "message": f" Projet validé à l'itération {iteration}"
                 })
@@ -147,7 +296,7 @@ class TeamOrchestrator:
             
             elif not auto_fix:
                 
-                self.execution_trace.append({
+                self._trace({
                     "step": "MANUAL_REVIEW",
                     "message": "⏸ Correction manuelle nécessaire (auto_fix=False)"
                 })
@@ -155,49 +304,909 @@ class TeamOrchestrator:
             
             elif iteration >= max_iterations:
                 # Max itérations atteint
-                self.execution_trace.append({
+                self._trace({
                     "step": "MAX_ITERATIONS",
                     "message": f" Nombre maximum d'itérations atteint ({max_iterations})"
                 })
                 break
             
+            elif convergence and convergence["action"] == "stop":
+                # Plus de progrès malgré le changement de stratégie
+                self._trace({
+                    "step": "CONVERGENCE_STOP",
+                    "iteration": iteration,
+                    "message": f" Arrêt anticipé, aucune progression : {convergence['reason']}",
+                    "convergence": convergence
+                })
+                break
+            
             else:
+                if convergence and convergence["action"] == "escalate":
+                    escalation_note = self._escalate(convergence)
                 
-                self.execution_trace.append({
+                self._trace({
                     "step": "CONTINUE",
                     "message": f" Nouvelle itération nécessaire : {reason}"
                 })
         
+        return reuse_entry
+    
+    def _iteration_graph(
+        self,
+        iteration: int,
+        max_iterations: int,
+        user_request: str,
+        reuse_entry: Optional[Dict],
+        escalation_note: Optional[str]
+    ) -> StageGraph:
+        """
+        Graphe des étapes d'une itération
+        
+        Par défaut (PO →) DEV → QA → TL, strictement séquentiel. En option,
+        les vérifications statiques (STATIC) tournent à côté du QA et la
+        revue QA est scindée entre critique et tests (QA_REVIEW ∥ QA_TESTS).
+        En mode TDD, les tests d'acceptation (ACCEPT) sont écrits en parallèle
+        du DEV_1 ; le QA ne refait ensuite que la critique.
+        """
+        graph = StageGraph(f"iteration_{iteration}", max_workers=self.max_parallel_stages)
+        dev_deps = []
+        if iteration == 1:
+            graph.add("PO", lambda _: self._po_stage(user_request, reuse_entry))
+            dev_deps = ["PO"]
+        
+        dev_key, qa_key, tl_key = f"DEV_{iteration}", f"QA_{iteration}", f"TL_{iteration}"
+        graph.add(dev_key, lambda _: self._dev_stage(iteration, max_iterations, reuse_entry, escalation_note), dev_deps)
+        accept_deps = []
+        if self.tdd and iteration == 1:
+            graph.add("ACCEPT", lambda _: self._acceptance_stage(), dev_deps)
+            accept_deps = ["ACCEPT"]
         
-        final_result = self._build_final_result(
-            po_result=po_result,
-            dev_result=dev_result,
-            qa_result=qa_result,
-            tl_result=tl_result
+        if self.tdd:
+            # Tests d'acceptation écrits une fois pour toutes : seule la critique est refaite
+            graph.add(f"QA_REVIEW_{iteration}", lambda _: self._qa_part_stage(iteration, "review"), [dev_key])
+            graph.add(
+                qa_key,
+                lambda inputs: self._qa_stage(iteration, inputs[f"QA_REVIEW_{iteration}"], self.acceptance),
+                [f"QA_REVIEW_{iteration}"] + accept_deps
+            )
+        elif self.split_qa:
+            graph.add(f"QA_REVIEW_{iteration}", lambda _: self._qa_part_stage(iteration, "review"), [dev_key])
+            graph.add(f"QA_TESTS_{iteration}", lambda _: self._qa_part_stage(iteration, "tests"), [dev_key])
+            graph.add(
+                qa_key,
+                lambda inputs: self._qa_stage(
+                    iteration, inputs[f"QA_REVIEW_{iteration}"], inputs[f"QA_TESTS_{iteration}"]
+                ),
+                [f"QA_REVIEW_{iteration}", f"QA_TESTS_{iteration}"]
+            )
+        else:
+            graph.add(qa_key, lambda _: self._qa_stage(iteration), [dev_key])
+        
+        # Rapport transmis au Tech Lead : celui du QA, fusionné avec les relecteurs s'il y en a
+        report_key = qa_key
+        if self.reviewers:
+            review_keys = [f"{agent_key.upper()}_{iteration}" for agent_key in self.reviewers]
+            for agent_key, review_key in zip(self.reviewers, review_keys):
+                graph.add(
+                    review_key,
+                    lambda _, agent_key=agent_key, review_key=review_key: self._reviewer_stage(
+                        iteration, agent_key, review_key
+                    ),
+                    [dev_key]
+                )
+            graph.add(
+                f"MERGE_{iteration}",
+                lambda inputs: self._merge_reviews_stage(
+                    iteration, inputs[qa_key], [inputs[review_key] for review_key in review_keys]
+                ),
+                [qa_key] + review_keys
+            )
+            report_key = f"MERGE_{iteration}"
+        tl_deps = [report_key]
+        if self.static_checks:
+            graph.add(f"STATIC_{iteration}", lambda _: self._static_stage(iteration), [dev_key] + accept_deps)
+            tl_deps.append(f"STATIC_{iteration}")
+        graph.add(
+            tl_key,
+            lambda inputs: self._tl_stage(
+                iteration, inputs[report_key], inputs.get(f"STATIC_{iteration}")
+            ),
+            tl_deps
         )
+        return graph
+    
+    def _po_stage(self, user_request: str, reuse_entry: Optional[Dict]) -> Dict:
+        """Étape PO : User Stories (réutilisées d'un run de même demande, ou inspirées d'un run proche)"""
+        if reuse_entry:
+            po_result = self._run_stage("PO", "po", 0, self._reuse_po_result, reuse_entry)
+            
+            self._trace({
+                "step": "PO_REUSED",
+                "agent": "Product Owner",
+                "message": " User Stories réutilisées d'un run précédent",
+                "result": po_result
+            })
+        else:
+            self._trace({
+                "step": "PO_START",
+                "agent": "Product Owner",
+                "message": " Analyse de la demande utilisateur..."
+            })
+            
+            hint = self.reuse_hint
+            similar_run = {
+                "request": hint["request"], "user_stories": hint["po_result"]["raw_response"]
+            } if hint else None
+            po_result = self._run_stage(
+                "PO", "po", 0, self.po.analyze_request, user_request, similar_run,
+                fingerprint=self._stage_fingerprint(
+                    "po", 0, user_request, context_hash(self.pdf_context), hint and hint["id"]
+                )
+            )
+            
+            self._trace({
+                "step": "PO_COMPLETE",
+                "agent": "Product Owner",
+                "message": " User Stories créées",
+                "result": po_result,
+                "duration_s": self._stage_duration("PO")
+            })
         
-        self.execution_trace.append({
-            "step": "END",
-            "message": " Exécution terminée"
+        self.po_result = po_result
+        self.dev.user_stories = po_result["raw_response"]
+        return po_result
+    
+    def _acceptance_stage(self) -> Dict:
+        """Étape ACCEPT (mode TDD) : tests d'acceptation écrits depuis les User Stories"""
+        user_stories = self.po_result["raw_response"]
+        
+        self._trace({
+            "step": "ACCEPT_START",
+            "agent": "QA Engineer",
+            "message": " Écriture des tests d'acceptation (en parallèle du développement)..."
         })
         
-        return final_result
+        self.acceptance = self._run_stage(
+            "ACCEPT", "qa", 1, self.qa.write_acceptance_tests, user_stories,
+            fingerprint=self._stage_fingerprint("qa", 1, "acceptance", user_stories)
+        )
+        
+        self._trace({
+            "step": "ACCEPT_COMPLETE",
+            "agent": "QA Engineer",
+            "message": " Tests d'acceptation prêts",
+            "result": self.acceptance,
+            "duration_s": self._stage_duration("ACCEPT")
+        })
+        return self.acceptance
     
-    def _get_last_qa_result(self) -> Dict:
-        """Récupère le dernier résultat du QA"""
-        for entry in reversed(self.execution_trace):
-            if entry.get("step") == "QA_COMPLETE":
-                return entry["result"]
-        return {}
+    def _dev_stage(
+        self,
+        iteration: int,
+        max_iterations: int,
+        reuse_entry: Optional[Dict],
+        escalation_note: Optional[str]
+    ) -> Dict:
+        """Étape Developer : génération (itération 1) ou correction du code"""
+        user_stories = self.po_result["raw_response"]
+        key = f"DEV_{iteration}"
+        
+        self._trace({
+            "step": "ITERATION_START",
+            "iteration": iteration,
+            "message": f" Itération {iteration}/{max_iterations}"
+        })
+        
+        self._trace({
+            "step": "DEV_START",
+            "agent": "Developer",
+            "iteration": iteration,
+            "message": " Génération du code..."
+        })
+        
+        stories = self._parallel_stories(user_stories) if iteration == 1 else []
+        if iteration == 1 and reuse_entry and self.reuse_code and reuse_entry.get("validated_code"):
+            dev_result = self._run_stage(key, "dev", 1, self._reuse_dev_result, reuse_entry)
+        elif len(stories) > 1:
+            dev_result = self._run_stage(
+                key, "dev", iteration, self.dev.generate_code_by_story, user_stories, stories, iteration=iteration,
+                fingerprint=self._stage_fingerprint("dev", 1, user_stories, "stories", self.execute_tests)
+            )
+            self._trace({
+                "step": "STORY_MERGE",
+                "iteration": iteration,
+                "message": (
+                    f" {len(dev_result['stories'])} User Stories développées en parallèle, "
+                    f"fusionnées en {len(dev_result['files'])} fichiers"
+                ),
+                "stories": dev_result["stories"],
+                "merge": dev_result["merge"]
+            })
+        elif iteration == 1:
+            dev_result = self._run_stage(
+                key, "dev", iteration, self.dev.generate_code, user_stories, iteration=iteration,
+                fingerprint=self._stage_fingerprint("dev", 1, user_stories, self.dev.n_candidates, self.execute_tests)
+            )
+        else:
+            
+            last_qa = self._get_last_qa_result()
+            feedback = self.qa.generate_feedback(last_qa)
+            if escalation_note:
+                feedback += f"\n\n{escalation_note}"
+            fingerprint = self._stage_fingerprint(
+                "dev", iteration,
+                self.dev.build_fix_context(feedback, last_qa.get("critical_bugs")),
+                last_qa.get("tests"),
+                self.dev.n_candidates,
+                self.execute_tests
+            )
+            dev_result = self._run_stage(
+                key, "dev", iteration, self._fix_code, key, fingerprint, feedback,
+                last_qa.get("tests"), last_qa.get("critical_bugs"),
+                fingerprint=fingerprint
+            )
+            # Étape restaurée ou réutilisée depuis le cache : la correction anticipée ne sert pas
+            self._discard_speculation(f"étape {key} réutilisée", miss=True)
+        
+        self.iteration_results.append({"iteration": iteration, "dev": dev_result})
+        
+        self._trace({
+            "step": "DEV_COMPLETE",
+            "agent": "Developer",
+            "iteration": iteration,
+            "message": " Code généré" if not dev_result.get("reused") else " Code VALIDÉ réutilisé",
+            "result": dev_result,
+            "duration_s": self._stage_duration(key)
+        })
+        return dev_result
     
-    def _build_final_result(
+    def _parallel_stories(self, user_stories: str) -> List[Dict]:
+        """User Stories à développer séparément (aucune hors mode story_parallel)"""
+        return ProductOwnerAgent.split_user_stories(user_stories) if self.story_parallel else []
+    
+    def _qa_part_stage(self, iteration: int, part: str) -> Dict:
+        """Moitié d'une revue QA scindée : critique (« review ») ou tests (« tests »)"""
+        code = self.iteration_results[-1]["dev"]["code"]
+        user_stories = self.po_result["raw_response"]
+        method = self.qa.critique_code if part == "review" else self.qa.write_tests
+        return self._run_stage(
+            f"QA_{part.upper()}_{iteration}", "qa", iteration, method, code, user_stories,
+            fingerprint=self._stage_fingerprint("qa", iteration, part, code, user_stories)
+        )
+    
+    def _qa_stage(self, iteration: int, critique: Optional[Dict] = None, tests: Optional[Dict] = None) -> Dict:
+        """
+        Étape QA : revue complète, incrémentale, map-reduce, ou assemblage
+        des deux moitiés d'une revue scindée
+        """
+        code = self.iteration_results[-1]["dev"]["code"]
+        user_stories = self.po_result["raw_response"]
+        key = f"QA_{iteration}"
+        
+        if critique is None:
+            self._trace({
+                "step": "QA_START",
+                "agent": "QA Engineer",
+                "iteration": iteration,
+                "message": " Revue de code et génération de tests..."
+            })
+        
+        previous = self.iteration_results[-2] if len(self.iteration_results) > 1 else None
+        if critique is not None:
+            qa_result = self._run_stage(key, "qa", iteration, self.qa.merge_split_review, critique, tests)
+        elif self.incremental_review and previous and previous.get("qa"):
+            # Revue limitée aux unités modifiées depuis l'itération précédente
+            previous_qa = previous["qa"]
+            qa_result = self._run_stage(
+                key, "qa", iteration, self.qa.review_changes,
+                code, user_stories, previous["dev"]["code"], previous_qa,
+                fingerprint=self._stage_fingerprint(
+                    "qa", iteration, code, user_stories, previous["dev"]["code"],
+                    previous_qa["critical_bugs"], previous_qa["minor_bugs"],
+                    previous_qa["tests"], previous_qa.get("quality_score")
+                )
+            )
+        else:
+            qa_result = self._run_stage(
+                key, "qa", iteration, self.qa.review_code, code, user_stories,
+                fingerprint=self._stage_fingerprint("qa", iteration, code, user_stories, self.qa.map_reduce)
+            )
+        self.iteration_results[-1]["qa"] = qa_result
+        self._publish_bugs(iteration, "qa", qa_result["critical_bugs"], qa_result["minor_bugs"])
+        
+        self._trace({
+            "step": "QA_COMPLETE",
+            "agent": "QA Engineer",
+            "iteration": iteration,
+            "message": f" Revue terminée : {len(qa_result['critical_bugs'])} bugs critiques",
+            "result": qa_result,
+            "duration_s": self._stage_duration(key)
+        })
+        return qa_result
+    
+    def _reviewer_stage(self, iteration: int, agent_key: str, key: str) -> Dict:
+        """Étape d'un relecteur spécialisé, en parallèle du QA"""
+        code = self.iteration_results[-1]["dev"]["code"]
+        user_stories = self.po_result["raw_response"]
+        reviewer = self.agents[agent_key]
+        return self._run_stage(
+            key, agent_key, iteration, reviewer.review, code, user_stories,
+            fingerprint=self._stage_fingerprint(agent_key, iteration, code, user_stories)
+        )
+    
+    def _merge_reviews_stage(self, iteration: int, qa_result: Dict, reviews: List[Dict]) -> Dict:
+        """Étape MERGE : constats des relecteurs ajoutés (dédupliqués) au rapport QA"""
+        merged = merge_reviews(qa_result, reviews)
+        self.iteration_results[-1]["qa"] = merged
+        
+        added = len(merged["critical_bugs"]) + len(merged["minor_bugs"]) - \
+            len(qa_result["critical_bugs"]) - len(qa_result["minor_bugs"])
+        self._publish_bugs(
+            iteration, "reviewers",
+            [bug for bug in merged["critical_bugs"] if bug not in qa_result["critical_bugs"]],
+            [bug for bug in merged["minor_bugs"] if bug not in qa_result["minor_bugs"]]
+        )
+        self._trace({
+            "step": "REVIEWS_MERGED",
+            "agent": "QA Engineer",
+            "iteration": iteration,
+            "message": (
+                f" {len(reviews)} relecteur(s) spécialisé(s) : {added} constat(s) ajouté(s), "
+                f"{len(merged['critical_bugs'])} bugs critiques au total"
+            ),
+            "result": merged
+        })
+        return merged
+    
+    def _static_stage(self, iteration: int) -> Dict:
+        """
+        Étape STATIC : compilation et contrôles AST locaux, sans appel LLM
+        (et exécution des tests d'acceptation en mode TDD si execute_tests)
+        """
+        acceptance_tests = self.acceptance["tests"] if self.acceptance else None
+        report = score_candidate(
+            self.iteration_results[-1]["dev"]["code"], acceptance_tests, execute=self.execute_tests
+        )
+        self.iteration_results[-1]["static"] = report
+        
+        self._trace({
+            "step": "STATIC_COMPLETE",
+            "iteration": iteration,
+            "message": (
+                f" Vérifications statiques : {len(report['issues'])} problème(s)"
+                if report["compiles"] else f" Vérifications statiques : le code ne compile pas ({report['compile_error']})"
+            ),
+            "result": report
+        })
+        return report
+    
+    def _tl_stage(self, iteration: int, qa_result: Dict, static_report: Optional[Dict]) -> Dict:
+        """Étape Tech Lead : décision finale de l'itération"""
+        code = self.iteration_results[-1]["dev"]["code"]
+        user_stories = self.po_result["raw_response"]
+        tests = qa_result["tests"]
+        key = f"TL_{iteration}"
+        
+        self._trace({
+            "step": "TL_START",
+            "agent": "Tech Lead",
+            "iteration": iteration,
+            "message": " Revue finale et décision..."
+        })
+        self._launch_speculation(iteration, qa_result)
+        
+        tl_result = self._run_stage(
+            key, "tech_lead", iteration, self.tech_lead.final_review,
+            code=code,
+            tests=tests,
+            user_stories=user_stories,
+            qa_report=qa_result,
+            iteration=iteration,
+            static_report=static_report,
+            fingerprint=self._stage_fingerprint(
+                "tech_lead", iteration, code, tests, user_stories,
+                self.tech_lead.condense_large_code, self.tech_lead.parallel_tot,
+                len(qa_result["critical_bugs"]), len(qa_result["minor_bugs"]),
+                qa_result.get("quality_score"), qa_result.get("analysis"),
+                static_report and (static_report["issues"], static_report["tests"])
+            )
+        )
+        self.iteration_results[-1]["tl"] = tl_result
+        self._emit(
+            DECISION, iteration=iteration,
+            status=tl_result["decision"]["status"],
+            chosen_option=tl_result["decision"].get("chosen_option"),
+            justification=tl_result["decision"].get("justification")
+        )
+        
+        self._trace({
+            "step": "TL_COMPLETE",
+            "agent": "Tech Lead",
+            "iteration": iteration,
+            "message": f" Décision : {tl_result['decision']['status']}",
+            "result": tl_result,
+            "duration_s": self._stage_duration(key)
+        })
+        return tl_result
+    
+    def _launch_speculation(self, iteration: int, qa_result: Dict):
+        """
+        Lance la correction de l'itération suivante pendant la revue du Tech
+        Lead : avec des bugs critiques, sa décision est presque toujours
+        NEEDS_CORRECTION. La correction n'est enregistrée que si l'étape DEV
+        suivante a exactement les mêmes entrées (même empreinte).
+        Sans objet à la reprise d'un run si la revue est restaurée (décision
+        immédiate) ou si la correction suivante l'est.
+        """
+        next_key = f"DEV_{iteration + 1}"
+        if (
+            not self.speculative_fix
+            or not qa_result["critical_bugs"]
+            or not self.run_params.get("auto_fix")
+            or iteration >= self.run_params.get("max_iterations", 0)
+            or f"TL_{iteration}" in self._restored_stages
+            or next_key in self._restored_stages
+        ):
+            return
+        
+        feedback = self.qa.generate_feedback(qa_result)
+        tests, bugs = qa_result.get("tests"), qa_result["critical_bugs"]
+        self._apply_route("dev", iteration + 1)
+        speculation = {
+            "key": next_key,
+            "fingerprint": self._stage_fingerprint(
+                "dev", iteration + 1, self.dev.build_fix_context(feedback, bugs), tests,
+                self.dev.n_candidates, self.execute_tests
+            ),
+            "started": time.perf_counter(),
+            "finished": None
+        }
+        if self._speculation_pool is None:
+            self._speculation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        future = self._speculation_pool.submit(self.dev.prepare_fix, feedback, tests, bugs)
+        future.add_done_callback(lambda _: speculation.update(finished=time.perf_counter()))
+        speculation["future"] = future
+        
+        with self._lock:
+            self._speculation = speculation
+            self.speculation_stats["launched"] += 1
+        self._trace({
+            "step": "SPECULATION_START",
+            "iteration": iteration,
+            "message": f" Correction {next_key} lancée par anticipation pendant la revue du Tech Lead"
+        })
+    
+    def _fix_code(self, key: str, fingerprint: str, feedback: str, tests: Optional[str], bugs: Optional[List[str]]) -> Dict:
+        """Correction du code : enregistre la correction anticipée si ses entrées sont celles de l'étape"""
+        with self._lock:
+            speculation = self._speculation
+            hit = speculation is not None and speculation["key"] == key and speculation["fingerprint"] == fingerprint
+            if hit:
+                self._speculation = None
+        if not hit:
+            self._discard_speculation("entrées de la correction modifiées", miss=True)
+            return self.dev.fix_code(feedback, reference_tests=tests, bugs=bugs)
+        
+        # Temps de correction déjà écoulé pendant la revue du Tech Lead
+        saved_s = round((speculation["finished"] or time.perf_counter()) - speculation["started"], 3)
+        proposal = speculation["future"].result()
+        with self._lock:
+            self.speculation_stats["hits"] += 1
+            self.speculation_stats["saved_s"] = round(self.speculation_stats["saved_s"] + saved_s, 3)
+        self._trace({
+            "step": "SPECULATION_HIT",
+            "message": f" Correction anticipée {key} retenue ({saved_s} s déjà écoulées)"
+        })
+        return self.dev.commit_fix(proposal)
+    
+    def _discard_speculation(self, reason: str, miss: bool = False):
+        """Abandonne la correction anticipée en cours (annulée si elle n'a pas démarré)"""
+        with self._lock:
+            speculation, self._speculation = self._speculation, None
+            if speculation is None:
+                return
+            if miss:
+                self.speculation_stats["misses"] += 1
+        
+        future: Future = speculation["future"]
+        if future.cancel():
+            outcome = "annulée avant son démarrage"
+            with self._lock:
+                self.speculation_stats["cancelled"] += 1
+        else:
+            outcome = "abandonnée"
+            with self._lock:
+                self.speculation_stats["discarded"] += 1
+            # Tokens comptés quand l'appel se termine (immédiatement s'il est déjà fini)
+            future.add_done_callback(self._count_wasted)
+        self._trace({
+            "step": "SPECULATION_DISCARDED",
+            "message": f" Correction anticipée {speculation['key']} {outcome} : {reason}"
+        })
+    
+    def _count_wasted(self, future: Future):
+        """Ajoute aux tokens gaspillés ceux d'une correction anticipée abandonnée"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self.speculation_stats["wasted_tokens"] += future.result()["tokens"]
+    
+    def _escalate(self, convergence: Dict) -> str:
+        """
+        Change de stratégie quand les corrections stagnent : le Developer
+        génère plusieurs candidats et reçoit une consigne explicite
+        
+        Returns:
+            Consigne à ajouter au prochain feedback
+        """
+        self.dev.n_candidates = max(self.dev.n_candidates, 3)
+        self._trace({
+            "step": "CONVERGENCE_ESCALATE",
+            "iteration": convergence["iteration"],
+            "message": (
+                f" Stagnation détectée ({convergence['reason']}) : "
+                f"changement de stratégie, {self.dev.n_candidates} candidats"
+            ),
+            "convergence": convergence
+        })
+        
+        note = (
+            "⚠️ STAGNATION : la dernière correction n'a pas résolu les problèmes signalés. "
+            "Ne retouche pas le même code : change d'approche pour les points suivants."
+        )
+        if convergence["repeated_bugs"]:
+            note += "\n" + "\n".join(f"- {bug}" for bug in convergence["repeated_bugs"])
+        return note
+    
+    def _best_iteration(self) -> Dict:
+        """
+        Itération au meilleur score QA ; à score égal, la plus revue
+        (QA et Tech Lead terminés) puis la plus récente
+        """
+        candidates = [it for it in self.iteration_results if it.get("dev")]
+        if not candidates:
+            return {}
+        
+        def score(it: Dict):
+            quality = (it.get("qa") or {}).get("quality_score")
+            return (quality if quality is not None else -1, "tl" in it, "qa" in it, it["iteration"])
+        
+        return max(candidates, key=score)
+    
+    def resume(self, run_id: str) -> Dict:
+        """
+        Reprend un run interrompu depuis sa dernière étape terminée
+        
+        Les étapes déjà terminées ne sont pas recalculées : leurs résultats
+        sont relus depuis le point de reprise et la trace est reconstruite.
+        """
+        if not self.checkpoint_store:
+            raise ValueError("Aucun CheckpointStore configuré pour reprendre un run")
+        
+        state = self.checkpoint_store.load(run_id)
+        if state is None:
+            raise ValueError(f"Aucun point de reprise pour le run {run_id}")
+        
+        self._restored_stages = dict(state["stages"])
+        for agent_key, agent_state in state["agents"].items():
+            self.agents[agent_key].load_state(agent_state)
+        
+        return self.run(run_id=run_id, **state["params"])
+    
+    def _run_stage(
         self,
+        key: str,
+        agent_key: str,
+        iteration: int,
+        method: Callable,
+        /,
+        *args,
+        fingerprint: Optional[str] = None,
+        **kwargs
+    ) -> Dict:
+        """
+        Exécute une étape (ou la restaure depuis le point de reprise, ou la
+        réutilise depuis le cache d'étapes si ses entrées sont inchangées)
+        puis sauvegarde le point de reprise
+        """
+        with self._lock:
+            stage = self._restored_stages.pop(key, None)
+            if stage:
+                self.stage_metrics.append({**stage["metric"], "restored": True})
+                self.completed_stages[key] = stage
+        if stage:
+            self._emit(STAGE_END, stage=key, agent=agent_key, iteration=iteration, source="restored", duration_s=0.0)
+            return stage["result"]
+        
+        self._emit(STAGE_START, stage=key, agent=agent_key, iteration=iteration)
+        cached = self.stage_cache.get(fingerprint) if self.stage_cache and fingerprint else None
+        if cached:
+            result = self.agents[agent_key].replay_result(cached["result"])
+            metric = {
+                "agent": agent_key,
+                "iteration": iteration,
+                "model": cached["metric"]["model"],
+                "duration_s": 0.0,
+                "cached": True,
+                "saved_s": cached["metric"]["duration_s"]
+            }
+            with self._lock:
+                self.stage_metrics.append(metric)
+            self._trace({
+                "step": "STAGE_CACHED",
+                "iteration": iteration,
+                "message": f" Étape {key} inchangée : résultat réutilisé ({cached['metric']['duration_s']} s économisées)",
+                "fingerprint": fingerprint[:12]
+            })
+        else:
+            result, metric = self._call_agent(agent_key, iteration, method, *args, **kwargs)
+            if self.stage_cache and fingerprint:
+                self.stage_cache.put(fingerprint, {"result": result, "metric": metric})
+        
+        with self._lock:
+            self.completed_stages[key] = {"result": result, "metric": metric}
+            self._save_checkpoint()
+        self._emit(
+            STAGE_END, stage=key, agent=agent_key, iteration=iteration,
+            source="cached" if cached else "executed", duration_s=metric["duration_s"]
+        )
+        return result
+    
+    def _emit(self, event_type: str, **data):
+        """Publie un événement sur le bus du run (sans effet sans bus)"""
+        if self.event_bus:
+            self.event_bus.publish(event_type, **data)
+    
+    def _trace(self, entry: Dict):
+        """Ajoute une entrée à la trace d'exécution et la diffuse aux abonnés"""
+        self.execution_trace.append(entry)
+        self._emit(TRACE, **entry)
+    
+    def _token_listener(self, agent_key: str) -> Callable[[Dict], None]:
+        """Relaie sur le bus les tokens consommés par un agent"""
+        def listener(usage: Dict):
+            self._emit(TOKEN_DELTA, agent=agent_key, iteration=self.current_iteration, **usage)
+        return listener
+    
+    def _publish_bugs(self, iteration: int, source: str, critical: List[str], minor: List[str]):
+        """Un événement BUG_FOUND par bug signalé"""
+        for severity, bugs in (("critical", critical), ("minor", minor)):
+            for bug in bugs:
+                self._emit(BUG_FOUND, iteration=iteration, source=source, severity=severity, bug=bug)
+    
+    def _stage_duration(self, key: str) -> float:
+        """Durée mesurée d'une étape terminée"""
+        return self.completed_stages[key]["metric"]["duration_s"]
+    
+    def _stage_fingerprint(self, agent_key: str, iteration: int, *inputs) -> str:
+        """
+        Empreinte des entrées d'une étape
+        
+        Inclut la version du prompt système (avec sa variante) et la route
+        (modèle, max_tokens) : changer l'un d'eux invalide l'étape.
+        """
+        agent = self.agents[agent_key]
+        route = self.router.route(self._route_key(agent_key), max(iteration, 1)) if self.router else {}
+        prompt = agent._build_system_prompt(route.get("prompt_variant"))
+        return stage_fingerprint(
+            agent_key,
+            route.get("model") or getattr(agent.llm, "model_name", None),
+            route.get("max_tokens"),
+            stage_fingerprint(prompt),
+            *inputs
+        )
+    
+    def _save_checkpoint(self, status: str = "running"):
+        """Écrit l'état du run : étapes terminées et état interne des agents"""
+        if not self.checkpoint_store:
+            return
+        
+        self.checkpoint_store.save(self.run_id, {
+            "version": 1,
+            "run_id": self.run_id,
+            "status": status,
+            "params": self.run_params,
+            # Les étapes restaurées non encore rejouées restent acquises
+            "stages": {**self.completed_stages, **self._restored_stages},
+            "agents": {key: agent.export_state() for key, agent in self.agents.items()}
+        })
+    
+    def _check_reuse(self, user_request: str) -> Optional[Dict]:
+        """
+        Cherche un run passé de même demande (réutilisé) ou, à défaut, un
+        run proche (self.reuse_hint, simple exemple pour le PO) et trace la décision
+        """
+        self.reuse_hint = None
+        if not self.semantic_cache:
+            return None
+        
+        fallback_reason = getattr(self.semantic_cache.embedder, "fallback_reason", None)
+        if fallback_reason:
+            self._trace({
+                "step": "EMBEDDER_FALLBACK",
+                "message": f" Modèle d'embedding indisponible ({fallback_reason[:120]}) : similarité approchée par hachage",
+                "reason": fallback_reason
+            })
+        
+        entry = self.semantic_cache.exact(user_request, self.pdf_context)
+        if entry:
+            self._trace({
+                "step": "REUSE_CHECK",
+                "message": " Même demande qu'un run passé : réutilisation",
+                "similarity": 1.0,
+                "reused": True,
+                "reused_run": entry["id"]
+            })
+            return entry
+        
+        hint, score = self.semantic_cache.lookup(user_request, self.pdf_context)
+        self.reuse_hint = hint
+        self._trace({
+            "step": "REUSE_CHECK",
+            "message": (
+                f" Demande proche trouvée (similarité {score:.2f}) : ses User Stories servent d'exemple au PO"
+                if hint else
+                f" Pas de run similaire (meilleure similarité {score:.2f} < {self.semantic_cache.threshold:.2f})"
+            ),
+            "similarity": round(score, 4),
+            "reused": False,
+            "hint_run": hint["id"] if hint else None
+        })
+        return None
+    
+    def _reuse_po_result(self, entry: Dict) -> Dict:
+        """Résultat PO reconstruit depuis l'index (aucun appel LLM)"""
+        self.po.add_thought(f"♻️ User Stories réutilisées du run {entry['id']} : « {entry['request'][:80]} »")
+        return {
+            "raw_response": entry["po_result"]["raw_response"],
+            "analysis": entry["po_result"]["analysis"],
+            "thoughts": self.po.thoughts.copy(),
+            "reused": True
+        }
+    
+    def _reuse_dev_result(self, entry: Dict) -> Dict:
+        """Amorce le Developer avec le code VALIDÉ d'un run précédent"""
+        code = entry["validated_code"]
+        self.dev.add_thought(f"♻️ Code VALIDÉ réutilisé du run {entry['id']}")
+        self.dev.code_iterations.append({
+            "iteration": 1,
+            "reasoning": "Code réutilisé d'un run précédent validé",
+            "code": code,
+            "raw_response": ""
+        })
+        return {
+            "code": code,
+            "reasoning": "Code réutilisé d'un run précédent validé",
+            "iteration": 1,
+            "thoughts": self.dev.thoughts.copy(),
+            "raw_response": "",
+            "candidates": [],
+            "reused": True
+        }
+    
+    def _remember_run(
+        self,
+        user_request: str,
         po_result: Dict,
+        reuse_entry: Optional[Dict],
         dev_result: Dict,
-        qa_result: Dict,
         tl_result: Dict
+    ):
+        """Indexe le run pour les demandes futures (code seulement s'il est VALIDÉ)"""
+        if not self.semantic_cache:
+            return
+        
+        validated_code = dev_result["code"] if tl_result["decision"]["status"] == "VALIDATED" else None
+        if reuse_entry:
+            if validated_code:
+                self.semantic_cache.add(user_request, po_result, self.pdf_context, validated_code, reuse_entry["id"])
+        else:
+            self.semantic_cache.add(user_request, po_result, self.pdf_context, validated_code)
+    
+    def _route_key(self, agent_key: str) -> str:
+        """Route du profil pour un agent (les relecteurs partagent la route « reviewer »)"""
+        return "reviewer" if agent_key in self.reviewers else agent_key
+    
+    def _apply_route(self, agent_key: str, iteration: int) -> Optional[str]:
+        """Applique à l'agent le LLM et la variante de prompt routés ; retourne le modèle"""
+        agent = self.agents[agent_key]
+        if not self.router:
+            return getattr(agent.llm, "model_name", None)
+        route = self.router.route(self._route_key(agent_key), max(iteration, 1))
+        agent.llm = self.router.llm_for(self._route_key(agent_key), max(iteration, 1))
+        agent.prompt_variant = route["prompt_variant"]
+        return route["model"]
+    
+    def _call_agent(self, agent_key: str, iteration: int, method: Callable, /, *args, **kwargs) -> Tuple[Dict, Dict]:
+        """
+        Exécute une étape d'un agent avec le LLM routé et mesure sa durée
+        
+        La mesure est ajoutée à stage_metrics (agent, itération, modèle, durée)
+        et retournée avec le résultat.
+        """
+        model = self._apply_route(agent_key, iteration)
+        
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        
+        metric = {
+            "agent": agent_key,
+            "iteration": iteration,
+            "model": model,
+            "duration_s": round(time.perf_counter() - start, 3)
+        }
+        with self._lock:
+            self.stage_metrics.append(metric)
+        return result, metric
+    
+    def get_metrics(self) -> Dict:
+        """Latences agrégées par agent pour le profil de routage courant"""
+        per_agent = {}
+        for metric in self.stage_metrics:
+            stats = per_agent.setdefault(metric["agent"], {"calls": 0, "total_s": 0.0, "models": []})
+            stats["calls"] += 1
+            stats["total_s"] = round(stats["total_s"] + metric["duration_s"], 3)
+            if metric["model"] and metric["model"] not in stats["models"]:
+                stats["models"].append(metric["model"])
+        for stats in per_agent.values():
+            stats["mean_s"] = round(stats["total_s"] / stats["calls"], 3)
+        
+        return {
+            "profile": self.router.profile if self.router else None,
+            "hedging": self.router.hedging_stats() if self.router else None,
+            "total_s": round(sum(m["duration_s"] for m in self.stage_metrics), 3),
+            "budget": self.budget.summary() if self.budget else None,
+            "convergence": self.convergence.history.copy() if self.convergence else None,
+            "cached_stages": sum(1 for m in self.stage_metrics if m.get("cached")),
+            "cached_saved_s": round(sum(m.get("saved_s", 0.0) for m in self.stage_metrics), 3),
+            "speculation": self._speculation_summary(),
+            "early_stop": summarize_streams(
+                call for agent in self.agents.values() for call in agent.llm_calls
+            ) if self.early_stop else None,
+            # Événements livrés, perdus (abonné trop lent) et en erreur par abonné
+            "events": self.event_bus.stats() if self.event_bus else None,
+            "per_agent": per_agent,
+            "stages": self.stage_metrics.copy()
+        }
+    
+    def _speculation_summary(self) -> Optional[Dict]:
+        """Bilan des corrections anticipées : taux de réussite, tokens gaspillés, temps gagné"""
+        if not self.speculative_fix:
+            return None
+        with self._lock:
+            stats = dict(self.speculation_stats)
+        stats["hit_rate"] = round(stats["hits"] / stats["launched"], 2) if stats.get("launched") else None
+        return stats
+    
+    def _get_last_qa_result(self) -> Dict:
+        """Récupère le dernier résultat du QA (fusionné avec les relecteurs)"""
+        for entry in reversed(self.iteration_results):
+            if entry.get("qa"):
+                return entry["qa"]
+        return {}
+    
+    def _build_final_result(
+        self,
+        po_result: Optional[Dict],
+        dev_result: Optional[Dict],
+        qa_result: Optional[Dict],
+        tl_result: Optional[Dict]
     ) -> Dict:
         
+        # Étapes manquantes (budget épuisé) : valeurs neutres pour un résultat complet
+        po_result = po_result or {"raw_response": "", "analysis": {}, "thoughts": []}
+        dev_result = dev_result or {"code": "", "reasoning": "", "thoughts": []}
+        qa_result = qa_result or {
+            "tests": "", "critical_bugs": [], "minor_bugs": [], "quality_score": None, "thoughts": []
+        }
+        tl_result = tl_result or {
+            "decision": {
+                "status": "UNKNOWN",
+                "justification": "Budget du run épuisé avant la revue du Tech Lead",
+                "actions": []
+            },
+            "thoughts": []
+        }
         
         return {
             "success": tl_result["decision"]["status"] == "VALIDATED",
@@ -209,8 +1218,11 @@ class TeamOrchestrator:
             },
             "code": {
                 "final_code": dev_result["code"],
+                # Projet multi-fichiers (développement par User Story), None pour un module unique
+                "files": split_project(dev_result["code"]),
                 "reasoning": dev_result["reasoning"],
                 "iterations": len(self.dev.code_iterations),
+                "candidates": dev_result.get("candidates", []),
                 "thoughts": dev_result["thoughts"]
             },
             "tests": {
@@ -229,6 +1241,7 @@ class TeamOrchestrator:
                 "thoughts": tl_result["thoughts"]
             },
             "execution_trace": self.execution_trace,
+            "metrics": self.get_metrics(),
             "agents": {
                 "po": self.po.get_trace(),
                 "dev": self.dev.get_trace(),
@@ -240,25 +1253,22 @@ class TeamOrchestrator:
     def get_execution_summary(self) -> str:
         
         lines = ["# RÉSUMÉ DE L'EXÉCUTION", ""]
+        lines += [self.summary_line(entry) for entry in self.execution_trace]
+        return "\n".join(lines)
+    
+    @staticmethod
+    def summary_line(entry: Dict) -> str:
+        """Ligne du résumé d'exécution pour une entrée de la trace"""
+        agent = entry.get("agent", "")
+        iteration = entry.get("iteration", "")
+        message = entry.get("message", "")
         
-        for entry in self.execution_trace:
-            step = entry.get("step", "")
-            agent = entry.get("agent", "")
-            iteration = entry.get("iteration", "")
-            message = entry.get("message", "")
-            
-            if agent:
-                line = f"**[{agent}]** "
-            else:
-                line = ""
-            
-            if iteration:
-                line += f"(Itération {iteration}) "
-            
-            line += message
-            lines.append(line)
+        if agent:
+            line = f"**[{agent}]** "
+        else:
+            line = ""
         
-        return "\n".join(lines)
-
-
-
+        if iteration:
+            line += f"(Itération {iteration}) "
+        
+        return line + message
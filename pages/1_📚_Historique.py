@@ -0,0 +1,147 @@
+import streamlit as st
+from datetime import datetime
+
+from utils.run_store import RunStore
+from utils.bundler import bundle_project
+from utils.rendering import render_bugs, section_selector
+
+# Configuration de la page
+st.set_page_config(
+    page_title="AI_Dev Team - Historique",
+    page_icon="📚",
+    layout="wide"
+)
+
+st.title("📚 Historique des runs")
+st.caption("Relecture des runs passés depuis la base locale, sans aucun appel LLM")
+
+store = RunStore()
+
+# Filtres
+col1, col2, col3 = st.columns([1, 1, 1])
+with col1:
+    status_filter = st.selectbox(
+        "Statut",
+        ["Tous", "VALIDATED", "NEEDS_CORRECTION", "REJECTED", "UNKNOWN"]
+    )
+with col2:
+    since = st.date_input("Depuis le", value=None)
+with col3:
+    page_size = st.selectbox("Runs par page", [10, 25, 50], index=1)
+
+status = None if status_filter == "Tous" else status_filter
+since_filter = since.strftime("%Y-%m-%d") if since else None
+total = store.count_runs(status, since_filter)
+
+if total == 0:
+    st.info("Aucun run enregistré pour ces filtres. Lancez l'équipe depuis la page principale.")
+    st.stop()
+
+page_count = max(1, (total + page_size - 1) // page_size)
+page = st.number_input(f"Page (sur {page_count})", min_value=1, max_value=page_count, value=1)
+
+runs = store.list_runs(
+    status=status,
+    since=since_filter,
+    limit=page_size,
+    offset=(page - 1) * page_size
+)
+
+st.dataframe(
+    [
+        {
+            "ID": run["id"],
+            "Date": run["created_at"],
+            "Demande": run["request"][:80],
+            "Statut": run["status"],
+            "Itérations": run["iterations"],
+            "Score QA": run["quality_score"],
+            "Durée (s)": run["duration_s"],
+            "Profil": run["profile"]
+        }
+        for run in runs
+    ],
+    use_container_width=True,
+    hide_index=True
+)
+
+run_id = st.selectbox(
+    "Ouvrir un run",
+    [run["id"] for run in runs],
+    format_func=lambda rid: next(f"{r['created_at']} — {r['request'][:60]}" for r in runs if r["id"] == rid)
+)
+
+run = store.get_run(run_id)
+
+
+@st.fragment
+def show_run(run):
+    """Détail d'un run : changer de section, d'itération ou de page ne relance que ce fragment"""
+    run_id = run["id"]
+    result = run["result"]
+
+    st.divider()
+    status_icon = "✅" if run["success"] else "⚠️"
+    st.subheader(f"{status_icon} {run['status']} — {run['iterations']} itération(s)")
+    st.markdown(f"**Demande :** {run['request']}")
+
+    # Seule la section choisie est rendue (st.tabs enverrait le code de toutes les itérations)
+    section = section_selector([
+        "📝 Spécifications",
+        "💻 Code final",
+        "🔁 Itérations",
+        "📦 Livraison"
+    ], key="history_section")
+
+    if section == "📝 Spécifications":
+        st.markdown(result["specifications"]["user_stories"])
+
+    elif section == "💻 Code final":
+        st.code(result["code"]["final_code"], language="python")
+        st.markdown("### Tests Unitaires")
+        st.code(result["tests"]["test_code"], language="python")
+
+    elif section == "🔁 Itérations":
+        details = {detail["iteration"]: detail for detail in run["iteration_details"]}
+        if details:
+            iteration = st.selectbox(
+                "Itération",
+                list(details),
+                format_func=lambda it: (
+                    f"Itération {it} — {(details[it]['decision'] or {}).get('status', '?')} "
+                    f"(score QA {(details[it]['qa_report'] or {}).get('quality_score', 'N/A')}/10)"
+                ),
+                key=f"history_iteration_{run_id}"
+            )
+            detail = details[iteration]
+            decision = detail["decision"] or {}
+            qa_report = detail["qa_report"] or {}
+            timings = detail["timings"]
+            st.caption(
+                f"⏱️ Dev {timings['dev_s']} s · QA {timings['qa_s']} s · Tech Lead {timings['tl_s']} s"
+            )
+            st.code(detail["code"] or "", language="python")
+            if qa_report.get("critical_bugs"):
+                st.markdown("**🚨 Bugs critiques**")
+                render_bugs(qa_report["critical_bugs"], key=f"history_critical_{run_id}_{iteration}", critical=True)
+            if qa_report.get("minor_bugs"):
+                st.markdown("**⚠️ Bugs mineurs**")
+                render_bugs(qa_report["minor_bugs"], key=f"history_minor_{run_id}_{iteration}", critical=False)
+            st.markdown("**Tests**")
+            st.code(detail["tests"] or "", language="python")
+            if decision.get("justification"):
+                st.markdown(f"**Justification Tech Lead :** {decision['justification']}")
+
+    else:
+        # La trace historisée n'a plus les résultats des étapes : l'historique vient des itérations stockées
+        with open(bundle_project(result, run["request"], iterations=run["iteration_details"]), "rb") as bundle:
+            st.download_button(
+                label="⬇️ Télécharger le projet (.zip)",
+                data=bundle,
+                file_name=f"ai_dev_team_{run['id']}_{datetime.now().strftime('%Y%m%d')}.zip",
+                mime="application/zip",
+                type="primary"
+            )
+
+
+show_run(run)
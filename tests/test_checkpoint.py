@@ -0,0 +1,46 @@
+"""Points de reprise : résumés .meta.json et élagage des runs terminés"""
+
+import os
+
+from utils.checkpoint import CheckpointStore, write_compressed_json
+
+
+def _state(run_id, status="running", updated_at=None):
+    state = {"run_id": run_id, "status": status, "params": {"user_request": f"demande {run_id}"}, "stages": {"PO": {}}}
+    if updated_at:
+        state["updated_at"] = updated_at
+    return state
+
+
+def test_listing_reads_summaries_only(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path))
+    store.save("a", _state("a"))
+    store.save("b", _state("b", status="completed"))
+
+    def no_gunzip(path):
+        raise AssertionError(f"état relu : {path}")
+
+    monkeypatch.setattr("utils.checkpoint.read_compressed_json", no_gunzip)
+    running = store.list_checkpoints(status="running")
+    assert [(c["run_id"], c["request"], c["last_stage"]) for c in running] == [("a", "demande a", "PO")]
+
+
+def test_legacy_checkpoint_gets_a_summary(tmp_path):
+    write_compressed_json(str(tmp_path / "old.json.gz"), _state("old", updated_at="2020-01-01 00:00:00"))
+    store = CheckpointStore(str(tmp_path))
+    assert [c["run_id"] for c in store.list_checkpoints(status="running")] == ["old"]
+    assert os.path.exists(tmp_path / "old.meta.json")
+
+
+def test_finished_runs_are_pruned_beyond_the_limit(tmp_path, monkeypatch):
+    dates = iter(f"2024-01-0{day} 00:00:00" for day in range(1, 10))
+    monkeypatch.setattr("utils.checkpoint.time.strftime", lambda fmt: next(dates))
+    store = CheckpointStore(str(tmp_path), max_finished=2)
+    store.save("live", _state("live"))
+    for index in range(4):
+        store.save(f"done{index}", _state(f"done{index}", status="completed"))
+
+    assert {c["run_id"] for c in store.list_checkpoints()} == {"live", "done2", "done3"}
+    assert not os.path.exists(tmp_path / "done0.json.gz")
+    assert not os.path.exists(tmp_path / "done0.meta.json")
+    assert store.load("live") is not None
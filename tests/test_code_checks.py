@@ -0,0 +1,25 @@
+"""Exécution restreinte des tests générés"""
+
+import os
+
+import pytest
+
+from utils.code_checks import EXECUTION_OPEN_FILES, run_generated_tests
+
+CODE = "def double(x):\n    return 2 * x\n"
+
+
+def test_generated_tests_are_counted():
+    tests = "from main import double\n\ndef test_ok():\n    assert double(2) == 4\n\ndef test_ko():\n    assert double(2) == 5\n"
+    result = run_generated_tests(CODE, tests)
+    assert (result["passed"], result["failed"]) == (1, 1)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="limites POSIX")
+def test_limits_are_applied_in_the_child():
+    tests = (
+        "import resource\n\n"
+        "def test_limits():\n"
+        f"    assert resource.getrlimit(resource.RLIMIT_NOFILE) == ({EXECUTION_OPEN_FILES}, {EXECUTION_OPEN_FILES})\n"
+    )
+    assert run_generated_tests(CODE, tests)["passed"] == 1
@@ -0,0 +1,59 @@
+"""Fusion des fichiers de tests (revue incrémentale et map-reduce du QA)"""
+
+from utils.code_units import combine_tests, merge_tests, split_tests
+
+PREVIOUS = '''import pytest
+from main import add, divide
+
+
+def test_add():
+    assert add(1, 2) == 3
+
+
+def test_divide():
+    assert divide(4, 2) == 2
+'''
+
+NEW = '''import pytest
+from main import divide
+
+
+def test_divide():
+    with pytest.raises(ZeroDivisionError):
+        divide(1, 0)
+
+
+def test_divide_negative():
+    assert divide(-4, 2) == -2
+'''
+
+
+def test_merge_keeps_tests_of_unchanged_units():
+    merged = merge_tests(PREVIOUS, NEW, stale_units=["divide"])
+    tests = split_tests(merged["tests"])["tests"]
+    assert merged["carried"] == 1
+    assert list(tests) == ["test_add", "test_divide", "test_divide_negative"]
+    assert "ZeroDivisionError" in tests["test_divide"]["source"]
+    assert "from main import add, divide" in merged["tests"]
+
+
+def test_merge_drops_tests_of_stale_units():
+    merged = merge_tests(PREVIOUS, "def test_other():\n    assert True\n", stale_units=["add", "divide"])
+    assert merged["carried"] == 0
+    assert list(split_tests(merged["tests"])["tests"]) == ["test_other"]
+
+
+def test_merge_with_invalid_tests_keeps_the_new_ones():
+    assert merge_tests("def test_(:", NEW, stale_units=[]) == {"tests": NEW, "carried": 0}
+
+
+def test_combine_deduplicates_headers_and_renames_homonyms():
+    combined = combine_tests([PREVIOUS, NEW, PREVIOUS])
+    tests = split_tests(combined)["tests"]
+    assert list(tests) == ["test_add", "test_divide", "test_divide_2", "test_divide_negative"]
+    assert combined.count("import pytest") == 1
+    compile(combined, "test_main.py", "exec")
+
+
+def test_combine_skips_unparsable_files():
+    assert combine_tests(["def test_(:", ""]) == ""
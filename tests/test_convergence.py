@@ -0,0 +1,40 @@
+"""Détection de convergence de la boucle de correction"""
+
+from utils.convergence import ConvergenceMonitor, bug_fingerprint
+
+CODE = "def f(x):\n    return x + 1\n"
+BUGS = ["Ligne 12 : division par zéro non gérée", "Fichier absent non géré"]
+
+
+def test_first_iteration_continues():
+    assert ConvergenceMonitor().observe(1, CODE, BUGS, 5)["action"] == "continue"
+
+
+def test_stalled_iteration_escalates_then_stops():
+    monitor = ConvergenceMonitor(max_escalations=1)
+    monitor.observe(1, CODE, BUGS, 5)
+    # Même code (commentaire et docstring près), mêmes bugs à des lignes différentes
+    same_code = 'def f(x):\n    """Incrémente"""\n    return x + 1  # inchangé\n'
+    moved_bugs = ["ligne 30 : Division par zéro non gérée !", "Fichier absent non géré"]
+    second = monitor.observe(2, same_code, moved_bugs, 5)
+    assert second["action"] == "escalate"
+    assert second["code_similarity"] == 1.0 and second["bug_overlap"] == 1.0
+    assert monitor.observe(3, same_code, moved_bugs, 5)["action"] == "stop"
+
+
+def test_improving_score_keeps_going():
+    monitor = ConvergenceMonitor()
+    monitor.observe(1, CODE, BUGS, 5)
+    assert monitor.observe(2, CODE, BUGS, 7)["action"] == "continue"
+
+
+def test_new_code_and_new_bugs_continue():
+    monitor = ConvergenceMonitor()
+    monitor.observe(1, CODE, BUGS, 5)
+    verdict = monitor.observe(2, "class Parser:\n    pass\n\n\ndef g():\n    return []\n", ["Autre bug"], 5)
+    assert verdict["action"] == "continue"
+    assert verdict["repeated_bugs"] == []
+
+
+def test_bug_fingerprint_ignores_line_numbers_and_punctuation():
+    assert bug_fingerprint("Ligne 3 : valeur nulle.") == bug_fingerprint("ligne 42 - Valeur nulle")
@@ -0,0 +1,61 @@
+"""Requêtes hedgées en streaming : course au premier fragment"""
+
+import asyncio
+
+from langchain_core.messages import AIMessageChunk, HumanMessage
+
+from utils.hedging import HedgedLLM, HedgingPolicy
+from utils.streaming import EarlyStopLLM, FieldDetector
+
+
+class FakeStreamingLLM:
+    """Client qui émet ses fragments après un délai initial et note leur fermeture"""
+
+    def __init__(self, name, first_delay_s, chunks=("Statut : OK\n", "prose inutile\n")):
+        self.name = name
+        self.first_delay_s = first_delay_s
+        self.chunks = chunks
+        self.emitted = 0
+        self.closed = False
+
+    async def astream(self, messages, **kwargs):
+        try:
+            await asyncio.sleep(self.first_delay_s)
+            for chunk in self.chunks:
+                self.emitted += 1
+                yield AIMessageChunk(content=f"{self.name}:{chunk}")
+                await asyncio.sleep(0.01)
+        finally:
+            self.closed = True
+
+
+def hedged(primary_delay_s, secondary_delay_s):
+    primary = FakeStreamingLLM("primary", primary_delay_s)
+    secondary = FakeStreamingLLM("secondary", secondary_delay_s)
+    llm = HedgedLLM(primary, secondary, first_token_policy=HedgingPolicy(initial_delay_s=0.05, min_delay_s=0.05))
+    return llm, primary, secondary
+
+
+def test_fast_primary_is_not_hedged():
+    llm, primary, secondary = hedged(0.0, 0.0)
+    chunks = [chunk.content for chunk in llm.stream([HumanMessage(content="x")])]
+    assert chunks == ["primary:Statut : OK\n", "primary:prose inutile\n"]
+    assert llm.stats["hedges"] == 0
+    assert primary.closed
+
+
+def test_slow_first_token_is_hedged_and_loser_closed():
+    llm, primary, secondary = hedged(1.0, 0.0)
+    chunks = [chunk.content for chunk in llm.stream([HumanMessage(content="x")])]
+    assert chunks[0].startswith("secondary:")
+    assert llm.stats["hedges"] == 1 and llm.stats["secondary_wins"] == 1 and llm.stats["cancelled"] == 1
+    assert primary.closed and primary.emitted == 0
+
+
+def test_early_stop_closes_the_winning_stream():
+    llm, primary, secondary = hedged(0.0, 0.0)
+    early_stop = EarlyStopLLM(llm, FieldDetector({"status": r"Statut : OK\n"}))
+    response = early_stop.invoke([HumanMessage(content="x")])
+    assert response.content == "primary:Statut : OK\n"
+    assert early_stop.stats["early_stop"]
+    assert primary.closed and primary.emitted == 1
@@ -0,0 +1,113 @@
+"""Découpage d'un module aplati en projet multi-fichiers (split_project)"""
+
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+from utils.project import _binding_mismatches, merge_story_modules, split_mismatches, split_project
+
+INTERFACE = '''DATA = "DATA"
+
+
+def load():
+    """Charge les données"""
+    ...
+'''
+
+# us1 utilise load (stub de l'interface, implémenté par us2) et fournit helper à us2
+US1 = '''from interface import *
+
+
+def main():
+    """Point d'entrée"""
+    print("loaded:", load())
+
+
+def helper():
+    """Donnée brute"""
+    return DATA
+'''
+
+US2 = '''from interface import *
+from us1 import helper
+
+
+def load():
+    """Implémentation réelle"""
+    return helper()
+'''
+
+
+@pytest.fixture
+def project():
+    merged = merge_story_modules(INTERFACE, {"us1.py": US1, "us2.py": US2})
+    return merged["code"], split_project(merged["code"])
+
+
+@pytest.fixture
+def imported(tmp_path, monkeypatch):
+    """Écrit des fichiers dans un répertoire importable ; les modules importés sont oubliés ensuite"""
+    def write(files):
+        for name, source in files.items():
+            (tmp_path / name).write_text(source, encoding="utf-8")
+        return tmp_path
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    before = set(sys.modules)
+    yield write
+    for name in set(sys.modules) - before:
+        del sys.modules[name]
+    importlib.invalidate_caches()
+
+
+def _run(directory, script):
+    return subprocess.run(
+        [sys.executable, script], cwd=directory, capture_output=True, text=True, timeout=30
+    )
+
+
+def test_stub_is_overridden_by_later_story(project, imported):
+    code, files = project
+    directory = imported({**files, "flat.py": code})
+    flat, split = _run(directory, "flat.py"), _run(directory, "main.py")
+    assert flat.stdout == "loaded: DATA\n"
+    assert (split.returncode, split.stdout) == (flat.returncode, flat.stdout)
+
+
+def test_name_owned_by_a_later_file_is_imported_after_the_body(project):
+    _, files = project
+    us1 = files["us1.py"]
+    assert "from interface import DATA" in us1
+    assert us1.index("from us2 import load") > us1.index("def main")
+    assert "load" not in files["us1.py"].split("def main")[0]
+    assert files["us2.py"].startswith("from us1 import helper")
+
+
+def test_from_main_import_star_round_trip(project, imported):
+    _, files = project
+    imported(files)
+    namespace = {}
+    exec("from main import *", namespace)
+    assert namespace["load"]() == "DATA"
+    assert namespace["load"].__module__ == "us2"
+    assert sys.modules["us1"].load is namespace["load"]
+    assert sys.modules["interface"].load is not namespace["load"]
+
+
+def test_split_matches_flattened_bindings(project):
+    code, _ = project
+    assert split_mismatches(code) == []
+
+
+def test_binding_to_the_stub_is_reported(project):
+    _, files = project
+    stub_bound = dict(files)
+    stub_bound["us1.py"] = US1.replace("from interface import *", "from interface import DATA, load")
+    assert _binding_mismatches(stub_bound) == ["us1.py : load → interface.py (module aplati : us2.py)"]
+
+
+def test_code_without_markers_is_not_a_project():
+    assert split_project("print('hello')\n") is None
+    assert split_mismatches("print('hello')\n") == []
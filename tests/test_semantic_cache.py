@@ -0,0 +1,21 @@
+"""Index des runs passés : réutilisation exacte et repli de l'embedding"""
+
+from utils import semantic_cache
+from utils.semantic_cache import HashingEmbedder, SemanticRunCache, default_embedder
+
+
+def test_unloadable_model_falls_back_to_hashing(monkeypatch):
+    def offline(model_name):
+        raise OSError("hub injoignable")
+
+    monkeypatch.setattr(semantic_cache, "_sentence_model", offline)
+    embedder = default_embedder()
+    assert isinstance(embedder, HashingEmbedder)
+    assert embedder.fallback_reason == "OSError: hub injoignable"
+
+
+def test_reversed_request_is_only_a_hint(tmp_path):
+    cache = SemanticRunCache(str(tmp_path / "index.json"), embedder=HashingEmbedder())
+    cache.add("Script qui convertit CSV en JSON", {"raw_response": "US1", "analysis": {}})
+    assert cache.exact("  script qui convertit csv en JSON !", None) is not None
+    assert cache.exact("Script qui convertit JSON en CSV", None) is None
@@ -0,0 +1,38 @@
+"""Cache des sorties d'étapes : expiration et éviction LRU"""
+
+import os
+import time
+
+from utils.stage_cache import StageCache, stage_fingerprint
+
+
+def _age(cache, fingerprint, seconds):
+    past = time.time() - seconds
+    os.utime(cache._path(fingerprint), (past, past))
+
+
+def test_fingerprint_is_stable_and_input_sensitive():
+    assert stage_fingerprint("dev", 1, {"b": 2, "a": 1}) == stage_fingerprint("dev", 1, {"a": 1, "b": 2})
+    assert stage_fingerprint("dev", 1) != stage_fingerprint("dev", 2)
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path):
+    cache = StageCache(str(tmp_path), max_age_s=60)
+    cache.put("aa01", {"result": 1})
+    _age(cache, "aa01", 120)
+    assert cache.get("aa01") is None
+    assert not os.path.exists(cache._path("aa01"))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = StageCache(str(tmp_path), max_entries=2)
+    cache.put("aa01", {"result": 1})
+    cache.put("bb02", {"result": 2})
+    _age(cache, "aa01", 20)
+    _age(cache, "bb02", 10)
+    # Une lecture rafraîchit l'entrée : bb02 devient la moins récemment utilisée
+    assert cache.get("aa01") == {"result": 1}
+    cache.put("cc03", {"result": 3})
+    assert cache.get("bb02") is None
+    assert cache.get("aa01") == {"result": 1} and cache.get("cc03") == {"result": 3}
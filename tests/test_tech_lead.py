@@ -0,0 +1,53 @@
+"""Lecture de la décision du Tech Lead (mode markdown) et arrêt anticipé du streaming"""
+
+import pytest
+
+from agents.tech_lead import TechLeadAgent
+from benchmarks.replay_llm import ReplayLLM
+from utils.streaming import FieldDetector
+
+
+@pytest.fixture
+def tech_lead():
+    return TechLeadAgent(llm=ReplayLLM())
+
+
+@pytest.mark.parametrize("response, option, status", [
+    ("**Option retenue** : A\n**Statut** : ✅ VALIDÉ\n", "A", "VALIDATED"),
+    ("**Option retenue :** A\n**Statut :** ✅ VALIDÉ\n", "A", "VALIDATED"),
+    ("Option retenue : A\nStatut : ✅ VALIDÉ\n", "A", "VALIDATED"),
+    ("**Option retenue**: Option C\n**Statut**: ❌ REJETÉ\n", "C", "REJECTED"),
+    ("### Option retenue\nB\n\n### Statut\n🔄 À CORRIGER\n", "B", "NEEDS_CORRECTION"),
+])
+def test_status_and_option_formats(tech_lead, response, option, status):
+    decision = tech_lead._parse_decision(response)
+    assert decision["chosen_option"] == option
+    assert decision["status"] == status
+
+
+def test_copied_status_template_falls_back_to_correction(tech_lead):
+    response = "**Option retenue** : A\n**Statut** : ✅ VALIDÉ | 🔄 À CORRIGER | ❌ REJETÉ\n"
+    assert tech_lead._parse_decision(response)["status"] == "NEEDS_CORRECTION"
+
+
+def test_status_word_inside_prose_is_ignored(tech_lead):
+    response = "Le Statut : VALIDÉ serait prématuré.\n**Option retenue** : B\n**Statut** : 🔄 À CORRIGER\n"
+    assert tech_lead._parse_decision(response)["status"] == "NEEDS_CORRECTION"
+
+
+def test_options_listed_in_the_tree_are_not_a_status(tech_lead):
+    response = "#### Option A : VALIDER le code\n#### Option C : REJETER\n"
+    decision = tech_lead._parse_decision(response)
+    assert decision["status"] == "UNKNOWN"
+    assert decision["chosen_option"] is None
+
+
+@pytest.mark.parametrize("response", [
+    "**Option retenue :** A\n**Statut :** ✅ VALIDÉ\n",
+    "Option retenue : A\nStatut : ✅ VALIDÉ\n",
+    "**Option retenue** : B\n### Statut\n🔄 À CORRIGER\n",
+])
+def test_stream_fields_detect_decision(tech_lead, response):
+    detector = FieldDetector({name: tech_lead.STREAM_FIELDS[name] for name in ("chosen_option", "status")})
+    assert detector.complete(response) == response
+    assert detector.complete(response.rsplit("\n", 2)[0]) is None
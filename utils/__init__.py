@@ -3,5 +3,6 @@ Package utils pour AI Dev Team
 """
 
 from .pdf_processor import PDFProcessor
+from .bundler import build_project_zip, bundle_project
 
-__all__ = ["PDFProcessor"]
+__all__ = ["PDFProcessor", "build_project_zip", "bundle_project"]
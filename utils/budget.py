@@ -0,0 +1,129 @@
+"""
+Budgets de run : échéance (wall-clock) et plafond de tokens
+Chaque appel LLM d'un agent passe par RunBudget.invoke : il est refusé si
+le budget est épuisé, raccourci (max_tokens) s'il reste peu de tokens,
+et annulé s'il dépasse l'échéance (sur la boucle d'événements partagée
+de utils.hedging, qui conserve les pools de connexions des clients).
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.hedging import run_sync
+from utils.token_usage import configured_max_tokens, max_tokens_kwargs, messages_tokens, response_tokens
+
+
+class BudgetExceeded(Exception):
+    """Levée quand un appel ne peut plus tenir dans le budget du run"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Budget épuisé ({reason})")
+        self.reason = reason
+
+
+class RunBudget:
+    """
+    Budget partagé par tous les agents d'un run
+
+    Args:
+        deadline_s: Durée maximale du run en secondes (None = illimitée)
+        max_tokens: Tokens (prompt + réponse) autorisés pour le run (None = illimité)
+        min_call_tokens: En dessous de ce nombre de tokens de réponse possibles, l'appel est sauté
+        min_call_s: En dessous de ce temps restant, l'appel est sauté
+    """
+
+    def __init__(
+        self,
+        deadline_s: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        min_call_tokens: int = 256,
+        min_call_s: float = 1.0
+    ):
+        self.deadline_s = deadline_s
+        self.max_tokens = max_tokens
+        self.min_call_tokens = min_call_tokens
+        self.min_call_s = min_call_s
+        self.started_at = time.monotonic()
+        self.tokens_used = 0
+        self.stats = {"calls": 0, "shortened": 0, "skipped": 0, "cancelled": 0}
+        self.exceeded: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining_s(self) -> Optional[float]:
+        if self.deadline_s is None:
+            return None
+        return self.deadline_s - self.elapsed_s()
+
+    def remaining_tokens(self) -> Optional[int]:
+        if self.max_tokens is None:
+            return None
+        return self.max_tokens - self.tokens_used
+
+    def _exceed(self, reason: str, counter: str) -> BudgetExceeded:
+        with self._lock:
+            self.stats[counter] += 1
+            self.exceeded = self.exceeded or reason
+        return BudgetExceeded(reason)
+
+    def check(self, prompt_tokens: int = 0):
+        """Lève BudgetExceeded si un appel ne tient plus dans le budget"""
+        remaining_s = self.remaining_s()
+        if remaining_s is not None and remaining_s < self.min_call_s:
+            raise self._exceed("échéance", "skipped")
+        remaining_tokens = self.remaining_tokens()
+        if remaining_tokens is not None and remaining_tokens - prompt_tokens < self.min_call_tokens:
+            raise self._exceed("tokens", "skipped")
+
+    def _limit_kwargs(self, llm, prompt_tokens: int, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Limite la réponse à ce qu'il reste du budget de tokens (max_tokens,
+        ou num_predict pour Ollama) ; seul un appel dont la limite configurée
+        est réellement abaissée compte comme raccourci
+        """
+        remaining_tokens = self.remaining_tokens()
+        if remaining_tokens is None:
+            return kwargs
+        allowed = remaining_tokens - prompt_tokens
+        configured = configured_max_tokens(llm, kwargs)
+        if configured is not None and allowed >= configured:
+            return kwargs
+        if configured is not None:
+            with self._lock:
+                self.stats["shortened"] += 1
+        return {**kwargs, **max_tokens_kwargs(llm, allowed)}
+
+    def invoke(self, llm, messages, **kwargs):
+        """Appel LLM contraint par le budget (refusé, raccourci ou annulé)"""
+        prompt_tokens = messages_tokens(messages)
+        self.check(prompt_tokens)
+        kwargs = self._limit_kwargs(llm, prompt_tokens, kwargs)
+
+        timeout = self.remaining_s()
+        if timeout is None:
+            response = llm.invoke(messages, **kwargs)
+        else:
+            try:
+                # ainvoke annulé à l'échéance : la requête HTTP est abandonnée
+                response = run_sync(asyncio.wait_for(llm.ainvoke(messages, **kwargs), timeout))
+            except asyncio.TimeoutError:
+                raise self._exceed("échéance", "cancelled") from None
+
+        with self._lock:
+            self.stats["calls"] += 1
+            self.tokens_used += response_tokens(response, messages)["total"]
+        return response
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "deadline_s": self.deadline_s,
+            "max_tokens": self.max_tokens,
+            "elapsed_s": round(self.elapsed_s(), 3),
+            "tokens_used": self.tokens_used,
+            "exceeded": self.exceeded,
+            **self.stats
+        }
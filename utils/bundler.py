@@ -0,0 +1,241 @@
+"""
+Packaging du projet généré en archive ZIP
+Le projet (multi-fichiers s'il a été développé par User Story), ses tests,
+l'historique de chaque itération et un requirements.txt déduit des imports
+sont rassemblés ; l'archive est écrite directement sur disque et mise en
+cache par empreinte de son contenu.
+"""
+
+import ast
+import io
+import json
+import os
+import sys
+import zipfile
+from typing import Dict, List, Optional
+
+from utils.project import split_project
+from utils.stage_cache import stage_fingerprint
+
+
+DEFAULT_BUNDLE_DIR = os.path.join(".ai_dev_team", "bundles")
+
+# Archives conservées dans le cache (les plus anciennes sont supprimées)
+MAX_CACHED_BUNDLES = 20
+
+# Changer cette version invalide les archives en cache (nouveau contenu ou format)
+BUNDLE_VERSION = 1
+
+# Nom pip des modules dont le nom d'import diffère
+PIP_NAMES = {
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "google": "protobuf",
+    "jwt": "PyJWT",
+    "magic": "python-magic",
+    "PIL": "Pillow",
+    "serial": "pyserial",
+    "skimage": "scikit-image",
+    "sklearn": "scikit-learn",
+    "yaml": "PyYAML",
+}
+
+
+def infer_requirements(sources: Dict[str, str]) -> List[str]:
+    """
+    Dépendances tierces importées par les fichiers du projet
+
+    Les modules de la bibliothèque standard et les fichiers du projet
+    eux-mêmes sont ignorés ; le nom d'import est traduit en nom pip.
+    """
+    local = {name[:-3] for name in sources if name.endswith(".py")}
+    found = set()
+    for code in sources.values():
+        try:
+            tree = ast.parse(code)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                top = module.split(".")[0]
+                if top not in sys.stdlib_module_names and top not in local and top != "__future__":
+                    found.add(PIP_NAMES.get(top, top))
+    return sorted(found, key=str.lower)
+
+
+def build_requirements(sources: Dict[str, str]) -> str:
+    """Contenu de requirements.txt"""
+    requirements = infer_requirements(sources)
+    if not requirements:
+        return "# Aucune dépendance externe (bibliothèque standard uniquement)\n"
+    return "# Dépendances déduites des imports du code et des tests\n" + "\n".join(requirements) + "\n"
+
+
+def build_readme(result: Dict, user_request: str, files: Optional[List[str]] = None) -> str:
+    """Construit le README du projet livré"""
+    files = files or ["main.py"]
+    return f"""# Projet AI Dev Team
+
+## Description
+{user_request}
+
+## User Stories
+{result["specifications"]["user_stories"]}
+
+## Fichiers
+{chr(10).join(f"- `{name}`" for name in files)}
+
+L'historique de chaque itération (code, tests, rapport QA et décision) est dans `history/`.
+
+## Utilisation
+```bash
+pip install -r requirements.txt
+python main.py
+```
+
+## Tests
+```bash
+pytest test_main.py
+```
+
+## Qualité
+- Score QA : {result["tests"]["quality_score"]}/10
+- Itérations : {result["iterations"]}
+- Statut : {result["validation"]["status"]}
+
+---
+Généré par AI Dev Team
+"""
+
+
+def _code_files(code: str) -> Dict[str, str]:
+    """Fichiers d'un code livré : projet multi-fichiers ou module unique main.py"""
+    return split_project(code) or {"main.py": code}
+
+
+def _history_files(result: Dict, iterations: Optional[List[Dict]] = None) -> Dict[str, str]:
+    """
+    Code, tests et revue de chaque itération
+
+    Args:
+        result: Résultat du run (itérations tirées de sa trace d'exécution)
+        iterations: Itérations déjà extraites (RunStore.get_run()["iteration_details"]),
+            prioritaires sur la trace : celle d'un run historisé n'a plus les résultats des étapes
+    """
+    from utils.run_store import RunStore
+
+    if iterations is None:
+        by_iteration = RunStore._iterations_from_trace(result.get("execution_trace", []))
+    else:
+        by_iteration = {data["iteration"]: data for data in iterations}
+
+    files = {}
+    for iteration, data in sorted(by_iteration.items()):
+        prefix = f"history/iteration_{iteration}"
+        if data.get("code") is not None:
+            files.update({f"{prefix}/{name}": source for name, source in _code_files(data["code"]).items()})
+        if data.get("tests"):
+            files[f"{prefix}/test_main.py"] = data["tests"]
+        review = {"qa_report": data.get("qa_report"), "decision": data.get("decision")}
+        if any(review.values()):
+            files[f"{prefix}/review.json"] = json.dumps(review, ensure_ascii=False, indent=2)
+    return files
+
+
+def project_files(result: Dict, user_request: str, iterations: Optional[List[Dict]] = None) -> Dict[str, str]:
+    """
+    Contenu de l'archive {chemin: texte}
+
+    Args:
+        result: Résultat retourné par TeamOrchestrator.run
+        user_request: Demande initiale de l'utilisateur
+        iterations: Itérations d'un run historisé (voir _history_files)
+    """
+    code_files = result["code"].get("files") or _code_files(result["code"]["final_code"])
+    tests = result["tests"]["test_code"]
+    files = {
+        **code_files,
+        "test_main.py": tests,
+        "README.md": build_readme(result, user_request, list(code_files)),
+        "requirements.txt": build_requirements({**code_files, "test_main.py": tests})
+    }
+    files.update(_history_files(result, iterations))
+    return files
+
+
+def _write_zip(target, files: Dict[str, str]):
+    """Écrit les fichiers dans une archive, entrée par entrée"""
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+
+
+def build_project_zip(result: Dict, user_request: str) -> bytes:
+    """
+    Crée l'archive ZIP du projet en mémoire (voir bundle_project pour la version en cache sur disque)
+
+    Args:
+        result: Résultat retourné par TeamOrchestrator.run
+        user_request: Demande initiale de l'utilisateur
+
+    Returns:
+        Contenu binaire de l'archive
+    """
+    zip_buffer = io.BytesIO()
+    _write_zip(zip_buffer, project_files(result, user_request))
+    return zip_buffer.getvalue()
+
+
+def bundle_project(
+    result: Dict,
+    user_request: str,
+    directory: str = DEFAULT_BUNDLE_DIR,
+    iterations: Optional[List[Dict]] = None
+) -> str:
+    """
+    Archive ZIP du projet sur disque, réutilisée si son contenu n'a pas changé
+
+    L'archive est écrite directement dans son fichier (aucune copie en
+    mémoire) puis renommée de façon atomique ; son nom est l'empreinte
+    de son contenu, si bien qu'un rerun de l'application ne la reconstruit pas.
+
+    Args:
+        iterations: Itérations d'un run historisé (RunStore.get_run()["iteration_details"])
+
+    Returns:
+        Chemin de l'archive
+    """
+    files = project_files(result, user_request, iterations)
+    path = os.path.join(directory, f"{stage_fingerprint(BUNDLE_VERSION, files)[:32]}.zip")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    _write_zip(tmp_path, files)
+    os.replace(tmp_path, path)
+    _evict(directory)
+    return path
+
+
+def _evict(directory: str):
+    """Supprime les archives les moins récemment utilisées au-delà de MAX_CACHED_BUNDLES"""
+    bundles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".zip")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in bundles[MAX_CACHED_BUNDLES:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,120 @@
+"""
+Points de reprise des runs
+Après chaque étape terminée (PO, DEV/QA/TL de chaque itération), l'état
+du run est écrit en JSON compressé (gzip) pour pouvoir le reprendre ; un
+petit résumé non compressé l'accompagne pour lister les runs sans relire
+leurs états. Seuls les plus récents des runs terminés sont conservés.
+"""
+
+import gzip
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(".ai_dev_team", "checkpoints")
+
+# Points de reprise de runs terminés conservés (les plus anciens sont supprimés)
+MAX_FINISHED_CHECKPOINTS = 10
+
+
+def write_compressed_json(path: str, data: Any):
+    """Écrit `data` en JSON gzip de façon atomique"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_compressed_json(path: str) -> Any:
+    """Lit un fichier écrit par write_compressed_json"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CheckpointStore:
+    """Un fichier <run_id>.json.gz par run, résumé dans <run_id>.meta.json"""
+
+    def __init__(self, directory: str = DEFAULT_CHECKPOINT_DIR, max_finished: int = MAX_FINISHED_CHECKPOINTS):
+        self.directory = directory
+        self.max_finished = max_finished
+
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.json.gz")
+
+    def _meta_path(self, run_id: str) -> str:
+        return os.path.join(self.directory, f"{run_id}.meta.json")
+
+    @staticmethod
+    def _summary(state: Dict) -> Dict:
+        return {
+            "run_id": state["run_id"],
+            "status": state.get("status"),
+            "request": state["params"]["user_request"],
+            "last_stage": next(reversed(state["stages"]), None),
+            "updated_at": state.get("updated_at")
+        }
+
+    def _write_meta(self, summary: Dict):
+        path = self._meta_path(summary["run_id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def save(self, run_id: str, state: Dict):
+        state["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        write_compressed_json(self._path(run_id), state)
+        self._write_meta(self._summary(state))
+        if state.get("status", "running") != "running":
+            self.prune()
+
+    def load(self, run_id: str) -> Optional[Dict]:
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return None
+        return read_compressed_json(path)
+
+    def delete(self, run_id: str):
+        for path in (self._path(run_id), self._meta_path(run_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def list_checkpoints(self, status: Optional[str] = None) -> List[Dict]:
+        """Résumé des points de reprise (plus récents d'abord), lu dans les fichiers .meta.json"""
+        if not os.path.isdir(self.directory):
+            return []
+
+        checkpoints = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json.gz"):
+                continue
+            run_id = filename[:-len(".json.gz")]
+            meta_path = self._meta_path(run_id)
+            if os.path.exists(meta_path):
+                with open(meta_path, encoding="utf-8") as f:
+                    summary = json.load(f)
+            else:
+                # Point de reprise antérieur aux résumés : relu une seule fois
+                summary = self._summary(read_compressed_json(os.path.join(self.directory, filename)))
+                self._write_meta(summary)
+            if status and summary["status"] != status:
+                continue
+            checkpoints.append(summary)
+        return sorted(checkpoints, key=lambda c: c["updated_at"] or "", reverse=True)
+
+    def prune(self) -> int:
+        """
+        Supprime les points de reprise des runs terminés au-delà des max_finished plus récents
+
+        Returns:
+            Nombre de points de reprise supprimés
+        """
+        finished = [c for c in self.list_checkpoints() if c["status"] != "running"]
+        for checkpoint in finished[self.max_finished:]:
+            self.delete(checkpoint["run_id"])
+        return len(finished[self.max_finished:])
@@ -0,0 +1,245 @@
+"""
+Vérifications locales du code généré (sans appel LLM)
+Compilation, contrôles statiques par AST et, sur demande explicite,
+exécution des tests générés dans un sous-processus restreint.
+"""
+
+import ast
+import functools
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+# Limites du sous-processus qui exécute le code généré
+EXECUTION_CPU_S = 30
+EXECUTION_MEMORY_MB = 1024
+EXECUTION_FILE_MB = 16
+EXECUTION_OPEN_FILES = 64
+
+# Lance main.py comme script ; -I retire le répertoire courant de sys.path, nécessaire aux imports entre fichiers
+_RUN_MAIN = "import runpy, sys; sys.path.insert(0, ''); runpy.run_path('main.py', run_name='__main__')"
+
+
+def compile_check(code: str) -> Tuple[bool, Optional[str]]:
+    """Vérifie que le code compile ; retourne (ok, message d'erreur)"""
+    try:
+        compile(code, "main.py", "exec")
+        return True, None
+    except (SyntaxError, ValueError) as exc:
+        return False, f"{type(exc).__name__}: {exc}"
+
+
+def static_issues(code: str) -> List[str]:
+    """
+    Contrôles statiques simples sur l'AST
+
+    Returns:
+        Liste des problèmes détectés (vide si le code ne parse pas)
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+
+    issues = []
+    imported = {}
+    used = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler) and node.type is None:
+            issues.append(f"ligne {node.lineno} : except nu")
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("eval", "exec"):
+            issues.append(f"ligne {node.lineno} : appel à {node.func.id}()")
+        elif isinstance(node, ast.ImportFrom) and any(alias.name == "*" for alias in node.names):
+            issues.append(f"ligne {node.lineno} : import *")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if not node.name.startswith("_") and ast.get_docstring(node) is None:
+                issues.append(f"ligne {node.lineno} : {node.name} sans docstring")
+            if not isinstance(node, ast.ClassDef):
+                for default in node.args.defaults + node.args.kw_defaults:
+                    if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                        issues.append(f"ligne {node.lineno} : argument par défaut mutable dans {node.name}")
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    name = (alias.asname or alias.name).split(".")[0]
+                    imported[name] = node.lineno
+        elif isinstance(node, ast.Name):
+            used.add(node.id)
+
+    for name, lineno in imported.items():
+        if name not in used:
+            issues.append(f"ligne {lineno} : import inutilisé {name}")
+
+    if re.search(r"#\s*(TODO|FIXME)", code):
+        issues.append("TODO/FIXME restant")
+
+    return issues
+
+
+# Amorce exécutée dans le sous-processus : pose les limites puis se remplace (execv)
+# par la vraie commande. Contrairement à preexec_fn, rien ne s'exécute entre fork et
+# exec dans le processus parent, qui peut avoir des threads (graphe d'étapes, application)
+_LIMIT_AND_EXEC = (
+    "import os, resource, sys\n"
+    "names = ('RLIMIT_CPU', 'RLIMIT_AS', 'RLIMIT_FSIZE', 'RLIMIT_NOFILE')\n"
+    "for name, value in zip(names, map(int, sys.argv[1:5])):\n"
+    "    resource.setrlimit(getattr(resource, name), (value, value))\n"
+    "os.execv(sys.executable, [sys.executable] + sys.argv[5:])\n"
+)
+
+
+def _limited_command(args: List[str]) -> List[str]:
+    """`python -I <args>`, précédé de l'amorce qui applique les limites d'exécution (POSIX)"""
+    command = [sys.executable, "-I"] + args
+    if os.name != "posix":
+        return command
+    limits = (
+        EXECUTION_CPU_S,
+        EXECUTION_MEMORY_MB * 1024 * 1024,
+        EXECUTION_FILE_MB * 1024 * 1024,
+        EXECUTION_OPEN_FILES,
+    )
+    return [sys.executable, "-I", "-c", _LIMIT_AND_EXEC] + [str(limit) for limit in limits] + ["-I"] + args
+
+
+@functools.lru_cache(maxsize=1)
+def _network_isolation() -> List[str]:
+    """
+    Préfixe de commande privant le sous-processus de réseau (espace de
+    noms réseau vide via unshare) ; liste vide si le système ne le permet pas
+    """
+    unshare = shutil.which("unshare")
+    if not unshare:
+        return []
+    # Chemin absolu : le sous-processus n'hérite pas du PATH de l'utilisateur
+    command = [unshare, "--user", "--map-root-user", "--net"]
+    try:
+        probe = subprocess.run(command + ["true"], capture_output=True, timeout=5)
+    except (subprocess.TimeoutExpired, OSError):
+        return []
+    return command if probe.returncode == 0 else []
+
+
+def _write_files(directory: str, files: Dict[str, str]):
+    for name, content in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _run_restricted(network: List[str], args: List[str], workdir: str, timeout: float) -> subprocess.CompletedProcess:
+    """Lance `python -I <args>` dans workdir avec l'environnement minimal et les limites d'exécution"""
+    return subprocess.run(
+        network + _limited_command(args),
+        cwd=workdir,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        env={
+            "PATH": os.path.dirname(sys.executable),
+            "HOME": workdir,
+            "TMPDIR": workdir,
+            "PYTHONDONTWRITEBYTECODE": "1"
+        },
+    )
+
+
+def run_generated_tests(code: str, tests: str, timeout: float = 30.0) -> Optional[Dict[str, float]]:
+    """
+    Exécute les tests pytest contre le code généré, dans un sous-processus
+    restreint : répertoire temporaire, environnement minimal, limites CPU,
+    mémoire, taille de fichier et descripteurs, sans réseau quand un espace
+    de noms réseau peut être créé (unshare).
+
+    Ce n'est pas un bac à sable : le code s'exécute avec les droits de
+    l'utilisateur et voit son système de fichiers. Ne l'appeler que sur
+    demande explicite (option execute_tests).
+
+    Returns:
+        Dict passed/failed/pass_rate/network_isolated, ou None si les tests
+        n'ont pas pu tourner
+    """
+    if not tests.strip():
+        return None
+
+    network = _network_isolation() if sys.platform.startswith("linux") else []
+    with tempfile.TemporaryDirectory(prefix="ai_dev_team_") as workdir:
+        _write_files(workdir, {"main.py": code, "test_main.py": tests})
+        try:
+            completed = _run_restricted(
+                network, ["-m", "pytest", "-q", "-p", "no:cacheprovider", "test_main.py"], workdir, timeout
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return {"passed": 0, "failed": 0, "pass_rate": 0.0, "network_isolated": bool(network)}
+
+    output = completed.stdout + completed.stderr
+    passed = sum(int(n) for n in re.findall(r"(\d+) passed", output))
+    failed = sum(int(n) for n in re.findall(r"(\d+) (?:failed|error)", output))
+    if passed + failed == 0:
+        if "No module named pytest" in output:
+            return None
+        return {"passed": 0, "failed": 0, "pass_rate": 0.0, "network_isolated": bool(network)}
+
+    return {
+        "passed": passed,
+        "failed": failed,
+        "pass_rate": passed / (passed + failed),
+        "network_isolated": bool(network)
+    }
+
+
+def compare_split_execution(code: str, files: Dict[str, str], timeout: float = 30.0) -> Optional[Dict]:
+    """
+    Exécute le module aplati puis le main.py du projet multi-fichiers, dans
+    les mêmes conditions que run_generated_tests (donc sur demande explicite
+    uniquement), et compare code de sortie et sorties standard
+
+    Returns:
+        Dict avec same (bool), flat et split ({returncode, stdout}), ou None
+        si l'un des deux n'a pas pu tourner (délai dépassé)
+    """
+    network = _network_isolation() if sys.platform.startswith("linux") else []
+    runs = {}
+    for label, project in (("flat", {"main.py": code}), ("split", files)):
+        with tempfile.TemporaryDirectory(prefix="ai_dev_team_") as workdir:
+            _write_files(workdir, project)
+            try:
+                completed = _run_restricted(network, ["-c", _RUN_MAIN], workdir, timeout)
+            except (subprocess.TimeoutExpired, OSError):
+                return None
+        runs[label] = {"returncode": completed.returncode, "stdout": completed.stdout}
+    return {"same": runs["flat"] == runs["split"], **runs}
+
+
+def score_candidate(code: str, tests: Optional[str] = None, execute: bool = False) -> Dict:
+    """
+    Note un candidat : compilation, contrôles statiques, puis taux de
+    réussite des tests quand ils sont disponibles et que leur exécution
+    est autorisée (execute, désactivé par défaut : voir run_generated_tests)
+
+    Returns:
+        Dict avec score (plus haut = meilleur) et détails
+    """
+    compiles, error = compile_check(code)
+    issues = static_issues(code) if compiles else []
+    test_result = run_generated_tests(code, tests) if compiles and tests and execute else None
+
+    score = 0.0
+    if compiles:
+        score = 100.0 - 5.0 * min(len(issues), 10)
+        if test_result is not None:
+            score += 100.0 * test_result["pass_rate"]
+
+    return {
+        "score": score,
+        "compiles": compiles,
+        "compile_error": error,
+        "issues": issues,
+        "tests": test_result
+    }
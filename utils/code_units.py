@@ -0,0 +1,242 @@
+"""
+Découpage du code en unités (fonctions, classes) et diff au niveau de l'AST
+Sert à la revue QA incrémentale (seules les unités modifiées sont revues,
+les verdicts et tests des unités intactes sont reportés) et à la revue
+map-reduce des gros fichiers (unités revues en parallèle puis fusionnées).
+"""
+
+import ast
+import hashlib
+from typing import Dict, Iterable, List, Optional, Set
+
+# Pseudo-unité regroupant tout ce qui n'est ni fonction ni classe (imports, constantes, main)
+MODULE_UNIT = "<module>"
+
+
+def _references(node: ast.AST) -> Set[str]:
+    """Noms utilisés dans un nœud (variables, appels, attributs)"""
+    names = set()
+    for child in ast.walk(node):
+        if isinstance(child, ast.Name):
+            names.add(child.id)
+        elif isinstance(child, ast.Attribute):
+            names.add(child.attr)
+    return names
+
+
+def _node_start(node: ast.AST) -> int:
+    """Première ligne d'un nœud, décorateurs compris"""
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+
+def _node_source(lines: List[str], node: ast.AST) -> str:
+    """
+    Source d'un nœud de premier niveau par découpage des lignes
+    (ast.get_source_segment redécoupe tout le fichier à chaque appel)
+    """
+    return "\n".join(lines[_node_start(node) - 1:node.end_lineno])
+
+
+def extract_units(code: str) -> Optional[Dict[str, Dict]]:
+    """
+    Unités de premier niveau d'un module
+
+    Returns:
+        {nom: {source, hash, lines, references, signature}}, ou None si le code ne compile pas
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+
+    units: Dict[str, Dict] = {}
+    module_parts = []
+    lines = code.splitlines()
+    for node in tree.body:
+        source = _node_source(lines, node)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            start = _node_start(node)
+            units[node.name] = {
+                "source": source,
+                "hash": hashlib.sha1(ast.dump(node).encode("utf-8")).hexdigest(),
+                "lines": (start, node.end_lineno),
+                "references": _references(node) - {node.name},
+                "signature": _signature(node)
+            }
+        else:
+            module_parts.append((node, source))
+
+    if module_parts:
+        units[MODULE_UNIT] = {
+            "source": "\n".join(source for _, source in module_parts),
+            "hash": hashlib.sha1("".join(ast.dump(node) for node, _ in module_parts).encode("utf-8")).hexdigest(),
+            "lines": (module_parts[0][0].lineno, module_parts[-1][0].end_lineno),
+            "references": set().union(*(_references(node) for node, _ in module_parts)),
+            "signature": ""
+        }
+    return units
+
+
+def _signature(node: ast.AST) -> str:
+    """Signature d'une fonction ou d'une classe, avec la première ligne de docstring"""
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(ast.unparse(base) for base in node.bases)
+        header = f"class {node.name}({bases})" if bases else f"class {node.name}"
+        methods = [
+            f"    {_signature(child).splitlines()[0]}"
+            for child in node.body if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ]
+        lines = [header] + methods
+    else:
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        lines = [f"{prefix} {node.name}({ast.unparse(node.args)}){returns}"]
+
+    docstring = ast.get_docstring(node)
+    if docstring:
+        lines.insert(1, f'    """{docstring.splitlines()[0]}"""')
+    return "\n".join(lines)
+
+
+def diff_units(previous: Dict[str, Dict], current: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """Unités ajoutées, modifiées, supprimées et inchangées entre deux versions"""
+    return {
+        "added": [name for name in current if name not in previous],
+        "modified": [name for name in current if name in previous and current[name]["hash"] != previous[name]["hash"]],
+        "removed": [name for name in previous if name not in current],
+        "unchanged": [name for name in current if name in previous and current[name]["hash"] == previous[name]["hash"]]
+    }
+
+
+def callers_of(units: Dict[str, Dict], names: Iterable[str]) -> List[str]:
+    """Unités qui référencent l'une des unités `names` (contexte d'appel)"""
+    targets = set(names)
+    return [name for name, unit in units.items() if name not in targets and unit["references"] & targets]
+
+
+def interface_summary(units: Dict[str, Dict], names: Iterable[str]) -> str:
+    """Signatures (et docstrings courtes) des unités `names`"""
+    return "\n\n".join(units[name]["signature"] for name in names if units[name]["signature"])
+
+
+def unit_at_line(units: Dict[str, Dict], line: int) -> Optional[str]:
+    """Unité contenant la ligne `line` (None si hors de toute fonction ou classe)"""
+    for name, unit in units.items():
+        start, end = unit["lines"]
+        if name != MODULE_UNIT and start <= line <= end:
+            return name
+    return None
+
+
+def split_tests(tests: str) -> Optional[Dict]:
+    """
+    Sépare un fichier de tests en en-tête (imports, fixtures, helpers) et tests
+
+    Returns:
+        {"header": [sources], "tests": {nom: {source, targets}}}, ou None si non compilable
+    """
+    try:
+        tree = ast.parse(tests)
+    except SyntaxError:
+        return None
+
+    header, cases = [], {}
+    lines = tests.splitlines()
+    for node in tree.body:
+        source = _node_source(lines, node)
+        is_test = isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and \
+            node.name.lower().startswith("test")
+        if is_test:
+            cases[node.name] = {
+                "source": source,
+                "targets": _references(node)
+            }
+        else:
+            header.append(source)
+    return {"header": header, "tests": cases}
+
+
+def merge_tests(previous_tests: str, new_tests: str, stale_units: Iterable[str]) -> Dict:
+    """
+    Fusionne les tests : ceux des unités intactes sont conservés, ceux
+    qui visent une unité modifiée ou supprimée sont remplacés par les nouveaux
+
+    Returns:
+        {"tests": code fusionné, "carried": nombre de tests reportés}
+    """
+    previous = split_tests(previous_tests or "")
+    new = split_tests(new_tests or "")
+    if previous is None or new is None:
+        return {"tests": new_tests, "carried": 0}
+
+    stale = set(stale_units)
+    kept = [
+        case["source"] for name, case in previous["tests"].items()
+        if name not in new["tests"] and not (case["targets"] & stale)
+    ]
+    header = list(previous["header"])
+    header += [part for part in new["header"] if part not in header]
+
+    sections = ["\n".join(header)] if header else []
+    sections += kept + [case["source"] for case in new["tests"].values()]
+    return {"tests": "\n\n\n".join(sections).strip() + "\n", "carried": len(kept)}
+
+
+def batch_units(units: Dict[str, Dict], max_chars: int) -> List[List[str]]:
+    """Regroupe les unités (dans l'ordre) en lots d'au plus `max_chars` caractères"""
+    batches, current, size = [], [], 0
+    for name, unit in units.items():
+        length = len(unit["source"])
+        if current and size + length > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(name)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def combine_tests(test_files: Iterable[str]) -> str:
+    """
+    Concatène plusieurs fichiers de tests : en-têtes dédupliqués, tests
+    homonymes renommés (ou ignorés s'ils sont identiques)
+    """
+    header, cases = [], {}
+    for tests in test_files:
+        parsed = split_tests(tests or "")
+        if parsed is None:
+            continue
+        header += [part for part in parsed["header"] if part not in header]
+        for name, case in parsed["tests"].items():
+            if any(existing == case["source"] for existing in cases.values()):
+                continue
+            unique, suffix = name, 2
+            while unique in cases:
+                unique, suffix = f"{name}_{suffix}", suffix + 1
+            source = case["source"]
+            if unique != name:
+                source = source.replace(f"def {name}(", f"def {unique}(", 1).replace(f"class {name}", f"class {unique}", 1)
+            cases[unique] = source
+
+    sections = ["\n".join(header)] if header else []
+    sections += list(cases.values())
+    return "\n\n\n".join(sections).strip() + "\n" if sections else ""
+
+
+def condense_code(code: str, focus: Iterable[str]) -> str:
+    """
+    Vue condensée d'un gros module : source complète des unités `focus`
+    (et du niveau module), signatures seules pour les autres
+    """
+    units = extract_units(code)
+    if units is None:
+        return code
+    keep = set(focus) | {MODULE_UNIT}
+    parts = []
+    for name, unit in units.items():
+        if name in keep or not unit["signature"]:
+            parts.append(unit["source"])
+        else:
+            parts.append(f"{unit['signature']}\n    ...")
+    return "\n\n\n".join(parts)
@@ -0,0 +1,134 @@
+"""
+Détection de convergence de la boucle Dev → QA → Tech Lead
+Compare les itérations successives (code normalisé par l'AST, empreintes
+des bugs critiques, score QA) pour repérer une correction qui ne progresse
+plus : on change alors de stratégie, puis on arrête si rien ne bouge.
+"""
+
+import ast
+import difflib
+import hashlib
+import re
+from typing import Dict, List, Optional
+
+
+def normalize_code(code: str) -> str:
+    """
+    Forme canonique du code : reformaté par l'AST, sans commentaires ni
+    docstrings (repli sur les lignes non vides si le code ne compile pas)
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        lines = (line.split("#", 1)[0].strip() for line in code.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            body = node.body
+            if body and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                node.body = body[1:] or [ast.Pass()]
+    return ast.unparse(tree)
+
+
+def code_similarity(previous: str, current: str) -> float:
+    """Ratio difflib (0 à 1) entre deux codes normalisés, ligne à ligne"""
+    return difflib.SequenceMatcher(
+        None,
+        normalize_code(previous).splitlines(),
+        normalize_code(current).splitlines()
+    ).ratio()
+
+
+def bug_fingerprint(bug: str) -> str:
+    """Empreinte d'un bug insensible aux numéros de ligne, à la casse et à la ponctuation"""
+    text = bug.lower()
+    text = re.sub(r"\blignes?\s*\d+(\s*[-à]\s*\d+)?", " ", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = " ".join(text.split())
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+class ConvergenceMonitor:
+    """
+    Suit la progression des itérations et décide de continuer, changer
+    de stratégie (« escalate ») ou arrêter (« stop »)
+
+    Args:
+        similarity_threshold: Au-delà, le nouveau code est considéré quasi identique
+        bug_overlap_threshold: Part des bugs critiques déjà signalés à l'itération précédente
+        max_escalations: Changements de stratégie tentés avant d'arrêter
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        bug_overlap_threshold: float = 0.8,
+        max_escalations: int = 1
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.bug_overlap_threshold = bug_overlap_threshold
+        self.max_escalations = max_escalations
+        self.escalations = 0
+        self.history: List[Dict] = []
+        self._previous: Optional[Dict] = None
+
+    def observe(
+        self,
+        iteration: int,
+        code: str,
+        critical_bugs: List[str],
+        quality_score: Optional[int]
+    ) -> Dict:
+        """
+        Enregistre une itération revue par le QA
+
+        Returns:
+            Dict avec les mesures, l'action (continue / escalate / stop) et sa raison
+        """
+        fingerprints = [bug_fingerprint(bug) for bug in critical_bugs]
+        bugs = set(fingerprints)
+        verdict = {
+            "iteration": iteration,
+            "code_similarity": None,
+            "bug_overlap": None,
+            "score_delta": None,
+            "repeated_bugs": [],
+            "action": "continue",
+            "reason": None
+        }
+
+        previous = self._previous
+        self._previous = {"code": code, "bugs": bugs, "score": quality_score}
+        if previous is None:
+            self.history.append(verdict)
+            return verdict
+
+        similarity = code_similarity(previous["code"], code)
+        overlap = len(bugs & previous["bugs"]) / len(bugs) if bugs else 0.0
+        if quality_score is not None and previous["score"] is not None:
+            verdict["score_delta"] = quality_score - previous["score"]
+        verdict["code_similarity"] = round(similarity, 3)
+        verdict["bug_overlap"] = round(overlap, 3)
+        verdict["repeated_bugs"] = [
+            bug for bug, fingerprint in zip(critical_bugs, fingerprints) if fingerprint in previous["bugs"]
+        ]
+
+        reasons = []
+        if similarity >= self.similarity_threshold:
+            reasons.append(f"code quasi identique ({similarity:.0%} de similarité)")
+        if bugs and overlap >= self.bug_overlap_threshold:
+            reasons.append(f"{len(verdict['repeated_bugs'])}/{len(critical_bugs)} bug(s) critique(s) déjà signalé(s)")
+        improved = verdict["score_delta"] is not None and verdict["score_delta"] > 0
+
+        if reasons and not improved:
+            verdict["reason"] = ", ".join(reasons)
+            if self.escalations < self.max_escalations:
+                self.escalations += 1
+                verdict["action"] = "escalate"
+            else:
+                verdict["action"] = "stop"
+
+        self.history.append(verdict)
+        return verdict
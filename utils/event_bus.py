@@ -0,0 +1,155 @@
+"""
+Bus d'événements du run
+Les étapes publient des événements typés (début/fin d'étape, tokens, bug
+trouvé, décision...) ; chaque abonné les reçoit dans son propre thread via
+une file bornée. La publication ne bloque jamais : un abonné lent perd ses
+événements les plus anciens au lieu de ralentir le pipeline.
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+RUN_START = "run_start"
+RUN_END = "run_end"
+STAGE_START = "stage_start"
+STAGE_END = "stage_end"
+TOKEN_DELTA = "token_delta"
+BUG_FOUND = "bug_found"
+DECISION = "decision"
+# Toute entrée de la trace d'exécution (messages affichés à l'utilisateur)
+TRACE = "trace"
+
+EVENT_TYPES = (RUN_START, RUN_END, STAGE_START, STAGE_END, TOKEN_DELTA, BUG_FOUND, DECISION, TRACE)
+
+# Marque de fin de la file d'un abonné
+_STOP = object()
+
+
+class Subscription:
+    """
+    Abonné du bus : une file bornée et un thread qui appelle le callback
+
+    Args:
+        callback: Fonction appelée avec chaque événement (dict)
+        types: Types d'événements reçus (None = tous)
+        name: Nom affiché dans les statistiques
+        max_queue: Événements en attente au plus ; au-delà, les plus anciens sont perdus
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Dict], None],
+        types: Optional[Iterable[str]] = None,
+        name: Optional[str] = None,
+        max_queue: int = 1000
+    ):
+        self.callback = callback
+        self.types = set(types) if types else None
+        self.name = name or getattr(callback, "__name__", "abonné")
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.stats = {"delivered": 0, "dropped": 0, "errors": 0}
+        # Plusieurs étapes concurrentes peuvent publier en même temps
+        self._offer_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._deliver, name=f"event-{self.name}", daemon=True)
+        self._thread.start()
+
+    def accepts(self, event: Dict) -> bool:
+        return self.types is None or event["type"] in self.types
+
+    def offer(self, event: Dict):
+        """Met l'événement en file sans jamais bloquer l'émetteur"""
+        with self._offer_lock:
+            while True:
+                try:
+                    self.queue.put_nowait(event)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.stats["dropped"] += 1
+                    except queue.Empty:
+                        pass
+
+    def _deliver(self):
+        while True:
+            event = self.queue.get()
+            if event is _STOP:
+                return
+            try:
+                self.callback(event)
+                self.stats["delivered"] += 1
+            except Exception:
+                # Un abonné défaillant ne doit ni arrêter sa file ni remonter dans le pipeline
+                self.stats["errors"] += 1
+
+    def close(self, timeout: Optional[float] = None):
+        """Livre les événements en attente puis arrête le thread"""
+        self.offer(_STOP)
+        self._thread.join(timeout)
+
+
+class EventBus:
+    """Diffuse les événements d'un run à tous les abonnés, sans attendre aucun d'eux"""
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        callback: Callable[[Dict], None],
+        types: Optional[Iterable[str]] = None,
+        name: Optional[str] = None,
+        max_queue: int = 1000
+    ) -> Subscription:
+        """Abonne un callback (exécuté dans son propre thread)"""
+        subscription = Subscription(callback, types, name, max_queue)
+        with self._lock:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, timeout: Optional[float] = None):
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+        subscription.close(timeout)
+
+    def publish(self, event_type: str, **data) -> Dict:
+        """Publie un événement typé ; retourne l'événement publié"""
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Type d'événement inconnu : {event_type}")
+        event = {"type": event_type, "ts": time.time(), **data}
+        with self._lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            if subscription.accepts(event):
+                subscription.offer(event)
+        return event
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Livre les événements en attente et arrête tous les abonnés"""
+        with self._lock:
+            subscriptions, self.subscriptions = self.subscriptions, []
+        for subscription in subscriptions:
+            subscription.close(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Événements livrés, perdus et en erreur par abonné"""
+        with self._lock:
+            return {subscription.name: dict(subscription.stats) for subscription in self.subscriptions}
+
+
+def jsonl_writer(path: str) -> Callable[[Dict], None]:
+    """Abonné qui expédie chaque événement en JSON Lines dans un fichier"""
+    lock = threading.Lock()
+
+    def write(event: Dict):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    write.__name__ = "jsonl_writer"
+    return write
@@ -0,0 +1,263 @@
+"""
+Requêtes LLM « hedgées » pour réduire la latence de queue
+Si l'appel principal dépasse un percentile glissant des latences observées,
+un doublon est envoyé à un backend secondaire ; la première réponse complète
+gagne et l'autre appel est annulé. En streaming, la course porte sur le
+premier fragment : le flux le plus rapide est lu, l'autre est fermé.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+from utils.token_usage import messages_tokens, response_tokens
+
+
+# Boucle d'événements unique, dans un thread dédié, pour tous les appels synchrones :
+# les clients asynchrones (AsyncGroq/httpx) gardent un pool de connexions lié à
+# la boucle qui les a ouvertes, une nouvelle boucle par appel les casserait
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _shared_loop() -> asyncio.AbstractEventLoop:
+    """Boucle partagée, démarrée au premier appel"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-event-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coroutine):
+    """Exécute une coroutine depuis du code synchrone, sur la boucle partagée"""
+    loop = _shared_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("run_sync appelé depuis la boucle partagée : utiliser await")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+class HedgingPolicy:
+    """Délai de déclenchement du doublon : percentile des dernières latences"""
+
+    def __init__(
+        self,
+        percentile: float = 90,
+        window: int = 50,
+        min_samples: int = 5,
+        initial_delay_s: float = 30.0,
+        min_delay_s: float = 1.0
+    ):
+        """
+        Args:
+            percentile: Percentile des latences au-delà duquel on hedge
+            window: Nombre de latences conservées
+            min_samples: Échantillons requis avant d'utiliser le percentile
+            initial_delay_s: Délai utilisé tant que min_samples n'est pas atteint
+            min_delay_s: Délai plancher (évite de doubler tous les appels)
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay_s = initial_delay_s
+        self.min_delay_s = min_delay_s
+        self.latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float):
+        with self._lock:
+            self.latencies.append(latency_s)
+
+    def delay(self) -> float:
+        """Délai avant l'envoi du doublon (secondes)"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_delay_s
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay_s, samples[index])
+
+
+async def _first_chunk(stream):
+    """Premier fragment d'un flux asynchrone (None s'il est vide)"""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class HedgedLLM:
+    """
+    Enveloppe un LLM principal et un backend secondaire (second modèle
+    ou Ollama local) derrière la même interface invoke/ainvoke/stream/astream.
+
+    Args:
+        primary: Client principal
+        secondary: Backend secondaire
+        policy: Délai du doublon pour un appel complet
+        first_token_policy: Délai du doublon en streaming (temps jusqu'au
+            premier fragment, bien plus court qu'un appel complet)
+    """
+
+    def __init__(
+        self,
+        primary,
+        secondary,
+        policy: Optional[HedgingPolicy] = None,
+        first_token_policy: Optional[HedgingPolicy] = None
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.policy = policy or HedgingPolicy()
+        self.first_token_policy = first_token_policy or HedgingPolicy(initial_delay_s=10.0, min_delay_s=0.5)
+        self.stats = {
+            "calls": 0,
+            "hedges": 0,
+            "secondary_wins": 0,
+            "cancelled": 0,
+            "wasted_tokens": 0
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return getattr(self.primary, "model_name", None) or getattr(self.primary, "model", None)
+
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    def invoke(self, messages, **kwargs):
+        """Version synchrone : exécute ainvoke sur la boucle partagée"""
+        return run_sync(self.ainvoke(messages, **kwargs))
+
+    async def ainvoke(self, messages, **kwargs):
+        self._count("calls")
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self.primary.ainvoke(messages, **kwargs))
+
+        done, _ = await asyncio.wait({primary}, timeout=self.policy.delay())
+        if done:
+            self.policy.record(time.perf_counter() - start)
+            return primary.result()
+
+        # L'appel principal est trop lent : doublon vers le backend secondaire
+        self._count("hedges")
+        secondary = asyncio.ensure_future(self.secondary.ainvoke(messages, **kwargs))
+        pending = {primary, secondary}
+        winner = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Si les deux terminent ensemble, le principal est prioritaire
+            for task in sorted(done, key=lambda t: t is not primary):
+                if not task.exception():
+                    winner = task
+                    break
+
+        self.policy.record(time.perf_counter() - start)
+        loser = secondary if winner is primary else primary
+
+        if winner is None:
+            raise primary.exception()
+
+        if winner is secondary:
+            self._count("secondary_wins")
+
+        # Le perdant est annulé : son prompt a été facturé pour rien
+        if not loser.done():
+            loser.cancel()
+            self._count("cancelled")
+            self._count("wasted_tokens", messages_tokens(messages))
+        elif not loser.cancelled() and not loser.exception():
+            self._count("wasted_tokens", response_tokens(loser.result(), messages)["total"])
+
+        return winner.result()
+
+    def stream(self, messages, **kwargs):
+        """Version synchrone de astream : chaque fragment est lu sur la boucle partagée"""
+        async def next_chunk(stream):
+            try:
+                return False, await stream.__anext__()
+            except StopAsyncIteration:
+                return True, None
+
+        stream = self.astream(messages, **kwargs)
+        try:
+            while True:
+                finished, chunk = run_sync(next_chunk(stream))
+                if finished:
+                    return
+                yield chunk
+        finally:
+            # Fermé par l'appelant (arrêt anticipé) : le flux gagnant est fermé à son tour
+            run_sync(stream.aclose())
+
+    async def astream(self, messages, **kwargs):
+        self._count("calls")
+        start = time.perf_counter()
+        streams = {}
+        primary_stream = self.primary.astream(messages, **kwargs)
+        primary = asyncio.ensure_future(_first_chunk(primary_stream))
+        streams[primary] = primary_stream
+
+        done, _ = await asyncio.wait({primary}, timeout=self.first_token_policy.delay())
+        if not done:
+            # Premier fragment trop lent : doublon vers le backend secondaire
+            self._count("hedges")
+            secondary_stream = self.secondary.astream(messages, **kwargs)
+            streams[asyncio.ensure_future(_first_chunk(secondary_stream))] = secondary_stream
+
+        pending = set(streams)
+        winner = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Si les deux répondent ensemble, le principal est prioritaire
+            for task in sorted(done, key=lambda t: t is not primary):
+                if not task.exception():
+                    winner = task
+                    break
+        self.first_token_policy.record(time.perf_counter() - start)
+
+        for task, stream in streams.items():
+            if task is winner:
+                continue
+            if not task.done():
+                task.cancel()
+                self._count("cancelled")
+                self._count("wasted_tokens", messages_tokens(messages))
+            await asyncio.gather(task, return_exceptions=True)
+            await stream.aclose()
+
+        if winner is None:
+            raise primary.exception()
+        if winner is not primary:
+            self._count("secondary_wins")
+
+        stream = streams[winner]
+        try:
+            chunk = winner.result()
+            if chunk is None:
+                return
+            yield chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+
+def merge_stats(llms) -> Dict[str, Any]:
+    """Cumule les statistiques de plusieurs HedgedLLM"""
+    total = {"calls": 0, "hedges": 0, "secondary_wins": 0, "cancelled": 0, "wasted_tokens": 0}
+    for llm in llms:
+        if isinstance(llm, HedgedLLM):
+            for key in total:
+                total[key] += llm.stats[key]
+    total["hedge_rate"] = round(total["hedges"] / total["calls"], 3) if total["calls"] else 0.0
+    return total
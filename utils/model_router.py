@@ -0,0 +1,189 @@
+"""
+Routage des modèles par agent et par itération
+Chaque profil de latence ("fast", "balanced", "thorough") associe à chaque
+agent un niveau de modèle, un plafond max_tokens et une variante de prompt.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from utils.hedging import HedgedLLM, HedgingPolicy, merge_stats
+
+
+# Choix de la sidebar -> identifiant du fournisseur
+PROVIDERS = {
+    "Groq (Gratuit)": "groq",
+    "Ollama (Local)": "ollama",
+    "OpenAI (Payant)": "openai",
+}
+
+# Modèles par fournisseur et par niveau
+MODELS = {
+    "groq": {
+        "light": "llama-3.1-8b-instant",
+        "heavy": "moonshotai/kimi-k2-instruct-0905",
+    },
+    "ollama": {
+        "light": "llama3.2:3b",
+        "heavy": "qwen2.5-coder:14b",
+    },
+    "openai": {
+        "light": "gpt-4o-mini",
+        "heavy": "gpt-4o",
+    },
+}
+
+DEFAULT_TEMPERATURE = 0.3
+
+# Profils : route par agent (po, dev, qa, tech_lead, reviewer), surcharges optionnelles
+# par itération dans "iterations" (appliquées à partir de l'itération indiquée)
+PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "fast": {
+        "po": {"tier": "light", "max_tokens": 1024, "prompt_variant": "concise"},
+        "dev": {"tier": "heavy", "max_tokens": 3072, "prompt_variant": "concise"},
+        "qa": {"tier": "light", "max_tokens": 2048, "prompt_variant": "concise"},
+        "tech_lead": {"tier": "light", "max_tokens": 768, "prompt_variant": "concise"},
+        "reviewer": {"tier": "light", "max_tokens": 512, "prompt_variant": "concise"},
+    },
+    "balanced": {
+        "po": {"tier": "light", "max_tokens": 2048, "prompt_variant": "standard"},
+        "dev": {"tier": "heavy", "max_tokens": 4096, "prompt_variant": "standard"},
+        "qa": {
+            "tier": "heavy", "max_tokens": 3072, "prompt_variant": "standard",
+            # Les revues de correction portent sur un code déjà revu
+            "iterations": {2: {"tier": "light", "prompt_variant": "concise"}},
+        },
+        "tech_lead": {"tier": "light", "max_tokens": 1536, "prompt_variant": "concise"},
+        "reviewer": {"tier": "light", "max_tokens": 768, "prompt_variant": "concise"},
+    },
+    "thorough": {
+        "po": {"tier": "heavy", "max_tokens": 4096, "prompt_variant": "standard"},
+        "dev": {"tier": "heavy", "max_tokens": 8192, "prompt_variant": "standard"},
+        "qa": {"tier": "heavy", "max_tokens": 4096, "prompt_variant": "standard"},
+        "tech_lead": {"tier": "heavy", "max_tokens": 2048, "prompt_variant": "standard"},
+        "reviewer": {"tier": "heavy", "max_tokens": 1024, "prompt_variant": "concise"},
+    },
+}
+
+
+def create_llm(
+    provider: str,
+    model: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_tokens: Optional[int] = None,
+    api_key: Optional[str] = None
+):
+    """
+    Instancie le client LangChain du fournisseur
+
+    Les imports sont faits à la demande : seul le client du fournisseur
+    choisi doit être installé.
+    """
+    if provider == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(model=model, temperature=temperature, max_tokens=max_tokens, api_key=api_key)
+
+    if provider == "ollama":
+        from langchain_community.chat_models import ChatOllama
+        return ChatOllama(model=model, temperature=temperature, num_predict=max_tokens)
+
+    if provider == "openai":
+        try:
+            from langchain_community.chat_models import ChatOpenAI
+        except ImportError as exc:
+            raise ImportError("Le support OpenAI nécessite le package `openai`") from exc
+        return ChatOpenAI(model=model, temperature=temperature, max_tokens=max_tokens, api_key=api_key)
+
+    raise ValueError(f"Fournisseur inconnu : {provider}")
+
+
+class ModelRouter:
+    """Associe chaque (agent, itération) à un LLM selon le profil choisi"""
+
+    def __init__(
+        self,
+        profile: str = "balanced",
+        provider: str = "groq",
+        api_key: Optional[str] = None,
+        llm_factory: Callable[..., Any] = create_llm,
+        hedge: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Args:
+            profile: Profil de latence (clé de PROFILES)
+            provider: Fournisseur principal (clé de MODELS)
+            api_key: Clé API du fournisseur principal
+            llm_factory: Fabrique de LLM (create_llm par défaut)
+            hedge: Active le hedging (opt-in). Clés : provider et model du
+                backend secondaire (par défaut le modèle léger du fournisseur
+                principal), plus les paramètres de HedgingPolicy.
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Profil inconnu : {profile} (disponibles : {', '.join(PROFILES)})")
+        if provider not in MODELS:
+            raise ValueError(f"Fournisseur inconnu : {provider}")
+
+        self.profile = profile
+        self.provider = provider
+        self.api_key = api_key
+        self.llm_factory = llm_factory
+        self.hedge = hedge
+        self._llms: Dict[tuple, Any] = {}
+
+    def route(self, agent: str, iteration: int = 1) -> Dict[str, Any]:
+        """
+        Résout la route d'un agent pour une itération
+
+        Returns:
+            Dict avec provider, model, max_tokens, temperature, prompt_variant
+        """
+        config = dict(PROFILES[self.profile][agent])
+        overrides = config.pop("iterations", {})
+        for start in sorted(overrides):
+            if iteration >= start:
+                config.update(overrides[start])
+
+        return {
+            "provider": self.provider,
+            "model": MODELS[self.provider][config["tier"]],
+            "max_tokens": config.get("max_tokens"),
+            "temperature": config.get("temperature", DEFAULT_TEMPERATURE),
+            "prompt_variant": config.get("prompt_variant", "standard"),
+        }
+
+    def llm_for(self, agent: str, iteration: int = 1):
+        """LLM à utiliser pour cet agent (un client par configuration distincte)"""
+        route = self.route(agent, iteration)
+        key = (route["provider"], route["model"], route["max_tokens"], route["temperature"])
+        if key not in self._llms:
+            llm = self.llm_factory(
+                provider=route["provider"],
+                model=route["model"],
+                temperature=route["temperature"],
+                max_tokens=route["max_tokens"],
+                api_key=self.api_key
+            )
+            if self.hedge:
+                llm = self._hedged(llm, route)
+            self._llms[key] = llm
+        return self._llms[key]
+
+    def _hedged(self, primary, route: Dict[str, Any]) -> HedgedLLM:
+        """Associe au LLM principal son backend secondaire"""
+        options = dict(self.hedge)
+        provider = options.pop("provider", self.provider)
+        model = options.pop("model", None) or MODELS[provider]["light"]
+        secondary = self.llm_factory(
+            provider=provider,
+            model=model,
+            temperature=route["temperature"],
+            max_tokens=route["max_tokens"],
+            api_key=self.api_key if provider == self.provider else None
+        )
+        # Une politique par route : les latences du Dev et du PO diffèrent
+        return HedgedLLM(primary, secondary, HedgingPolicy(**options))
+
+    def hedging_stats(self) -> Optional[Dict[str, Any]]:
+        """Compteurs de hedging cumulés (None si le hedging est désactivé)"""
+        if not self.hedge:
+            return None
+        return merge_stats(self._llms.values())
@@ -0,0 +1,289 @@
+"""
+Projets multi-fichiers
+Le code d'un projet circule entre les agents comme un module unique où
+chaque fichier est précédé d'un marqueur « # ==== FICHIER : nom.py ==== » :
+QA, Tech Lead et vérifications statiques le traitent comme un seul module,
+et split_project en reconstruit les fichiers (imports entre fichiers compris).
+"""
+
+import ast
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+FILE_MARKER = "# ==== FICHIER : {name} ===="
+_MARKER_RE = re.compile(r"^# ==== FICHIER : (\S+) ====[ \t]*$", re.MULTILINE)
+
+INTERFACE_FILE = "interface.py"
+MAIN_FILE = "main.py"
+MAIN_GUARD = 'if __name__ == "__main__":\n    main()'
+
+
+def story_file(story_id: str) -> str:
+    """Fichier d'une User Story (US1 → us1.py)"""
+    return f"{story_id.lower()}.py"
+
+
+def _module(filename: str) -> str:
+    return filename[:-3] if filename.endswith(".py") else filename
+
+
+def _defined_names(tree: ast.Module) -> Set[str]:
+    """Noms définis au niveau du module (fonctions, classes, variables)"""
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            names.add(node.target.id)
+    return names
+
+
+def _safe_defined_names(code: str) -> Set[str]:
+    """Noms définis par un fichier (aucun s'il ne compile pas)"""
+    try:
+        return _defined_names(ast.parse(code))
+    except SyntaxError:
+        return set()
+
+
+def _is_main_guard(node: ast.AST) -> bool:
+    return (
+        isinstance(node, ast.If)
+        and isinstance(node.test, ast.Compare)
+        and isinstance(node.test.left, ast.Name)
+        and node.test.left.id == "__name__"
+    )
+
+
+def _is_stub(node: ast.AST) -> bool:
+    """Fonction sans implémentation (docstring puis `...`, `pass` ou NotImplementedError)"""
+    body = list(node.body)
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        body = body[1:]
+    if not body:
+        return True
+    if len(body) > 1:
+        return False
+    statement = body[0]
+    if isinstance(statement, ast.Pass):
+        return True
+    if isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Constant) \
+            and statement.value.value is Ellipsis:
+        return True
+    if isinstance(statement, ast.Raise) and statement.exc is not None:
+        exc = statement.exc.func if isinstance(statement.exc, ast.Call) else statement.exc
+        return isinstance(exc, ast.Name) and exc.id == "NotImplementedError"
+    return False
+
+
+def stubs(code: str) -> List[str]:
+    """Fonctions et méthodes non implémentées d'un module (« Classe.méthode » pour une méthode)"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return []
+    found = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_stub(node):
+            found.append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            found += [
+                f"{node.name}.{item.name}" for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_stub(item)
+            ]
+    return found
+
+
+def _strip_for_merge(code: str, project_modules: Set[str], keep_guard: bool = False) -> str:
+    """Retire d'un fichier les imports d'autres fichiers du projet et son bloc __main__"""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return code.strip()
+    dropped = set()
+    for node in tree.body:
+        internal = (
+            isinstance(node, ast.ImportFrom) and not node.level and node.module in project_modules
+        ) or (
+            isinstance(node, ast.Import) and all(alias.name in project_modules for alias in node.names)
+        )
+        if internal or (_is_main_guard(node) and not keep_guard):
+            dropped.update(range(node.lineno, node.end_lineno + 1))
+    lines = code.splitlines()
+    return "\n".join(line for number, line in enumerate(lines, 1) if number not in dropped).strip()
+
+
+def flatten_project(files: Dict[str, str]) -> str:
+    """Module unique équivalent au projet, chaque fichier précédé de son marqueur"""
+    modules = {_module(name) for name in files}
+    return "\n\n\n".join(
+        f"{FILE_MARKER.format(name=name)}\n{_strip_for_merge(code, modules, keep_guard=name == MAIN_FILE)}"
+        for name, code in files.items()
+    ) + "\n"
+
+
+def split_project(code: str) -> Optional[Dict[str, str]]:
+    """
+    Fichiers d'un module aplati par flatten_project (None sans marqueur)
+
+    Chaque nom utilisé par un fichier est importé depuis le dernier fichier
+    qui le définit, comme dans le module aplati où la dernière définition
+    l'emporte (une implémentation remplace le stub de l'interface). Les noms
+    définis par un fichier suivant sont importés en fin de fichier : ils
+    sont liés à l'appel, sans import circulaire. main.py réexporte tout le
+    projet (les tests font `from main import *`).
+    """
+    matches = list(_MARKER_RE.finditer(code))
+    if not matches:
+        return None
+
+    sections = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(code)
+        sections.append((match.group(1), code[match.end():end].strip()))
+    preamble = code[:matches[0].start()].strip()
+    if preamble:
+        sections[0] = (sections[0][0], f"{preamble}\n\n{sections[0][1]}")
+
+    trees = {}
+    for name, body in sections:
+        try:
+            trees[name] = ast.parse(body)
+        except SyntaxError:
+            trees[name] = None
+    order = {name: index for index, (name, _) in enumerate(sections)}
+    owners = _final_owners(sections, trees)
+
+    files: Dict[str, str] = {}
+    for name, body in sections:
+        tree = trees[name]
+        header, footer = [], []
+        if name == MAIN_FILE:
+            header = [f"from {_module(other)} import *" for other, _ in sections if other != MAIN_FILE]
+        elif tree is not None:
+            used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+            earlier: Dict[str, List[str]] = {}
+            later: Dict[str, List[str]] = {}
+            for used_name in sorted(used):
+                owner = owners.get(used_name)
+                if owner is None or owner == name:
+                    continue
+                target = earlier if order[owner] < order[name] else later
+                target.setdefault(owner, []).append(used_name)
+            header = [f"from {_module(owner)} import {', '.join(names)}" for owner, names in earlier.items()]
+            footer = [f"from {_module(owner)} import {', '.join(names)}  # noqa: E402" for owner, names in later.items()]
+        parts = header + ([""] if header else []) + [body] + (["", ""] + footer if footer else [])
+        files[name] = "\n".join(parts).strip() + "\n"
+    return files
+
+
+def _final_owners(sections: List[Tuple[str, str]], trees: Dict[str, Optional[ast.Module]]) -> Dict[str, str]:
+    """Dernier fichier définissant chaque nom : la définition retenue par le module aplati"""
+    owners: Dict[str, str] = {}
+    for name, _ in sections:
+        if trees[name] is not None:
+            owners.update({defined: name for defined in _defined_names(trees[name])})
+    return owners
+
+
+def split_mismatches(code: str) -> List[str]:
+    """
+    Noms qui, dans les fichiers de split_project, ne désignent pas la même
+    définition que dans le module aplati (vérification statique des liaisons
+    après exécution complète de chaque fichier, imports compris)
+
+    Returns:
+        Écarts « fichier : nom → fichier lié (module aplati : fichier attendu) »
+    """
+    return _binding_mismatches(split_project(code) or {})
+
+
+def _binding_mismatches(files: Dict[str, str]) -> List[str]:
+    """Écarts de liaison entre des fichiers de projet et leur module aplati (voir split_mismatches)"""
+    trees = {}
+    for name, source in files.items():
+        try:
+            trees[name] = ast.parse(source)
+        except SyntaxError:
+            trees[name] = None
+    sections = [(name, source) for name, source in files.items()]
+    owners = _final_owners(sections, trees)
+    modules = {_module(name): name for name in files}
+    bindings: Dict[str, Dict[str, str]] = {}
+
+    def load(name: str) -> Dict[str, str]:
+        # Comme sys.modules : un module en cours d'import expose ses liaisons déjà faites
+        if name in bindings:
+            return bindings[name]
+        bound = bindings[name] = {}
+        for node in trees[name].body if trees[name] is not None else []:
+            if isinstance(node, ast.ImportFrom) and not node.level and node.module in modules:
+                source = load(modules[node.module])
+                for alias in node.names:
+                    if alias.name == "*":
+                        bound.update({key: value for key, value in source.items() if not key.startswith("_")})
+                    elif alias.name in source:
+                        bound[alias.asname or alias.name] = source[alias.name]
+            else:
+                wrapper = ast.Module(body=[node], type_ignores=[])
+                bound.update({defined: name for defined in _defined_names(wrapper)})
+        return bound
+
+    # Ordre d'import réel : main.py (point d'entrée et module importé par les tests) d'abord
+    for name in sorted(files, key=lambda file: file != MAIN_FILE):
+        load(name)
+
+    mismatches = []
+    for name, tree in trees.items():
+        if tree is None:
+            continue
+        used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        for used_name in sorted(used & set(owners)):
+            if bindings[name].get(used_name) != owners[used_name]:
+                mismatches.append(
+                    f"{name} : {used_name} → {bindings[name].get(used_name, 'non défini')} "
+                    f"(module aplati : {owners[used_name]})"
+                )
+    return mismatches
+
+
+def merge_story_modules(interface: str, modules: Dict[str, str]) -> Dict:
+    """
+    Assemble l'interface commune et les fichiers des User Stories
+
+    Args:
+        interface: Code de interface.py (types partagés, signatures)
+        modules: Code de chaque User Story {nom de fichier: code}, dans l'ordre des stories
+
+    Returns:
+        Dict avec files (projet multi-fichiers), code (module aplati),
+        conflicts (noms définis par plusieurs stories), unimplemented
+        (stubs de l'interface qu'aucune story n'a implémentés) et
+        split_mismatches (noms liés autrement dans les fichiers que dans le module aplati)
+    """
+    files = {INTERFACE_FILE: interface, **modules}
+
+    definitions: Dict[str, List[str]] = {}
+    for name, code in modules.items():
+        for defined_name in _safe_defined_names(code):
+            definitions.setdefault(defined_name, []).append(name)
+    conflicts = [
+        f"{defined_name} ({', '.join(owners)})"
+        for defined_name, owners in sorted(definitions.items()) if len(owners) > 1
+    ]
+    unimplemented = [stub for stub in stubs(interface) if stub.split(".")[0] not in definitions]
+
+    if any("main" in _safe_defined_names(code) for code in files.values()):
+        files[MAIN_FILE] = MAIN_GUARD
+
+    code = flatten_project(files)
+    return {
+        "files": files,
+        "code": code,
+        "conflicts": conflicts,
+        "unimplemented": unimplemented,
+        "split_mismatches": split_mismatches(code)
+    }
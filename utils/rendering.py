@@ -0,0 +1,53 @@
+"""
+Affichage paresseux des résultats dans Streamlit
+Seule la section choisie est rendue (st.tabs envoie tous les onglets au
+navigateur), les longues listes (pensées, bugs, trace) le sont page par
+page, et une section placée dans un fragment (st.fragment) se relance
+seule quand ses widgets changent.
+"""
+
+from typing import List, Sequence, Tuple
+
+import streamlit as st
+
+# Éléments affichés par page
+PAGE_SIZE = 20
+
+
+def section_selector(sections: Sequence[str], key: str) -> str:
+    """Sélecteur de section remplaçant st.tabs : seule la section retournée est à rendre"""
+    return st.radio("Section", sections, horizontal=True, key=key, label_visibility="collapsed")
+
+
+def paginate(items: Sequence, key: str, page_size: int = PAGE_SIZE) -> Tuple[List, int]:
+    """
+    Page courante d'une liste (sélecteur de page affiché au-delà d'une page)
+
+    Returns:
+        Éléments de la page et index du premier d'entre eux
+    """
+    items = list(items)
+    if len(items) <= page_size:
+        return items, 0
+    pages = (len(items) + page_size - 1) // page_size
+    page = st.number_input(f"Page (sur {pages})", min_value=1, max_value=pages, value=1, step=1, key=key)
+    start = (page - 1) * page_size
+    st.caption(f"Éléments {start + 1} à {min(start + page_size, len(items))} sur {len(items)}")
+    return items[start:start + page_size], start
+
+
+def render_list(items: Sequence[str], key: str, numbered: bool = False, page_size: int = PAGE_SIZE):
+    """Liste markdown paginée, envoyée en un seul élément"""
+    page, start = paginate(items, key, page_size)
+    if numbered:
+        lines = [f"{start + index}. {item}" for index, item in enumerate(page, 1)]
+    else:
+        lines = [f"- {item}" for item in page]
+    st.markdown("\n".join(lines))
+
+
+def render_bugs(bugs: Sequence[str], key: str, critical: bool):
+    """Bugs paginés, numérotés, dans un seul encadré d'erreur (critiques) ou d'avertissement"""
+    page, start = paginate(bugs, key)
+    box = st.error if critical else st.warning
+    box("\n\n".join(f"{start + index}. {bug}" for index, bug in enumerate(page, 1)))
@@ -0,0 +1,285 @@
+"""
+Historique persistant des runs (SQLite)
+Conserve demandes, itérations (code, tests, rapport QA, décision) et durées
+pour relire un run passé sans aucun appel LLM.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+DEFAULT_DB_PATH = os.path.join(".ai_dev_team", "runs.db")
+
+# Au-delà de cette taille (octets), les textes sont stockés compressés
+COMPRESS_THRESHOLD = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    request TEXT NOT NULL,
+    request_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    iterations INTEGER NOT NULL,
+    quality_score INTEGER,
+    duration_s REAL,
+    profile TEXT,
+    result BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_request_hash ON runs(request_hash);
+
+CREATE TABLE IF NOT EXISTS iterations (
+    run_id TEXT NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    iteration INTEGER NOT NULL,
+    code BLOB,
+    tests BLOB,
+    qa_report BLOB,
+    decision BLOB,
+    dev_s REAL,
+    qa_s REAL,
+    tl_s REAL,
+    PRIMARY KEY (run_id, iteration)
+);
+"""
+
+
+def request_hash(request: str) -> str:
+    """Empreinte d'une demande (espaces et casse normalisés)"""
+    normalized = " ".join(request.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def pack_text(text: Optional[str]) -> Optional[bytes]:
+    """Encode un texte en blob, compressé (zlib) s'il est volumineux"""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if len(data) > COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(data, 6)
+    return b"t" + data
+
+
+def unpack_text(blob: Optional[bytes]) -> Optional[str]:
+    """Décode un blob produit par pack_text"""
+    if blob is None:
+        return None
+    data = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    return data.decode("utf-8")
+
+
+def _pack_json(value: Any) -> Optional[bytes]:
+    return pack_text(json.dumps(value, ensure_ascii=False)) if value is not None else None
+
+
+def _unpack_json(blob: Optional[bytes]) -> Any:
+    text = unpack_text(blob)
+    return json.loads(text) if text is not None else None
+
+
+class RunStore:
+    """Accès à la base d'historique des runs"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connexion transactionnelle (commit en sortie), fermée après usage"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _iterations_from_trace(trace: List[Dict]) -> Dict[int, Dict]:
+        """
+        Regroupe les sorties DEV/QA/TL de la trace par itération
+
+        Le rapport QA retenu est celui que le Tech Lead a jugé : fusionné
+        avec les constats des relecteurs (REVIEWS_MERGED) quand il y en a.
+        Les entrées sans résultat (trace allégée d'un run historisé) sont ignorées.
+        """
+        iterations: Dict[int, Dict] = {}
+        for entry in trace:
+            step = entry.get("step")
+            if step not in ("DEV_COMPLETE", "QA_COMPLETE", "REVIEWS_MERGED", "TL_COMPLETE") or "result" not in entry:
+                continue
+            data = iterations.setdefault(entry["iteration"], {})
+            result = entry["result"]
+            if step == "DEV_COMPLETE":
+                data["code"] = result["code"]
+                data["dev_s"] = entry.get("duration_s")
+            elif step in ("QA_COMPLETE", "REVIEWS_MERGED"):
+                if step == "QA_COMPLETE":
+                    data["tests"] = result["tests"]
+                    data["qa_s"] = entry.get("duration_s")
+                data["qa_report"] = {
+                    "critical_bugs": result["critical_bugs"],
+                    "minor_bugs": result["minor_bugs"],
+                    "suggestions": result["suggestions"],
+                    "quality_score": result["quality_score"],
+                    "analysis": result["analysis"]
+                }
+                if "reviewers" in result:
+                    data["qa_report"]["reviewers"] = result["reviewers"]
+            else:
+                data["decision"] = {
+                    key: value for key, value in result["decision"].items() if key != "full_analysis"
+                }
+                data["tl_s"] = entry.get("duration_s")
+        return iterations
+
+    @staticmethod
+    def _light_trace(trace: List[Dict]) -> List[Dict]:
+        """Trace sans les résultats complets des étapes (déjà éclatés en itérations)"""
+        return [{key: value for key, value in entry.items() if key != "result"} for entry in trace]
+
+    def save_run(self, request: str, result: Dict, run_id: Optional[str] = None) -> str:
+        """
+        Enregistre un run terminé
+
+        Args:
+            request: Demande utilisateur
+            result: Résultat de TeamOrchestrator.run
+            run_id: Identifiant imposé (généré sinon)
+
+        Returns:
+            Identifiant du run
+        """
+        run_id = run_id or uuid.uuid4().hex[:12]
+        metrics = result.get("metrics") or {}
+        # Les résultats des étapes sont éclatés en itérations : la trace est conservée sans eux
+        light_result = {
+            key: value for key, value in result.items() if key not in ("execution_trace", "agents")
+        }
+        light_result["execution_trace"] = self._light_trace(result.get("execution_trace", []))
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    time.strftime("%Y-%m-%d %H:%M:%S"),
+                    request,
+                    request_hash(request),
+                    result["validation"]["status"],
+                    int(result["success"]),
+                    result["iterations"],
+                    result["tests"]["quality_score"],
+                    metrics.get("total_s"),
+                    metrics.get("profile"),
+                    _pack_json(light_result)
+                )
+            )
+            conn.execute("DELETE FROM iterations WHERE run_id = ?", (run_id,))
+            for iteration, data in sorted(self._iterations_from_trace(result.get("execution_trace", [])).items()):
+                conn.execute(
+                    "INSERT INTO iterations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        iteration,
+                        pack_text(data.get("code")),
+                        pack_text(data.get("tests")),
+                        _pack_json(data.get("qa_report")),
+                        _pack_json(data.get("decision")),
+                        data.get("dev_s"),
+                        data.get("qa_s"),
+                        data.get("tl_s")
+                    )
+                )
+        return run_id
+
+    def list_runs(
+        self,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Liste les runs (plus récents d'abord), sans les blobs"""
+        query = (
+            "SELECT id, created_at, request, status, success, iterations, quality_score, "
+            "duration_s, profile FROM runs"
+        )
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def find_by_request(self, request: str) -> List[Dict]:
+        """Runs passés pour la même demande (via request_hash)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, created_at, status, quality_score FROM runs "
+                "WHERE request_hash = ? ORDER BY created_at DESC",
+                (request_hash(request),)
+            )
+            return [dict(row) for row in rows]
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        """Run complet : métadonnées, résultat final et itérations"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            iteration_rows = conn.execute(
+                "SELECT * FROM iterations WHERE run_id = ? ORDER BY iteration", (run_id,)
+            ).fetchall()
+
+        run = dict(row)
+        run["result"] = _unpack_json(run["result"])
+        run["iteration_details"] = [
+            {
+                "iteration": it["iteration"],
+                "code": unpack_text(it["code"]),
+                "tests": unpack_text(it["tests"]),
+                "qa_report": _unpack_json(it["qa_report"]),
+                "decision": _unpack_json(it["decision"]),
+                "timings": {"dev_s": it["dev_s"], "qa_s": it["qa_s"], "tl_s": it["tl_s"]}
+            }
+            for it in iteration_rows
+        ]
+        return run
+
+    def count_runs(self, status: Optional[str] = None, since: Optional[str] = None) -> int:
+        """Nombre de runs correspondant aux filtres de list_runs"""
+        query, clauses, params = "SELECT COUNT(*) FROM runs", [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._connect() as conn:
+            return conn.execute(query, params).fetchone()[0]
@@ -0,0 +1,227 @@
+"""
+Réutilisation entre runs
+Une demande identique à une demande passée (après normalisation : casse,
+accents, ponctuation, espaces) réutilise les User Stories du PO, et
+éventuellement le code VALIDÉ. Une demande seulement proche (similarité
+d'embeddings) n'est qu'une indication : ses User Stories sont fournies au
+PO comme exemple, jamais substituées, car deux demandes proches peuvent
+avoir des sens opposés (« CSV vers JSON » / « JSON vers CSV »).
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_INDEX_PATH = os.path.join(".ai_dev_team", "semantic_index.json")
+
+
+def context_hash(text: Optional[str]) -> Optional[str]:
+    """Empreinte du contexte PDF (None si absent)"""
+    if not text:
+        return None
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_request(text: str) -> str:
+    """Demande normalisée (casse, accents, ponctuation, espaces) ; l'ordre des mots est conservé"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+class HashingEmbedder:
+    """
+    Embedding léger sans modèle : mots, bigrammes et trigrammes de
+    caractères hachés dans un vecteur normalisé. Insensible à l'ordre des
+    mots : repli quand le modèle sentence-transformers est indisponible.
+    """
+
+    # Similarité à partir de laquelle un run passé est proposé comme exemple au PO
+    THRESHOLD = 0.9
+
+    # Raison du repli quand default_embedder n'a pas pu charger le modèle de phrase
+    fallback_reason: Optional[str] = None
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = normalize_request(text).split()
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+@functools.lru_cache(maxsize=2)
+def _sentence_model(model_name: str):
+    """Modèle sentence-transformers, chargé une fois par processus"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+class SentenceTransformerEmbedder:
+    """Embedding de phrase via sentence-transformers (modèle multilingue, chargé à la demande)"""
+
+    THRESHOLD = 0.8
+
+    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+        self.model = _sentence_model(model_name)
+        self.name = f"sentence-transformers:{model_name}"
+
+    def embed(self, text: str) -> np.ndarray:
+        return np.asarray(self.model.encode(text, normalize_embeddings=True), dtype=np.float32)
+
+
+def default_embedder():
+    """
+    Embedding de phrase si le modèle sentence-transformers peut être chargé,
+    sinon HashingEmbedder (dont fallback_reason indique pourquoi)
+    """
+    try:
+        return SentenceTransformerEmbedder()
+    except Exception as exc:
+        # Paquet absent, mais aussi machine hors ligne ou hub injoignable (OSError, HTTPError...)
+        embedder = HashingEmbedder()
+        embedder.fallback_reason = f"{type(exc).__name__}: {exc}"
+        return embedder
+
+
+class SemanticRunCache:
+    """Index persistant (JSON) des runs passés : correspondance exacte, ou proche par similarité cosinus"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_INDEX_PATH,
+        threshold: Optional[float] = None,
+        embedder=None
+    ):
+        """
+        Args:
+            path: Fichier JSON de l'index
+            threshold: Similarité minimale d'un run proche (THRESHOLD de l'embedder par défaut)
+            embedder: Objet exposant name et embed(text) (default_embedder() par défaut)
+        """
+        self.path = path
+        self.embedder = embedder or default_embedder()
+        self.threshold = threshold if threshold is not None else self.embedder.THRESHOLD
+        self.entries: List[Dict] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self._matrix = None
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _embeddings(self) -> np.ndarray:
+        if self._matrix is None:
+            # Entrées indexées avec un autre embedder : recalculées depuis le texte de la demande
+            stale = [entry for entry in self.entries if entry.get("embedder") != self.embedder.name]
+            for entry in stale:
+                entry["embedding"] = self.embedder.embed(entry["request"]).round(5).tolist()
+                entry["embedder"] = self.embedder.name
+            if stale:
+                self._save()
+            self._matrix = np.array([entry["embedding"] for entry in self.entries], dtype=np.float32)
+        return self._matrix
+
+    def exact(self, request: str, pdf_context: Optional[str] = None) -> Optional[Dict]:
+        """Run passé de même demande normalisée et même contexte PDF (le plus récent)"""
+        normalized = normalize_request(request)
+        pdf_hash = context_hash(pdf_context)
+        for entry in reversed(self.entries):
+            if entry["pdf_hash"] == pdf_hash and normalize_request(entry["request"]) == normalized:
+                return entry
+        return None
+
+    def lookup(self, request: str, pdf_context: Optional[str] = None) -> Tuple[Optional[Dict], float]:
+        """
+        Cherche le run passé le plus proche (même contexte PDF), à n'utiliser
+        que comme indication : voir exact() pour une réutilisation
+
+        Returns:
+            (entrée si la similarité atteint le seuil sinon None, meilleure similarité)
+        """
+        if not self.entries:
+            return None, 0.0
+
+        scores = self._embeddings() @ self.embedder.embed(request)
+        pdf_hash = context_hash(pdf_context)
+        best_index, best_score = None, 0.0
+        for index, score in enumerate(scores):
+            if self.entries[index]["pdf_hash"] == pdf_hash and score > best_score:
+                best_index, best_score = index, float(score)
+
+        if best_index is None or best_score < self.threshold:
+            return None, best_score
+        return self.entries[best_index], best_score
+
+    def add(
+        self,
+        request: str,
+        po_result: Dict,
+        pdf_context: Optional[str] = None,
+        validated_code: Optional[str] = None,
+        entry_id: Optional[str] = None
+    ) -> str:
+        """
+        Enregistre (ou met à jour) un run
+
+        Returns:
+            Identifiant de l'entrée
+        """
+        for entry in self.entries:
+            if entry_id and entry["id"] == entry_id:
+                if validated_code:
+                    entry["validated_code"] = validated_code
+                self._save()
+                return entry_id
+
+        entry = {
+            "id": entry_id or uuid.uuid4().hex[:12],
+            "request": request,
+            "pdf_hash": context_hash(pdf_context),
+            "embedding": self.embedder.embed(request).round(5).tolist(),
+            "embedder": self.embedder.name,
+            "po_result": {
+                "raw_response": po_result["raw_response"],
+                "analysis": po_result["analysis"]
+            },
+            "validated_code": validated_code,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.entries.append(entry)
+        self._matrix = None
+        self._save()
+        return entry["id"]
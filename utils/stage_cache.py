@@ -0,0 +1,103 @@
+"""
+Cache des sorties d'étapes, adressé par empreinte des entrées
+Comme un système de build : une étape (PO, DEV, QA, TL) dont les entrées
+n'ont pas changé (demande, contexte PDF, sorties amont, version du prompt)
+réutilise sa sortie enregistrée au lieu de rappeler le LLM. Les entrées
+expirent après MAX_AGE_S et les moins récemment utilisées sont supprimées
+au-delà de MAX_ENTRIES.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from utils.checkpoint import read_compressed_json, write_compressed_json
+
+
+DEFAULT_STAGE_CACHE_DIR = os.path.join(".ai_dev_team", "stage_cache")
+
+# Entrées conservées au plus (les moins récemment utilisées sont supprimées)
+MAX_ENTRIES = 500
+
+# Durée de vie d'une entrée (secondes) : au-delà, l'étape est recalculée
+MAX_AGE_S = 7 * 24 * 3600
+
+
+def stage_fingerprint(*inputs: Any) -> str:
+    """Empreinte SHA-256 stable des entrées d'une étape"""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    Sorties d'étapes stockées en JSON gzip, un fichier par empreinte
+
+    La date de modification d'un fichier sert de date de dernière
+    utilisation (mise à jour à chaque lecture) pour l'expiration et l'éviction.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_STAGE_CACHE_DIR,
+        max_entries: int = MAX_ENTRIES,
+        max_age_s: float = MAX_AGE_S
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, fingerprint[:2], f"{fingerprint}.json.gz")
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        path = self._path(fingerprint)
+        try:
+            expired = time.time() - os.path.getmtime(path) > self.max_age_s
+        except OSError:
+            self.misses += 1
+            return None
+        if expired:
+            os.remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        os.utime(path)
+        return read_compressed_json(path)
+
+    def put(self, fingerprint: str, stage: Dict):
+        write_compressed_json(self._path(fingerprint), stage)
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_entries
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        entries = sorted(
+            (
+                entry
+                for shard in os.scandir(self.directory) if shard.is_dir()
+                for entry in os.scandir(shard.path) if entry.name.endswith(".json.gz")
+            ),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        oldest_kept = time.time() - self.max_age_s
+        removed = 0
+        for index, entry in enumerate(entries):
+            if index >= self.max_entries or entry.stat().st_mtime < oldest_kept:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
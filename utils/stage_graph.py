@@ -0,0 +1,187 @@
+"""
+Graphe de dépendances des étapes d'un run
+Chaque étape déclare les étapes dont elle dépend ; l'exécuteur lance en
+parallèle toutes celles dont les dépendances sont terminées. Une étape en
+échec (ou annulée) annule ses descendantes, le long des arêtes du graphe.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class StageGraph:
+    """
+    Graphe orienté acyclique d'étapes
+
+    Chaque étape est une fonction qui reçoit les résultats de ses
+    dépendances ({nom: résultat}) et retourne son propre résultat.
+
+    Args:
+        name: Nom du graphe (affiché dans la trace)
+        max_workers: Étapes exécutées simultanément au plus
+    """
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self.nodes: Dict[str, Dict] = {}
+        self.results: Dict[str, Any] = {}
+        self._origin: Optional[float] = None
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = ()) -> "StageGraph":
+        """Ajoute une étape ; ses dépendances doivent déjà faire partie du graphe"""
+        deps = list(deps)
+        if name in self.nodes:
+            raise ValueError(f"Étape {name} déjà présente dans le graphe {self.name}")
+        missing = [dep for dep in deps if dep not in self.nodes]
+        if missing:
+            raise ValueError(f"Dépendance(s) inconnue(s) pour {name} : {', '.join(missing)}")
+        self.nodes[name] = {
+            "fn": fn,
+            "deps": deps,
+            "status": PENDING,
+            "reason": None,
+            "start_s": None,
+            "duration_s": None
+        }
+        return self
+
+    def descendants(self, name: str) -> List[str]:
+        """Étapes qui dépendent (directement ou non) de `name`"""
+        found, frontier = [], [name]
+        while frontier:
+            current = frontier.pop()
+            for other, node in self.nodes.items():
+                if current in node["deps"] and other not in found:
+                    found.append(other)
+                    frontier.append(other)
+        return found
+
+    def cancel(self, name: str, reason: str):
+        """Annule une étape pas encore lancée et toutes ses descendantes"""
+        for target in [name] + self.descendants(name):
+            node = self.nodes[target]
+            if node["status"] == PENDING:
+                node["status"] = CANCELLED
+                node["reason"] = reason if target == name else f"dépendance {name} annulée"
+
+    def _ready(self) -> List[str]:
+        return [
+            name for name, node in self.nodes.items()
+            if node["status"] == PENDING and all(self.nodes[dep]["status"] == DONE for dep in node["deps"])
+        ]
+
+    def _start(self, name: str) -> Callable[[], Any]:
+        node = self.nodes[name]
+        node["status"] = RUNNING
+        node["start_s"] = round(time.perf_counter() - self._origin, 3)
+        inputs = {dep: self.results[dep] for dep in node["deps"]}
+        return lambda: node["fn"](inputs)
+
+    def _finish(self, name: str, result: Any = None, error: Optional[BaseException] = None):
+        node = self.nodes[name]
+        node["duration_s"] = round(time.perf_counter() - self._origin - node["start_s"], 3)
+        if error is None:
+            node["status"] = DONE
+            self.results[name] = result
+        else:
+            node["status"] = FAILED
+            node["reason"] = f"{type(error).__name__}: {error}"
+            for target in self.descendants(name):
+                if self.nodes[target]["status"] == PENDING:
+                    self.nodes[target]["status"] = CANCELLED
+                    self.nodes[target]["reason"] = f"dépendance {name} en échec"
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Exécute le graphe avec le maximum de parallélisme sûr
+
+        Une étape seule prête s'exécute dans le thread appelant (pas de
+        coût de thread pour un graphe séquentiel). Les étapes indépendantes
+        d'une étape en échec vont à leur terme, puis la première erreur est
+        relancée.
+
+        Returns:
+            Résultats des étapes terminées {nom: résultat}
+        """
+        self._origin = time.perf_counter()
+        first_error: Optional[BaseException] = None
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                ready = self._ready()
+                if len(ready) == 1 and not running:
+                    # Exécution en ligne : comportement identique à un appel direct
+                    name = ready[0]
+                    call = self._start(name)
+                    try:
+                        self._finish(name, call())
+                    except BaseException as exc:
+                        self._finish(name, error=exc)
+                        first_error = first_error or exc
+                    continue
+
+                for name in ready:
+                    running[pool.submit(self._start(name))] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    self._finish(name, None if error else future.result(), error)
+                    first_error = first_error or error
+
+        if first_error is not None:
+            raise first_error
+        return self.results
+
+    def summary(self) -> List[Dict]:
+        """État de chaque étape (dépendances, statut, début et durée relatifs)"""
+        return [
+            {
+                "stage": name,
+                "deps": list(node["deps"]),
+                "status": node["status"],
+                "start_s": node["start_s"],
+                "duration_s": node["duration_s"],
+                "reason": node["reason"]
+            }
+            for name, node in self.nodes.items()
+        ]
+
+    def to_mermaid(self) -> str:
+        """Graphe au format Mermaid, étapes colorées selon leur statut"""
+        lines = ["graph LR"]
+        for name, node in self.nodes.items():
+            label = name if node["duration_s"] is None else f"{name}<br/>{node['duration_s']} s"
+            lines.append(f'    {name}["{label}"]:::{node["status"]}')
+        for name, node in self.nodes.items():
+            lines += [f"    {dep} --> {name}" for dep in node["deps"]]
+        lines += [
+            "    classDef done fill:#d4edda",
+            "    classDef failed fill:#f8d7da",
+            "    classDef cancelled fill:#e2e3e5,stroke-dasharray: 4",
+            "    classDef pending fill:#fff",
+            "    classDef running fill:#fff3cd"
+        ]
+        return "\n".join(lines)
+
+    def describe(self) -> str:
+        """Résumé textuel d'une ligne : étapes parallèles regroupées par niveau"""
+        levels: Dict[str, int] = {}
+        for name, node in self.nodes.items():
+            levels[name] = 1 + max((levels[dep] for dep in node["deps"]), default=-1)
+        by_level: Dict[int, List[str]] = {}
+        for name, level in levels.items():
+            by_level.setdefault(level, []).append(name)
+        return " → ".join(" ∥ ".join(names) for _, names in sorted(by_level.items()))
@@ -0,0 +1,218 @@
+"""
+Streaming avec arrêt anticipé
+La réponse est lue au fil de l'eau ; dès que les champs dont l'agent a
+besoin sont complets et valides, le flux est fermé, ce qui interrompt la
+génération (et sa facturation) côté fournisseur. La prose finale que le
+modèle ajoute souvent après ces champs n'est ni attendue ni payée.
+"""
+
+import json
+import re
+import time
+from typing import Callable, Dict, Iterable, Optional, Type
+
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from utils.token_usage import estimate_tokens
+
+# Un champ ne peut se terminer qu'à la réception de l'un de ces caractères
+_BOUNDARIES = ("\n", ",", "}", "`")
+
+_DECODER = json.JSONDecoder()
+
+
+def numbered_section(title: str) -> str:
+    """Motif d'une liste numérotée markdown terminée (ligne vide ou ligne suivante non numérotée)"""
+    return rf"{re.escape(title)}[^\n]*\n(?:[ \t]*\d+\.[^\n]*\n)+[ \t]*(?:\n|[^\d\s])"
+
+
+def bold_section(title: str) -> str:
+    """Motif d'une section « **Titre** : » terminée par le titre en gras suivant"""
+    return rf"\*\*{re.escape(title)}\*\*[^\n]*\n.*?\n[ \t]*\*\*"
+
+
+def python_block(after: str = "") -> str:
+    """Motif d'un bloc ```python fermé (le premier qui suit `after`)"""
+    return rf"{re.escape(after)}.*?```python\n.*?\n```" if after else r"```python\n.*?\n```"
+
+
+class FieldDetector:
+    """
+    Détecte dans une réponse partielle la fin des champs requis
+
+    Args:
+        patterns: Motif markdown de chaque champ requis {nom: regex}
+        schema: Schéma pydantic en mode JSON ; les champs sont alors
+            cherchés par leur nom dans l'objet JSON et la réponse
+            tronquée doit être valide contre le schéma
+    """
+
+    def __init__(self, patterns: Dict[str, str], schema: Optional[Type[BaseModel]] = None):
+        self.fields = list(patterns)
+        self.schema = schema
+        self.patterns = {
+            name: re.compile(pattern, re.DOTALL | re.MULTILINE) for name, pattern in patterns.items()
+        }
+
+    def complete(self, text: str) -> Optional[str]:
+        """Réponse exploitable si tous les champs requis sont complets et valides, sinon None"""
+        if self.schema is None:
+            return text if all(pattern.search(text) for pattern in self.patterns.values()) else None
+
+        ends = [self._json_value_end(text, name) for name in self.fields]
+        if None in ends:
+            return None
+        # Objet fermé juste après le dernier champ requis : les champs précédents sont complets
+        closed = text[:max(ends)] + "}"
+        try:
+            self.schema.model_validate_json(closed[closed.find("{"):])
+        except ValueError:
+            return None
+        return closed
+
+    @staticmethod
+    def _json_value_end(text: str, name: str) -> Optional[int]:
+        """Position de fin de la valeur du champ `name`, None si elle n'est pas encore complète"""
+        match = re.search(rf'(?<!\\)"{re.escape(name)}"\s*:\s*', text)
+        if not match:
+            return None
+        try:
+            _, end = _DECODER.raw_decode(text, match.end())
+        except ValueError:
+            return None
+        # Un nombre peut encore s'allonger : la valeur n'est sûre qu'une fois suivie d'un séparateur
+        return end if text[end:].lstrip()[:1] in (",", "}") else None
+
+
+class EarlyStopLLM:
+    """
+    Enveloppe d'un client LLM : la réponse est lue en streaming et la
+    génération interrompue dès que le détecteur la juge exploitable
+
+    Expose invoke/ainvoke comme le client enveloppé (compatible avec
+    RunBudget.invoke). Un client sans streaming est appelé normalement.
+
+    Args:
+        llm: Client LangChain (stream/astream)
+        detector: Détecteur des champs requis
+        calibrate: Lire la réponse jusqu'au bout en notant où les champs
+            étaient complets (mesure exacte de l'économie possible)
+        on_chunk: Appelé avec le texte de chaque fragment reçu (suivi en direct)
+
+    Après chaque appel, `stats` décrit le flux (None sans streaming).
+    """
+
+    def __init__(
+        self,
+        llm,
+        detector: FieldDetector,
+        calibrate: bool = False,
+        on_chunk: Optional[Callable[[str], None]] = None
+    ):
+        self.llm = llm
+        self.detector = detector
+        self.calibrate = calibrate
+        self.on_chunk = on_chunk
+        self.stats: Optional[Dict] = None
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return getattr(self.llm, "model_name", None)
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        if not hasattr(self.llm, "stream"):
+            return self.llm.invoke(messages, **kwargs)
+        reader = _StreamReader(self.detector, self.calibrate, self.on_chunk)
+        stream = self.llm.stream(messages, **kwargs)
+        try:
+            for chunk in stream:
+                if reader.feed(chunk):
+                    break
+        finally:
+            # Fermer le flux abandonne la requête HTTP : la génération s'arrête
+            stream.close()
+        return self._finish(reader)
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        if not hasattr(self.llm, "astream"):
+            return await self.llm.ainvoke(messages, **kwargs)
+        reader = _StreamReader(self.detector, self.calibrate, self.on_chunk)
+        stream = self.llm.astream(messages, **kwargs)
+        try:
+            async for chunk in stream:
+                if reader.feed(chunk):
+                    break
+        finally:
+            await stream.aclose()
+        return self._finish(reader)
+
+    def _finish(self, reader: "_StreamReader") -> AIMessage:
+        self.stats = reader.stats()
+        return AIMessage(content=reader.content())
+
+
+class _StreamReader:
+    """Accumule les fragments d'un flux et repère l'instant où les champs requis sont complets"""
+
+    def __init__(self, detector: FieldDetector, calibrate: bool, on_chunk: Optional[Callable[[str], None]] = None):
+        self.detector = detector
+        self.calibrate = calibrate
+        self.on_chunk = on_chunk
+        self.started = time.perf_counter()
+        self.first_chunk: Optional[float] = None
+        self.parts = []
+        self.text = ""
+        self.cut: Optional[Dict] = None
+
+    def feed(self, chunk) -> bool:
+        """Ajoute un fragment ; True quand la lecture peut s'arrêter"""
+        content = chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+        self.first_chunk = self.first_chunk or time.perf_counter()
+        self.parts.append(content)
+        if self.on_chunk and content:
+            self.on_chunk(content)
+        if self.cut is not None or not any(boundary in content for boundary in _BOUNDARIES):
+            return False
+        self.text = "".join(self.parts)
+        answer = self.detector.complete(self.text)
+        if answer is None:
+            return False
+        self.cut = {"answer": answer, "tokens": estimate_tokens(self.text), "at": time.perf_counter()}
+        return not self.calibrate
+
+    def content(self) -> str:
+        if self.cut is not None and not self.calibrate:
+            return self.cut["answer"]
+        return "".join(self.parts)
+
+    def stats(self) -> Dict:
+        ended = time.perf_counter()
+        tokens = estimate_tokens("".join(self.parts))
+        decode_s = ended - (self.first_chunk or ended)
+        stats = {
+            "early_stop": self.cut is not None and not self.calibrate,
+            "calibration": self.calibrate,
+            "completion_tokens": tokens,
+            "elapsed_ms": round((ended - self.started) * 1000),
+            # Débit de génération observé, pour estimer le temps des tokens non générés
+            "ms_per_token": round(decode_s * 1000 / tokens, 3) if tokens else 0.0,
+            "fields_tokens": None,
+            "fields_ms": None
+        }
+        if self.cut is not None:
+            stats["fields_tokens"] = self.cut["tokens"]
+            stats["fields_ms"] = round((self.cut["at"] - self.started) * 1000)
+        return stats
+
+
+def summarize(calls: Iterable[Dict]) -> Dict:
+    """Bilan des appels en streaming (entrées « stream » de BaseAgent.llm_calls)"""
+    streamed = [call["stream"] for call in calls if call.get("stream")]
+    return {
+        "calls": len(streamed),
+        "early_stopped": sum(1 for stream in streamed if stream["early_stop"]),
+        "calibrations": sum(1 for stream in streamed if stream["calibration"]),
+        "tokens_saved": sum(stream["saved_tokens"] for stream in streamed),
+        "ms_saved": sum(stream["saved_ms"] for stream in streamed)
+    }
@@ -0,0 +1,68 @@
+"""
+Comptage des tokens des appels LLM
+Utilise l'usage renvoyé par le fournisseur quand il est disponible,
+sinon une estimation (~4 caractères par token).
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimation grossière du nombre de tokens d'un texte"""
+    if not text:
+        return 0
+    return max(1, len(text) // 4)
+
+
+def messages_tokens(messages: Iterable) -> int:
+    """Estimation des tokens d'un prompt (liste de messages LangChain)"""
+    return sum(estimate_tokens(getattr(message, "content", str(message))) for message in messages)
+
+
+def response_tokens(response, messages: Iterable = ()) -> Dict[str, int]:
+    """
+    Tokens consommés par un appel
+
+    Returns:
+        Dict avec prompt, completion et total
+    """
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or metadata.get("usage") or {}
+
+    prompt = usage.get("prompt_tokens") or usage.get("input_tokens")
+    completion = usage.get("completion_tokens") or usage.get("output_tokens")
+    if prompt is None:
+        prompt = messages_tokens(messages)
+    if completion is None:
+        completion = estimate_tokens(getattr(response, "content", ""))
+
+    return {
+        "prompt": prompt,
+        "completion": completion,
+        "total": prompt + completion
+    }
+
+
+def _base_client(llm):
+    """Client LangChain sous les enveloppes (HedgedLLM.primary, EarlyStopLLM.llm)"""
+    while True:
+        inner = getattr(llm, "primary", None) or getattr(llm, "llm", None)
+        if inner is None:
+            return llm
+        llm = inner
+
+
+def max_tokens_param(llm) -> str:
+    """Nom du paramètre limitant la longueur de la réponse (num_predict pour Ollama)"""
+    return "num_predict" if type(_base_client(llm)).__name__ == "ChatOllama" else "max_tokens"
+
+
+def max_tokens_kwargs(llm, max_tokens: int) -> Dict[str, Any]:
+    """Paramètre d'appel limitant la longueur de la réponse (nom propre au fournisseur)"""
+    return {max_tokens_param(llm): max_tokens}
+
+
+def configured_max_tokens(llm, kwargs: Dict[str, Any]) -> Optional[int]:
+    """Limite de réponse de l'appel, ou à défaut celle du client (None sans limite)"""
+    param = max_tokens_param(llm)
+    return kwargs.get(param) or getattr(_base_client(llm), param, None)